@@ -0,0 +1,318 @@
+"""Load and latency benchmark of the read endpoints of the API.
+
+    cd src
+    python -m benchmarks.bench_api --spawn-mongod --records 100000 \
+        --concurrency 1,8,32 --output bench.json --baseline previous.json
+
+1. Database: the mongod of --mongo-uri, or with --spawn-mongod a disposable mongod
+   started in a temporary directory (needs the mongod binary).
+2. Seed: the --database is dropped and filled with --records synthetic records, then
+   the indexes and the statistics are built as by the harvest. --no-seed keeps it.
+3. Server: the API already serving that database at --url, or the API started on it
+   by serve_api, with --workers gunicorn workers.
+4. Each scenario is requested at each concurrency level. A unique query parameter is
+   added to each request so that the response cache is not hit, unless --use-cache.
+5. The report is printed, or written to --output, as JSON: requests per second and
+   p50/p95/p99 latencies of each scenario and concurrency level. With --baseline, the
+   p95 latencies are compared to a former report and the exit status is 1 when one of
+   them is more than --max-regression slower.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from pymongo import MongoClient
+
+from benchmarks.load import run_load, wait_until_up
+from benchmarks.synthetic import WORDS, synthetic_records
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+from flask_api_crawler_arxiv.mongodb.StatsManager import StatsManager
+from flask_api_crawler_arxiv.utils.keyset_cursor import KEYSET_SORT, encode_cursor
+
+_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Articles per page of /articles/, see articles_page.ARTICLES_PER_PAGE.
+PER_PAGE = 50
+
+
+def spawn_mongod(port):
+    """
+    Start a disposable mongod storing its data in a temporary directory.
+
+    Args:
+        port (int): Port of the mongod, on 127.0.0.1.
+
+    Returns:
+        tuple: The process, its connection string and its data directory.
+    """
+    dbpath = tempfile.mkdtemp(prefix="arxiv_bench_")
+    process = subprocess.Popen(
+        ["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return process, f"mongodb://127.0.0.1:{port}", dbpath
+
+
+def seed(db, count, random_seed=0, chunk_size=1000):
+    """
+    Replace the articles of a database by synthetic records.
+
+    Args:
+        db (pymongo.database.Database): Benchmark database.
+        count (int): Number of records.
+        random_seed (int, optional): Seed of the generated records. Defaults to 0.
+        chunk_size (int, optional): Records inserted per insert_many. Defaults to 1000.
+    """
+    db.arxiv_data_doc.drop()
+    chunk = []
+    for record in synthetic_records(count, random_seed):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            db.arxiv_data_doc.insert_many(chunk, ordered=False)
+            chunk = []
+    if chunk:
+        db.arxiv_data_doc.insert_many(chunk, ordered=False)
+
+    IndexManager(db).ensure_indexes()
+    StatsManager(db).ensure_indexes()
+    StatsManager(db).refresh()
+
+
+def build_scenarios(db, sample_size=500):
+    """
+    Build the paths of each scenario from the articles of the database.
+
+    Args:
+        db (pymongo.database.Database): Seeded database.
+        sample_size (int, optional): Articles requested by id. Defaults to 500.
+
+    Returns:
+        dict: Paths requested in turn, by scenario.
+    """
+    total = db.arxiv_data_doc.estimated_document_count()
+    deep_position = max(total * 9 // 10 - 1, 0)
+    deep_page = deep_position // PER_PAGE + 1
+
+    deep_article = next(
+        db.arxiv_data_doc.find({}, {"datestamp": 1})
+        .sort(KEYSET_SORT)
+        .skip(deep_position)
+        .limit(1),
+        None,
+    )
+    ids = [
+        str(document["_id"])
+        for document in db.arxiv_data_doc.aggregate(
+            [{"$sample": {"size": sample_size}}, {"$project": {"_id": 1}}]
+        )
+    ]
+    months = [(year, month) for year in range(2008, 2024, 3) for month in (1, 6, 11)]
+
+    scenarios = {
+        "articles_first_page": ["/articles/"],
+        "articles_deep_page": [f"/articles/?page={deep_page}"],
+        "articles_title_filter": [f"/articles/?title={word}" for word in WORDS[:10]],
+        "articles_description_filter": [
+            f"/articles/?description={word}" for word in WORDS[10:20]
+        ],
+        "articles_date_range": [
+            f"/articles/?start_date={year}-{month:02d}-01"
+            f"&end_date={year}-{month:02d}-28"
+            for year, month in months
+        ],
+        "articles_search": [f"/articles/?q={word}" for word in WORDS[20:30]],
+        "article_by_id": [f"/article/{article_id}" for article_id in ids],
+        "text_by_id": [f"/text/{article_id}" for article_id in ids],
+    }
+    if deep_article is not None:
+        scenarios["articles_deep_cursor"] = [
+            f"/articles/?cursor={encode_cursor(deep_article)}"
+        ]
+    return scenarios
+
+
+async def run_scenarios(url, scenarios, concurrency_levels, requests, cache_buster):
+    """
+    Request each scenario at each concurrency level.
+
+    Args:
+        url (str): URL of the API.
+        scenarios (dict): Paths of each scenario.
+        concurrency_levels ([int]): Numbers of requests in flight.
+        requests (int): Requests per scenario and concurrency level.
+        cache_buster (bool): Bypass the response cache of the API.
+
+    Returns:
+        list[dict]: Summary of each run, with its scenario and concurrency.
+    """
+    await wait_until_up(url)
+    results = []
+    for name, paths in scenarios.items():
+        # Warm up the caches of MongoDB and the connection pools.
+        await run_load(url, paths, 4, min(requests, 50), cache_buster=cache_buster)
+        for concurrency in concurrency_levels:
+            result = await run_load(
+                url, paths, concurrency, requests, cache_buster=cache_buster
+            )
+            results.append(
+                {"scenario": name, "concurrency": concurrency, **result.summary()}
+            )
+            print(
+                f"{name} x{concurrency}: {results[-1]['requests_per_second']} req/s, "
+                f"p95 {results[-1]['p95_ms']} ms",
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """
+    Compare the p95 latencies of a run to a former report.
+
+    Args:
+        results (list[dict]): Summaries of the run.
+        baseline (dict): Former report.
+        max_regression (float): Accepted slowdown, 0.2 for 20%.
+
+    Returns:
+        list[dict]: The runs slower than the baseline by more than max_regression.
+    """
+    former = {
+        (result["scenario"], result["concurrency"]): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        before = former.get((result["scenario"], result["concurrency"]))
+        if not before or not before["p95_ms"] or result["p95_ms"] is None:
+            continue
+        ratio = result["p95_ms"] / before["p95_ms"]
+        if ratio > 1 + max_regression:
+            regressions.append(
+                {
+                    "scenario": result["scenario"],
+                    "concurrency": result["concurrency"],
+                    "baseline_p95_ms": before["p95_ms"],
+                    "p95_ms": result["p95_ms"],
+                    "ratio": round(ratio, 2),
+                }
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the latency and throughput of the API."
+    )
+    parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:27017")
+    parser.add_argument("--spawn-mongod", action="store_true")
+    parser.add_argument("--mongod-port", type=int, default=27099)
+    parser.add_argument("--database", default="arxiv_bench")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--url", help="URL of an API already serving the database.")
+    parser.add_argument("--port", type=int, default=5010)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--scenario", action="append", dest="scenarios")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--use-cache", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    arguments = parser.parse_args()
+
+    processes = []
+    dbpath = None
+    try:
+        mongo_uri = arguments.mongo_uri
+        if arguments.spawn_mongod:
+            mongod, mongo_uri, dbpath = spawn_mongod(arguments.mongod_port)
+            processes.append(mongod)
+
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=30000)
+        db = client[arguments.database]
+        if not arguments.no_seed:
+            print(f"Seeding {arguments.records} records", file=sys.stderr)
+            seed(db, arguments.records, arguments.seed)
+
+        scenarios = build_scenarios(db)
+        if arguments.scenarios:
+            scenarios = {name: scenarios[name] for name in arguments.scenarios}
+
+        url = arguments.url
+        if url is None:
+            url = f"http://127.0.0.1:{arguments.port}"
+            processes.append(
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "benchmarks.serve_api",
+                        "--mongo-uri",
+                        mongo_uri,
+                        "--database",
+                        arguments.database,
+                        "--port",
+                        str(arguments.port),
+                        "--workers",
+                        str(arguments.workers),
+                    ],
+                    cwd=_SRC,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            )
+
+        results = asyncio.run(
+            run_scenarios(
+                url,
+                scenarios,
+                [int(level) for level in arguments.concurrency.split(",")],
+                arguments.requests,
+                not arguments.use_cache,
+            )
+        )
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+        if dbpath is not None:
+            shutil.rmtree(dbpath, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "records": arguments.records,
+        "workers": arguments.workers,
+        "requests": arguments.requests,
+        "cache": arguments.use_cache,
+        "results": results,
+    }
+
+    status = 0
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            report["regressions"] = compare(
+                results, json.load(baseline_file), arguments.max_regression
+            )
+        status = 1 if report["regressions"] else 0
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    sys.exit(status)
@@ -0,0 +1,369 @@
+"""Micro-benchmarks of the stages of a harvest.
+
+    cd src
+    python -m benchmarks.bench_harvest --records 100,1000,10000,100000 \
+        --mongo-uri mongodb://127.0.0.1:27017 --output harvest.json
+
+The pages are served by a local OAI-PMH stub, in its own process: synthetic pages of
+--page-size records, or with --recorded the XML files of a directory, replies recorded
+from arXiv, each file being served for the resumptionToken of the file before it.
+
+Each stage is measured in a fresh process, so that its peak RSS is its own:
+
+- fetch: ListRecordOAI.harvest, the requests of _list_record following the tokens.
+- xmltodict: RecordConverterOAI.xmltodict of each page.
+- sax: RecordConverterOAI.get_listrecord_dict of each page.
+- normalize: RecordConverterOAI.iter_normalized_records of each page.
+- write: RecordUpserter.upsert of the normalized records, needs --mongo-uri.
+- pipeline: run_harvest_pipeline from the stub to RecordUpserter, or to a no-op writer
+  without --mongo-uri.
+
+Pages are fetched from the stub by every stage, only the time of the stage itself is
+counted in its records per second. The report is JSON.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.synthetic import synthetic_oai_pages
+from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordOAI
+from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import (
+    RecordConverterOAI,
+)
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter, UpsertReport
+from flask_api_crawler_arxiv.python_cron.harvest_pipeline import run_harvest_pipeline
+
+STAGES = ("fetch", "xmltodict", "sax", "normalize", "write", "pipeline")
+
+# Stages writing to MongoDB.
+_WRITE_STAGES = ("write", "pipeline")
+
+
+def _recorded_pages(directory):
+    """
+    Map the resumption tokens of recorded replies to the reply they resume to.
+
+    Args:
+        directory (str): Directory of the XML files, served in the order of their names.
+
+    Returns:
+        dict: XML of each page by resumption token, the first page under None.
+    """
+    pages = {}
+    token = None
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".xml"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as xml_file:
+            xml = xml_file.read()
+        pages[token] = xml
+        token = ListRecordOAI._build_page(xml).resumption_token
+    return pages
+
+
+def _serve_stub(port, count, page_size, seed, recorded, ready):
+    """
+    Serve ListRecords replies on 127.0.0.1 until the process is terminated.
+
+    Args:
+        port (int): Port of the stub.
+        count (int): Records of the synthetic list.
+        page_size (int): Records per synthetic page.
+        seed (int): Seed of the synthetic records.
+        recorded (str): Directory of recorded replies, None for synthetic pages.
+        ready (multiprocessing.Event): Set once the stub listens.
+    """
+    # Pages are rendered before serving, so fetch measures the client, not the stub.
+    if recorded:
+        pages = _recorded_pages(recorded)
+    else:
+        pages = {
+            str(page) if page else None: xml
+            for page, xml in enumerate(synthetic_oai_pages(count, page_size, seed))
+        }
+    pages = {token: xml.encode("utf-8") for token, xml in pages.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            token = parse_qs(urlsplit(self.path).query).get("resumptionToken", [None])
+            body = pages.get(token[0])
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    ready.set()
+    server.serve_forever()
+
+
+def start_stub(port, count, page_size, seed=0, recorded=None):
+    """
+    Start the OAI-PMH stub in its own process.
+
+    Args:
+        port (int): Port of the stub.
+        count (int): Records of the synthetic list.
+        page_size (int): Records per synthetic page.
+        seed (int, optional): Seed of the synthetic records. Defaults to 0.
+        recorded (str, optional): Directory of recorded replies.
+
+    Returns:
+        multiprocessing.Process: The stub process, listening.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    process = context.Process(
+        target=_serve_stub,
+        args=(port, count, page_size, seed, recorded, ready),
+        daemon=True,
+    )
+    process.start()
+    # Rendering 100k records takes about a minute.
+    if not ready.wait(600):
+        process.terminate()
+        raise TimeoutError("The OAI-PMH stub did not start")
+    return process
+
+
+def _harvest_config(url, options):
+    return {
+        "ARXHOST": url,
+        "ARXSET": "cs",
+        "ARXCHECKTIMEMINUTES": 1,
+        "ARXTIMEOUT": 600,
+        "ARXMAXRETRIES": 0,
+        "ARXPARSEWORKERS": options["parse_workers"],
+        "ARXWRITEWORKERS": options["write_workers"],
+    }
+
+
+def _collection(options):
+    from pymongo import MongoClient
+
+    client = MongoClient(options["mongo_uri"], serverSelectionTimeoutMS=30000)
+    collection = client[options["database"]].arxiv_data_doc
+    collection.drop()
+    return collection
+
+
+def _run_stage(stage, url, options):
+    """
+    Harvest the stub and measure one stage, in a fresh process.
+
+    Args:
+        stage (str): Stage measured, one of STAGES.
+        url (str): URL of the OAI-PMH stub.
+        options (dict): Options of the run.
+
+    Returns:
+        dict: Pages, records, bytes and seconds of the stage, its records per second
+            and the peak RSS of the process.
+    """
+    config = _harvest_config(url, options)
+    converter = RecordConverterOAI()
+    upserter = RecordUpserter(chunk_size=options["chunk_size"])
+    db = None
+    if stage in _WRITE_STAGES and options["mongo_uri"]:
+        db = _collection(options).database
+    pages = ListRecordOAI(config).harvest()
+
+    result = {"pages": 0, "records": 0, "bytes": 0, "fetch_seconds": 0.0}
+    seconds = 0.0
+
+    if stage == "pipeline":
+
+        def write_records(records):
+            if db is None:
+                return UpsertReport(inserted=len(records))
+            return upserter.upsert(db, records)
+
+        def counted_pages():
+            for page in pages:
+                result["pages"] += 1
+                result["bytes"] += len(page.xml)
+                yield page
+
+        started = time.perf_counter()
+        report = run_harvest_pipeline(
+            counted_pages(), write_records, lambda *_: None, config, False
+        )
+        seconds = time.perf_counter() - started
+        result["records"] = report.inserted + report.updated + report.unchanged
+        del result["fetch_seconds"]
+    else:
+        while True:
+            started = time.perf_counter()
+            page = next(pages, None)
+            result["fetch_seconds"] += time.perf_counter() - started
+            if page is None:
+                break
+            result["pages"] += 1
+            result["bytes"] += len(page.xml)
+
+            if stage == "fetch":
+                records = page.xml.count("<record>")
+            elif stage == "xmltodict":
+                started = time.perf_counter()
+                listed = converter.xmltodict(page.xml)["OAI-PMH"]["ListRecords"]
+                seconds += time.perf_counter() - started
+                records = len(listed.get("record") or [])
+            elif stage == "sax":
+                started = time.perf_counter()
+                records = len(converter.get_listrecord_dict(page.xml))
+                seconds += time.perf_counter() - started
+            elif stage == "normalize":
+                started = time.perf_counter()
+                records = len(list(converter.iter_normalized_records(page.xml)))
+                seconds += time.perf_counter() - started
+            else:
+                normalized = list(converter.iter_normalized_records(page.xml))
+                started = time.perf_counter()
+                upserter.upsert(db, normalized)
+                seconds += time.perf_counter() - started
+                records = len(normalized)
+            result["records"] += records
+
+        if stage == "fetch":
+            seconds = result["fetch_seconds"]
+
+    result["seconds"] = round(seconds, 3)
+    result["records_per_second"] = (
+        round(result["records"] / seconds, 1) if seconds > 0 else None
+    )
+    if "fetch_seconds" in result:
+        result["fetch_seconds"] = round(result["fetch_seconds"], 3)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    result["peak_rss_mb"] = round(peak_rss / 1024, 1)
+    return result
+
+
+def measure(stage, url, options):
+    """
+    Run _run_stage in a fresh process.
+
+    Args:
+        stage (str): Stage measured, one of STAGES.
+        url (str): URL of the OAI-PMH stub.
+        options (dict): Options of the run.
+
+    Returns:
+        dict: Measures of the stage, see _run_stage.
+    """
+    # Workers of a multiprocessing.Pool are daemons, which cannot start the parse pool.
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(_run_stage, stage, url, options).result()
+
+
+def benchmark(sizes, stages, options):
+    """
+    Measure each stage on lists of each size.
+
+    Args:
+        sizes ([int]): Records of each list, ignored with recorded replies.
+        stages ([str]): Stages measured.
+        options (dict): Options of the run.
+
+    Returns:
+        list[dict]: Measures of each stage and size.
+    """
+    results = []
+    for count in sizes:
+        stub = start_stub(
+            options["port"],
+            count,
+            options["page_size"],
+            options["seed"],
+            options["recorded"],
+        )
+        url = f"http://127.0.0.1:{options['port']}/oai2"
+        try:
+            for stage in stages:
+                result = {"stage": stage, "size": count, **measure(stage, url, options)}
+                results.append(result)
+                print(
+                    f"{stage} {count}: {result['records_per_second']} records/s, "
+                    f"peak RSS {result['peak_rss_mb']} MB",
+                    file=sys.stderr,
+                )
+        finally:
+            stub.terminate()
+            stub.join()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the stages of a harvest on a local OAI-PMH stub."
+    )
+    parser.add_argument("--records", default="100,1000,10000")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recorded", help="Directory of recorded ListRecords replies.")
+    parser.add_argument("--stage", action="append", dest="stages", choices=STAGES)
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--database", default="arxiv_bench_harvest")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--write-workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--output")
+    arguments = parser.parse_args()
+
+    stages = arguments.stages or [
+        stage for stage in STAGES if stage != "write" or arguments.mongo_uri
+    ]
+    if "write" in stages and not arguments.mongo_uri:
+        parser.error("the write stage needs --mongo-uri")
+
+    options = {
+        "page_size": arguments.page_size,
+        "seed": arguments.seed,
+        "recorded": arguments.recorded,
+        "mongo_uri": arguments.mongo_uri,
+        "database": arguments.database,
+        "chunk_size": arguments.chunk_size,
+        "parse_workers": arguments.parse_workers,
+        "write_workers": arguments.write_workers,
+        "port": arguments.port,
+    }
+    sizes = [int(size) for size in arguments.records.split(",")]
+    if arguments.recorded:
+        sizes = sizes[:1]
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "options": options,
+        "results": benchmark(sizes, stages, options),
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
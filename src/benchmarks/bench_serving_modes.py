@@ -0,0 +1,146 @@
+"""Side-by-side benchmark of the WSGI and the ASGI serving modes of the API.
+
+Both servers read the MongoDB database configured in the .env file. They are started
+by the benchmark with the same number of workers, or already running:
+
+    cd src
+    python -m benchmarks.bench_serving_modes --start --workers 4 \
+        --path "/articles/" --path "/articles/?title=neural" --path "/stats/subjects"
+
+The same paths are requested from each server at each concurrency level, with a
+unique query parameter so that the response cache of the API is not hit. The results
+are printed as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.load import run_load, wait_until_up
+
+_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER_COMMANDS = {
+    "wsgi": [
+        "gunicorn",
+        "--workers",
+        "{workers}",
+        "--bind",
+        "127.0.0.1:{port}",
+        "flask_api_crawler_arxiv.flask_api.wsgi:application",
+    ],
+    "asgi": [
+        "hypercorn",
+        "--workers",
+        "{workers}",
+        "--bind",
+        "127.0.0.1:{port}",
+        "flask_api_crawler_arxiv.flask_api.asgi:application",
+    ],
+}
+
+
+def start_server(mode, port, workers):
+    """
+    Start the server of a serving mode.
+
+    Args:
+        mode (str): wsgi or asgi.
+        port (int): Port of the server.
+        workers (int): Number of worker processes.
+
+    Returns:
+        subprocess.Popen: The server process.
+    """
+    command = [
+        part.format(workers=workers, port=port) for part in SERVER_COMMANDS[mode]
+    ]
+    return subprocess.Popen(
+        command,
+        cwd=_SRC,
+        env={**os.environ, "PYTHONPATH": _SRC},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def benchmark(urls, paths, concurrency_levels, requests, cache_buster):
+    """
+    Run the load of each concurrency level against each server.
+
+    Args:
+        urls (dict): URL of the server of each serving mode.
+        paths ([str]): Paths requested in turn.
+        concurrency_levels ([int]): Numbers of requests in flight.
+        requests (int): Requests per run.
+        cache_buster (bool): Bypass the response cache of the API.
+
+    Returns:
+        list[dict]: Summary of each run, with its mode and concurrency.
+    """
+    results = []
+    for concurrency in concurrency_levels:
+        for mode, url in urls.items():
+            await wait_until_up(url)
+            # Warm up the connection pools and the imports of the workers.
+            await run_load(url, paths, concurrency, min(requests, concurrency * 4))
+            result = await run_load(
+                url, paths, concurrency, requests, cache_buster=cache_buster
+            )
+            results.append(
+                {"mode": mode, "concurrency": concurrency, **result.summary()}
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the latency of the WSGI and the ASGI serving modes."
+    )
+    parser.add_argument("--wsgi-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--asgi-url", default="http://127.0.0.1:5002")
+    parser.add_argument(
+        "--start", action="store_true", help="Start gunicorn and hypercorn locally."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--use-cache", action="store_true")
+    arguments = parser.parse_args()
+
+    urls = {"wsgi": arguments.wsgi_url, "asgi": arguments.asgi_url}
+    servers = []
+    if arguments.start:
+        for mode, url in urls.items():
+            port = int(url.rsplit(":", 1)[1])
+            servers.append(start_server(mode, port, arguments.workers))
+
+    try:
+        results = asyncio.run(
+            benchmark(
+                urls,
+                arguments.paths or ["/articles/"],
+                [int(level) for level in arguments.concurrency.split(",")],
+                arguments.requests,
+                not arguments.use_cache,
+            )
+        )
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    json.dump(
+        {
+            "workers": arguments.workers,
+            "paths": arguments.paths or ["/articles/"],
+            "results": results,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
@@ -0,0 +1,194 @@
+"""Closed-loop HTTP load generator of the benchmarks.
+
+Each simulated client keeps one HTTP/1.1 keep-alive connection and sends its next request
+as soon as the previous response is read, so `concurrency` is the number of requests in
+flight. Only the standard library is used: the client runs on one event loop and does
+not limit the concurrency of the server with its own threads.
+"""
+
+import asyncio
+import itertools
+import time
+from urllib.parse import urlsplit
+
+
+class LoadResult:
+    """
+    Latencies and errors of a load run.
+    """
+
+    def __init__(self, latencies, errors, elapsed, statuses):
+        self.latencies = latencies
+        self.errors = errors
+        self.elapsed = elapsed
+        self.statuses = statuses
+
+    def summary(self):
+        """
+        Summarize the run.
+
+        Returns:
+            dict: Number of requests and errors, requests per second and latency
+                percentiles in milliseconds.
+        """
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "elapsed_seconds": round(self.elapsed, 3),
+            "requests_per_second": (
+                round(len(latencies) / self.elapsed, 1) if self.elapsed > 0 else 0.0
+            ),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+
+
+def percentile(sorted_latencies, q):
+    """
+    Return a percentile of latencies, by the nearest-rank method.
+
+    Args:
+        sorted_latencies ([float]): Latencies in seconds, sorted.
+        q (float): Percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile in milliseconds, None without latencies.
+    """
+    if not sorted_latencies:
+        return None
+    rank = max(int(-(-q * len(sorted_latencies) // 100)), 1)
+    return round(sorted_latencies[rank - 1] * 1000, 2)
+
+
+async def _read_response(reader):
+    """
+    Read a response, returns its status and whether the connection stays open.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by the server")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif status not in (204, 304):
+        await reader.read()
+        return status, False
+
+    return status, headers.get("connection", "").lower() != "close"
+
+
+async def run_load(
+    base_url, paths, concurrency, requests=1000, headers=None, cache_buster=False
+):
+    """
+    Send requests to a server with a fixed number of requests in flight.
+
+    Args:
+        base_url (str): URL of the server, such as http://127.0.0.1:5000.
+        paths ([str]): Paths requested in turn, with their query strings.
+        concurrency (int): Number of simulated clients.
+        requests (int, optional): Total number of requests. Defaults to 1000.
+        headers (dict, optional): Headers added to each request.
+        cache_buster (bool, optional): Add a unique query parameter to each request, so
+            that the response cache of the API is never hit. Defaults to False.
+
+    Returns:
+        LoadResult: Latencies and errors of the run.
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    extra_headers = "".join(
+        f"{name}: {value}\r\n" for name, value in (headers or {}).items()
+    )
+
+    counter = itertools.count()
+    latencies = []
+    statuses = {}
+    errors = 0
+
+    def next_request():
+        number = next(counter)
+        if number >= requests:
+            return None
+        path = paths[number % len(paths)]
+        if cache_buster:
+            path += ("&" if "?" in path else "?") + f"_bench={number}"
+        return (
+            f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n{extra_headers}\r\n"
+        ).encode("latin-1")
+
+    async def client():
+        nonlocal errors
+        reader = writer = None
+        while True:
+            request = next_request()
+            if request is None:
+                break
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await _read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status >= 500:
+                errors += 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return LoadResult(latencies, errors, time.perf_counter() - started, statuses)
+
+
+async def wait_until_up(base_url, path="/health", timeout=60):
+    """
+    Wait for a server to answer.
+
+    Args:
+        base_url (str): URL of the server.
+        path (str, optional): Path requested. Defaults to /health.
+        timeout (float, optional): Time to wait in seconds. Defaults to 60.
+
+    Raises:
+        TimeoutError: If the server does not answer in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = await run_load(base_url, [path], 1, requests=1)
+        if result.latencies and not result.errors:
+            return
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"{base_url} did not answer within {timeout}s")
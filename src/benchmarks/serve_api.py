@@ -0,0 +1,70 @@
+"""Serves the API on a benchmark database.
+
+The API reads the database configured in the .env file, this launcher points it to
+another one before serving it:
+
+    cd src
+    python -m benchmarks.serve_api --mongo-uri mongodb://127.0.0.1:27017 \
+        --database arxiv_bench --port 5010 --workers 4
+
+With --workers the API is served by gunicorn worker processes, as in production,
+otherwise by the threaded development server of Werkzeug.
+"""
+
+import argparse
+
+from werkzeug.serving import make_server
+
+from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.flask_api import app as api
+from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
+
+
+def use_database(mongo_uri, database):
+    """
+    Point the API to a database.
+
+    Args:
+        mongo_uri (str): MongoDB connection string.
+        database (str): Name of the database.
+    """
+    # The endpoints read the module global at each request.
+    api.db_manager = MongoDBManager(mongo_uri, database, app_config)
+
+
+def serve(port, workers=0):
+    """
+    Serve the API until interrupted.
+
+    Args:
+        port (int): Port of the server, on 127.0.0.1.
+        workers (int, optional): Number of gunicorn workers, 0 for the threaded
+            development server. Defaults to 0.
+    """
+    if not workers:
+        make_server("127.0.0.1", port, api.application, threaded=True).serve_forever()
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class _Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+            self.cfg.set("workers", workers)
+
+        def load(self):
+            return api.application
+
+    _Server().run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the API on a database.")
+    parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:27017")
+    parser.add_argument("--database", default="arxiv_bench")
+    parser.add_argument("--port", type=int, default=5010)
+    parser.add_argument("--workers", type=int, default=0)
+    arguments = parser.parse_args()
+
+    use_database(arguments.mongo_uri, arguments.database)
+    serve(arguments.port, arguments.workers)
@@ -0,0 +1,188 @@
+"""Synthetic arXiv records and OAI-PMH pages of the benchmarks.
+
+Records are generated from a seeded random generator, so that two runs with the same
+arguments work on the same data.
+"""
+
+import random
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "quantum neural network learning graph algebra topology field theory "
+    "entropy lattice gauge boson fermion spectral manifold stochastic optimal "
+    "transport inference bayesian kernel convex sparse tensor operator "
+    "dynamics chaos symmetry renormalization galaxy cosmology dark matter "
+    "string gravity black hole plasma laser photon superconductivity"
+).split()
+
+SUBJECTS = (
+    "Computer Science - Machine Learning",
+    "Computer Science - Data Structures and Algorithms",
+    "Mathematics - Algebraic Geometry",
+    "Mathematics - Probability",
+    "Quantum Physics",
+    "High Energy Physics - Theory",
+    "Astrophysics - Cosmology and Nongalactic Astrophysics",
+    "Condensed Matter - Superconductivity",
+    "Statistics - Methodology",
+    "Physics - Optics",
+)
+
+FIRST_DATESTAMP = datetime(2007, 4, 1)
+LAST_DATESTAMP = datetime(2024, 12, 31)
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def synthetic_record(number, rng):
+    """
+    Build a record of the normalized schema, see RecordConverterOAI.normalize_record.
+
+    Args:
+        number (int): Number of the record, makes its identifier.
+        rng (random.Random): Random generator.
+
+    Returns:
+        dict: The record.
+    """
+    span = (LAST_DATESTAMP - FIRST_DATESTAMP).days
+    datestamp = FIRST_DATESTAMP + timedelta(days=rng.randrange(span))
+    submitted = datestamp - timedelta(days=rng.randrange(365))
+    arxiv_id = f"{submitted:%y%m}.{number:05d}"
+    authors = max(number // 5, 50)
+
+    return {
+        "identifier": f"oai:arXiv.org:{arxiv_id}",
+        "datestamp": datestamp,
+        "sets": [rng.choice(("cs", "math", "physics", "stat"))],
+        "deleted": False,
+        "title": _sentence(rng, rng.randint(5, 12)).capitalize(),
+        "creators": [
+            f"Author{rng.randrange(authors)}, A." for _ in range(rng.randint(1, 5))
+        ],
+        "subjects": rng.sample(SUBJECTS, rng.randint(1, 3)),
+        "descriptions": [
+            _sentence(rng, rng.randint(80, 200)).capitalize() + ".",
+            f"Comment: {rng.randint(4, 40)} pages",
+        ],
+        "dates": [submitted],
+        "types": ["text"],
+        "identifiers": [f"http://arxiv.org/abs/{arxiv_id}"],
+    }
+
+
+def synthetic_records(count, seed=0):
+    """
+    Generate records of the normalized schema.
+
+    Args:
+        count (int): Number of records.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Yields:
+        dict: The records.
+    """
+    rng = random.Random(seed)
+    for number in range(count):
+        yield synthetic_record(number, rng)
+
+
+_OAI_PAGE_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'xsi:schemaLocation="http://www.openarchives.org/OAI/2.0/ '
+    'http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd">\n'
+    "<responseDate>2024-01-29T16:07:33Z</responseDate>\n"
+    '<request verb="ListRecords" metadataPrefix="oai_dc" set="cs">'
+    "http://export.arxiv.org/oai2</request>\n"
+    "<ListRecords>\n"
+)
+_OAI_DC_HEAD = (
+    '<oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+    'xsi:schemaLocation="http://www.openarchives.org/OAI/2.0/oai_dc/ '
+    'http://www.openarchives.org/OAI/2.0/oai_dc.xsd">\n'
+)
+
+
+def oai_record_xml(record):
+    """
+    Render a record of the normalized schema as a <record> of a ListRecords reply.
+
+    Args:
+        record (dict): Record built by synthetic_record.
+
+    Returns:
+        str: The <record> element.
+    """
+    elements = [("dc:title", record["title"])]
+    elements += [("dc:creator", creator) for creator in record["creators"]]
+    elements += [("dc:subject", subject) for subject in record["subjects"]]
+    elements += [("dc:description", text) for text in record["descriptions"]]
+    elements += [("dc:date", f"{date:%Y-%m-%d}") for date in record["dates"]]
+    elements += [("dc:type", text) for text in record["types"]]
+    elements += [("dc:identifier", text) for text in record["identifiers"]]
+
+    return (
+        "<record>\n<header>\n"
+        f"<identifier>{record['identifier']}</identifier>\n"
+        f"<datestamp>{record['datestamp']:%Y-%m-%d}</datestamp>\n"
+        + "".join(f"<setSpec>{set_spec}</setSpec>\n" for set_spec in record["sets"])
+        + "</header>\n<metadata>\n"
+        + _OAI_DC_HEAD
+        + "".join(f"<{name}>{escape(text)}</{name}>\n" for name, text in elements)
+        + "</oai_dc:dc>\n</metadata>\n</record>\n"
+    )
+
+
+def synthetic_oai_page(count, page_size, page, seed=0):
+    """
+    Build a page of a ListRecords reply listing synthetic records.
+
+    Pages are generated independently of each other: page `page` of a list is the same
+    whichever pages were generated before it. The resumptionToken of a page is the
+    number of the next page, empty on the last page as on arXiv.
+
+    Args:
+        count (int): Number of records of the complete list.
+        page_size (int): Records per page.
+        page (int): Number of the page, from 0.
+        seed (int, optional): Seed of the generated records. Defaults to 0.
+
+    Returns:
+        str: XML of the page.
+    """
+    rng = random.Random(seed * 1_000_003 + page)
+    first = page * page_size
+    last = min(first + page_size, count)
+    records = "".join(
+        oai_record_xml(synthetic_record(number, rng)) for number in range(first, last)
+    )
+
+    attributes = f'cursor="{first}" completeListSize="{count}"'
+    if last < count:
+        token = f"<resumptionToken {attributes}>{page + 1}</resumptionToken>"
+    else:
+        token = f"<resumptionToken {attributes}/>"
+
+    return f"{_OAI_PAGE_HEAD}{records}{token}\n</ListRecords>\n</OAI-PMH>\n"
+
+
+def synthetic_oai_pages(count, page_size, seed=0):
+    """
+    Generate the pages of a ListRecords reply listing synthetic records.
+
+    Args:
+        count (int): Number of records of the complete list.
+        page_size (int): Records per page.
+        seed (int, optional): Seed of the generated records. Defaults to 0.
+
+    Yields:
+        str: XML of each page, see synthetic_oai_page.
+    """
+    for page in range(max(-(-count // page_size), 1)):
+        yield synthetic_oai_page(count, page_size, page, seed)
@@ -1,9 +1,18 @@
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, Optional
+from xml.sax.saxutils import unescape
 from pydantic import BaseModel, Field, ValidationError
 import logging
 import datetime
+import re
+import time
 import requests
 
-from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+from flask_api_crawler_arxiv.monitoring.app_metrics import (
+    HARVEST_BYTES_DOWNLOADED,
+    HARVEST_PAGES_FETCHED,
+)
 
 
 class _ListRecordOAIParametersInit(BaseModel):
@@ -15,12 +24,16 @@ class _ListRecordOAIParametersInit(BaseModel):
     - set (str): ARXSET, the set identifier for the ARxiv API.
     - check_time (int): ARXCHECKTIMEMINUTES, the check time interval in minutes.
     - time_out (int): ARXTIMEOUT, the timeout duration for API requests.
+    - max_retries (int): ARXMAXRETRIES, how many 503 replies are retried before giving up.
+    - retry_after (int): ARXRETRYAFTERSECONDS, the wait used when a 503 reply has no Retry-After header.
     """
 
     host: str = Field(min_length=1, max_length=65, alias="ARXHOST")
     set: str = Field(min_length=1, max_length=65, alias="ARXSET")
     check_time: int = Field(gt=0, alias="ARXCHECKTIMEMINUTES")
     time_out: int = Field(gt=0, alias="ARXTIMEOUT")
+    max_retries: int = Field(default=5, ge=0, alias="ARXMAXRETRIES")
+    retry_after: int = Field(default=30, gt=0, alias="ARXRETRYAFTERSECONDS")
 
 
 class _ListRecordParametersQuery(BaseModel):
@@ -31,14 +44,56 @@ class _ListRecordParametersQuery(BaseModel):
     - metadataPrefix (str): The metadata prefix for records (default: "oai_dc").
     - verb (str): The OAI-PMH verb for the request (default: "ListRecords").
     - set (str): The set identifier for the request.
+    - from_date (datetime.date): The date from which records should be fetched (optional).
     - until (datetime.date): The date until which records should be fetched.
     """
 
     metadataPrefix: str = Field(default="oai_dc")
     verb: str = Field(default="ListRecords")
     set: str = Field(min_length=1, max_length=32)
+    from_date: Optional[datetime.date] = Field(default=None, alias="from")
     until: datetime.date
 
+    model_config = {"populate_by_name": True}
+
+
+class _ListRecordResumptionQuery(BaseModel):
+    """
+    Pydantic BaseModel for building the query parameters of a resumed ListRecords request.
+
+    OAI-PMH makes resumptionToken an exclusive argument: no other argument than the verb is allowed.
+
+    Attributes:
+    - verb (str): The OAI-PMH verb for the request (default: "ListRecords").
+    - resumptionToken (str): The token returned by the previous page.
+    """
+
+    verb: str = Field(default="ListRecords")
+    resumptionToken: str = Field(min_length=1)
+
+
+class ListRecordPage(BaseModel):
+    """
+    One page of a ListRecords harvest.
+
+    Attributes:
+    - xml (str): Raw XML of the page.
+    - resumption_token (str): Token to request the next page, None when the list is complete.
+    - cursor (int): Position of the first record of the page in the complete list, if announced.
+    - complete_list_size (int): Size of the complete list, if announced.
+    """
+
+    xml: str
+    resumption_token: Optional[str] = None
+    cursor: Optional[int] = None
+    complete_list_size: Optional[int] = None
+
+
+_RESUMPTION_TOKEN_REGEX = re.compile(
+    r"<resumptionToken(?P<attributes>[^>]*?)(?:/>|>(?P<token>[^<]*)</resumptionToken>)"
+)
+_RESUMPTION_ATTRIBUTE_REGEX = re.compile(r'(\w+)="([^"]*)"')
+
 
 class ListRecordOAI:
     """
@@ -46,9 +101,11 @@ class ListRecordOAI:
 
     Parameters:
     - app_config_dict (dict): Dictionary containing configuration parameters for initializing the class.
+    - session (requests.Session): Pooled session shared with other instances (optional).
+    - throttle (function): Called before each request to the API, blocks until it may be sent (optional).
 
     Methods:
-    - __init__(self, app_config_dict: dict) -> None:
+    - __init__(self, app_config_dict: dict, session=None, throttle=None) -> None:
         Initializes the ListRecordOAI instance with the provided configuration dictionary.
 
     - get_record(self, until_date: datetime.date(2000, 1, 1)) -> str:
@@ -60,6 +117,9 @@ class ListRecordOAI:
         Returns:
         - str: Retrieved records in string format.
 
+    - harvest(self, from_date=None, until_date=None, resumption_token=None) -> Iterator[ListRecordPage]:
+        Follows resumption tokens until the list is complete and yields each page as it arrives.
+
     Private Methods:
     - _build_parameters_query(self, until_date: datetime.date) -> _ListRecordParametersQuery:
         Builds the query parameters for listing records based on the provided until_date.
@@ -78,19 +138,29 @@ class ListRecordOAI:
 
         Returns:
         - str: Retrieved records in string format.
+
+    - _request(self, query_parameter_dict: dict, session=None) -> str:
+        Sends one request to the ARxiv API, waiting and retrying on 503 replies.
     """
 
-    def __init__(self, app_config_dict: dict) -> None:
+    def __init__(
+        self,
+        app_config_dict: dict,
+        session: requests.Session = None,
+        throttle: Callable[[], None] = None,
+    ) -> None:
         """
         Initializes a ListRecordOAI instance with the provided configuration dictionary.
 
         Parameters:
         - app_config_dict (dict): Dictionary containing configuration parameters.
+        - session (requests.Session): Session used by harvest, left open. Defaults to a session per harvest.
+        - throttle (function): Called before each request, including retries. Defaults to None.
         """
 
-        setup_logging()
-
         self._logger = logging.getLogger(__name__)
+        self._session = session
+        self._throttle = throttle
 
         try:
             self._parameters = _ListRecordOAIParametersInit(**app_config_dict)
@@ -100,13 +170,14 @@ class ListRecordOAI:
             raise ValidationError() from e
 
     def _build_parameters_query(
-        self, until_date: datetime.date
+        self, until_date: datetime.date, from_date: datetime.date = None
     ) -> _ListRecordParametersQuery:
         """
         Builds the query parameters for listing records based on the provided until_date.
 
         Parameters:
         - until_date (datetime.date): The date until which records should be fetched.
+        - from_date (datetime.date): The date from which records should be fetched. Defaults to None.
 
         Returns:
         - _ListRecordParametersQuery: Query parameters for listing records.
@@ -115,6 +186,7 @@ class ListRecordOAI:
             return _ListRecordParametersQuery(
                 **{
                     "set": self._parameters.set,
+                    "from_date": from_date,
                     "until": until_date,
                 }
             )
@@ -122,6 +194,85 @@ class ListRecordOAI:
             self._logger.warning("Error occurred when building query parameter: %s", e)
             raise RuntimeError() from e
 
+    def _retry_delay(self, response: requests.Response) -> float:
+        """
+        Computes how long to wait before retrying a 503 reply.
+
+        Parameters:
+        - response (requests.Response): The 503 reply.
+
+        Returns:
+        - float: Number of seconds to wait, taken from the Retry-After header when present.
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return self._parameters.retry_after
+
+        if retry_after.strip().isdigit():
+            return int(retry_after)
+
+        try:
+            retry_date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return self._parameters.retry_after
+
+        now = datetime.datetime.now(tz=retry_date.tzinfo)
+        return max((retry_date - now).total_seconds(), 0)
+
+    def _request(self, query_parameter_dict: dict, session=None) -> str:
+        """
+        Sends one request to the ARxiv API, waiting and retrying on 503 replies.
+
+        Parameters:
+        - query_parameter_dict (dict): Query parameters of the request.
+        - session (requests.Session): Session used to reuse the connection. Defaults to the requests module.
+
+        Returns:
+        - str: Retrieved records in string format.
+        """
+        http = session if session is not None else requests
+
+        try:
+            for attempt in range(self._parameters.max_retries + 1):
+                if self._throttle is not None:
+                    self._throttle()
+
+                response = http.get(
+                    url=self._parameters.host,
+                    params=query_parameter_dict,
+                    timeout=self._parameters.time_out,
+                )
+
+                if (
+                    response.status_code == 503
+                    and attempt < self._parameters.max_retries
+                ):
+                    delay = self._retry_delay(response)
+                    self._logger.info(
+                        "ARxiv API asked to retry after %s seconds (attempt %s)",
+                        delay,
+                        attempt + 1,
+                    )
+                    time.sleep(delay)
+                    continue
+
+                if response.status_code != 200:
+                    self._logger.warning(
+                        "An error occurred when interacting with ARxiv API: %s",
+                        response.status_code,
+                    )
+                    raise ValueError(
+                        f"An error occurred when interacting with ARxiv API: {response.status_code}"
+                    )
+
+                HARVEST_PAGES_FETCHED.inc()
+                HARVEST_BYTES_DOWNLOADED.inc(len(response.content))
+                return response.text
+
+        except Exception as e:
+            self._logger.warning("Unexpected error with API :%s", e)
+            raise RuntimeError() from e
+
     def _list_record(self, parameters_query: _ListRecordParametersQuery) -> str:
         """
         Sends a request to the ARxiv API with the specified query parameters and retrieves records.
@@ -134,23 +285,87 @@ class ListRecordOAI:
         """
         query_parameter_dict = parameters_query.model_dump(by_alias=True)
 
-        try:
-            response = requests.get(
-                url=self._parameters.host,
-                params=query_parameter_dict,
-                timeout=self._parameters.time_out,
-            )
+        return self._request(query_parameter_dict)
 
-            if response.status_code != 200:
-                error_text = f"An error occurred when interacting with ARxiv API: {response.status_code}"
-                self._logger.warning(error_text)
-                raise ValueError(error_text)
+    @staticmethod
+    def _build_page(xml: str) -> ListRecordPage:
+        """
+        Wraps a ListRecords reply and extracts its resumptionToken.
 
-            return response.text
+        Parameters:
+        - xml (str): Raw XML of the page.
 
-        except Exception as e:
-            self._logger.warning("Unexpected error with API :%s", e)
-            raise RuntimeError() from e
+        Returns:
+        - ListRecordPage: The page with its resumption information.
+        """
+        match = _RESUMPTION_TOKEN_REGEX.search(xml)
+        if match is None:
+            return ListRecordPage(xml=xml)
+
+        attributes = dict(
+            _RESUMPTION_ATTRIBUTE_REGEX.findall(match.group("attributes"))
+        )
+        token = unescape(match.group("token") or "").strip()
+
+        return ListRecordPage(
+            xml=xml,
+            resumption_token=token or None,
+            cursor=attributes.get("cursor"),
+            complete_list_size=attributes.get("completeListSize"),
+        )
+
+    def harvest(
+        self,
+        from_date: datetime.date = None,
+        until_date: datetime.date = None,
+        resumption_token: str = None,
+    ) -> Iterator[ListRecordPage]:
+        """
+        Follows resumption tokens until the list is complete and yields each page as it arrives.
+
+        Only the current page is held in memory. Saving the resumption_token of the last
+        processed page allows an interrupted harvest to be resumed later.
+
+        Parameters:
+        - from_date (datetime.date): The date from which records should be fetched. Defaults to None.
+        - until_date (datetime.date): The date until which records should be fetched. Defaults to today.
+        - resumption_token (str): Token of a previous harvest to resume from. Defaults to None.
+
+        Yields:
+        - ListRecordPage: Each page of the harvest.
+        """
+        if resumption_token is not None:
+            query_parameter_dict = _ListRecordResumptionQuery(
+                resumptionToken=resumption_token
+            ).model_dump()
+        else:
+            if until_date is None:
+                until_date = datetime.date.today()
+            query_parameter_dict = self._build_parameters_query(
+                until_date, from_date
+            ).model_dump(by_alias=True)
+
+        session_context = (
+            nullcontext(self._session)
+            if self._session is not None
+            else requests.Session()
+        )
+        with session_context as session:
+            while True:
+                page = self._build_page(self._request(query_parameter_dict, session))
+                self._logger.info(
+                    "Harvested page at cursor %s of %s",
+                    page.cursor,
+                    page.complete_list_size,
+                )
+                yield page
+
+                if page.resumption_token is None:
+                    return
+
+                query_parameter_dict = _ListRecordResumptionQuery(
+                    resumptionToken=page.resumption_token
+                ).model_dump()
 
     def get_record(self, until_date: datetime.date = None) -> str:
         """
@@ -165,6 +380,6 @@ class ListRecordOAI:
         if until_date is None:
             until_date = datetime.date(year=2000, month=1, day=1)
 
-        self._logger.info(f"Date used is {until_date}")
+        self._logger.info("Date used is %s", until_date)
         query_parameter = self._build_parameters_query(until_date)
         return self._list_record(query_parameter)
@@ -1,9 +1,121 @@
 import xmltodict
 import logging
+import xml.sax
+import zlib
 
+from bson import json_util
+from bson.binary import Binary
+from collections import deque
 from datetime import datetime
+from typing import Iterable, Iterator, Union
 
-from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+_FEED_CHUNK_SIZE = 64 * 1024
+
+# Multi-valued Dublin Core elements and the field holding them in a normalized record.
+_MULTI_VALUED_FIELDS = {
+    "dc:creator": "creators",
+    "dc:subject": "subjects",
+    "dc:description": "descriptions",
+    "dc:type": "types",
+    "dc:identifier": "identifiers",
+}
+
+
+def _field_values(value) -> [str]:
+    """
+    Flattens a field built by xmltodict, a string, a list or a node with attributes, into a list of strings.
+
+    Args:
+        value: The field.
+
+    Returns:
+        [str]: The non empty values of the field.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [text for item in value for text in _field_values(item)]
+    if isinstance(value, dict):
+        return _field_values(value.get("#text"))
+    return [str(value)]
+
+
+class _ListRecordsHandler(xml.sax.handler.ContentHandler):
+    """
+    SAX handler building one xmltodict-shaped dictionary per <record> element.
+
+    Elements outside of <record> are not kept, except for the OAI-PMH <error> element
+    which is reported once closed. Completed records are queued in `records` and must
+    be drained by the caller after each feed.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = deque()
+        self.error = None
+        self.error_code = None
+        self._depth = 0
+        self._stack = []
+        self._error_text = None
+
+    def startElement(self, name, attrs):
+        self._depth += 1
+
+        if name == "error" and self._depth == 2:
+            self._error_text = []
+            self.error_code = attrs.get("code")
+            return
+
+        if name == "record" or self._stack:
+            item = {f"@{key}": value for key, value in attrs.items()} or None
+            self._stack.append((name, item, []))
+
+    def characters(self, content):
+        if self._stack:
+            self._stack[-1][2].append(content)
+        elif self._error_text is not None:
+            self._error_text.append(content)
+
+    def endElement(self, name):
+        self._depth -= 1
+
+        if self._error_text is not None and not self._stack:
+            self.error = "".join(self._error_text).strip()
+            self._error_text = None
+            return
+
+        if not self._stack:
+            return
+
+        name, item, text = self._stack.pop()
+        data = "".join(text).strip()
+
+        if item is not None:
+            if data:
+                item["#text"] = data
+            value = item
+        else:
+            value = data or None
+
+        if not self._stack:
+            self.records.append(value or {})
+            return
+
+        parent = self._stack[-1]
+        if parent[1] is None:
+            self._stack[-1] = (parent[0], {}, parent[2])
+            parent = self._stack[-1]
+
+        siblings = parent[1]
+        if name in siblings:
+            if isinstance(siblings[name], list):
+                siblings[name].append(value)
+            else:
+                siblings[name] = [siblings[name], value]
+        else:
+            siblings[name] = value
 
 
 class RecordConverterOAI:
@@ -13,8 +125,6 @@ class RecordConverterOAI:
 
         This class is designed to convert XML data from OAI-PMH responses to dictionaries.
         """
-        setup_logging()
-
         self._logger = logging.getLogger(__name__)
 
     def xmltodict(self, xml_input: str) -> [dict]:
@@ -45,32 +155,193 @@ class RecordConverterOAI:
 
         return xml_dict
 
-    def get_listrecord_dict(self, xml_source: str) -> [dict]:
+    def _convert_record(self, item: dict) -> Union[dict, None]:
         """
-        Retrieves a list of records as a dictionary from the given XML source.
+        Converts the header datestamp of a record into a datetime.
 
         Args:
-            xml_source (str): XML source string.
+            item (dict): Record as built by xmltodict.
 
         Returns:
-            [dict]: List containing the resulting dictionary.
+            dict: The converted record, or None if the record is malformed.
         """
-        listrecord_dict = self.xmltodict(xml_source)
+        try:
+            item["header"]["datestamp"] = datetime.strptime(
+                item["header"]["datestamp"], "%Y-%m-%d"
+            )
+            return item
+        except (KeyError, TypeError, ValueError) as e:
+            self._logger.warning("Error converting record: %s. Removing the record.", e)
+            return None
 
-        records = (
-            listrecord_dict.get("OAI-PMH", {}).get("ListRecords", {}).get("record", [])
-        )
+    def iter_listrecord_dict(
+        self, xml_source: Union[str, bytes, Iterable[Union[str, bytes]]]
+    ) -> Iterator[dict]:
+        """
+        Streams the records of a ListRecords reply, one converted dictionary per <record>.
 
-        converted_records = []
-        for item in records:
-            try:
-                item["header"]["datestamp"] = datetime.strptime(
-                    item["header"]["datestamp"], "%Y-%m-%d"
+        The reply is parsed incrementally with SAX, so only the record being built is kept
+        in memory and the first record is available before the whole reply is parsed.
+        Records have the same shape as the ones returned by get_listrecord_dict.
+
+        Args:
+            xml_source (str | bytes | Iterable): XML source string, or an iterable of chunks.
+
+        Yields:
+            dict: Each converted record.
+        """
+        if isinstance(xml_source, (str, bytes)):
+            chunks = (
+                xml_source[start : start + _FEED_CHUNK_SIZE]
+                for start in range(0, len(xml_source), _FEED_CHUNK_SIZE)
+            )
+        else:
+            chunks = xml_source
+
+        handler = _ListRecordsHandler()
+        parser = xml.sax.make_parser()
+        parser.setContentHandler(handler)
+
+        def drain():
+            if handler.error_code == "noRecordsMatch":
+                self._logger.info("No record matches the query: %s", handler.error)
+                return
+
+            if handler.error is not None:
+                self._logger.warning(
+                    "xmltodict error occurred during XML parsing: %s", handler.error
+                )
+                raise RuntimeError(
+                    "Problem occurred from within the query: %s", handler.error
                 )
-                converted_records.append(item)
-            except (KeyError, ValueError) as e:
+
+            while handler.records:
+                record = self._convert_record(handler.records.popleft())
+                if record is not None:
+                    yield record
+
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                yield from drain()
+            parser.close()
+        except xml.sax.SAXException as e:
+            self._logger.warning("SAX error occurred during XML parsing: %s", e)
+            raise RuntimeError() from e
+
+        yield from drain()
+
+    def normalize_record(self, item: dict, keep_raw: bool = False) -> Union[dict, None]:
+        """
+        Converts a record of the xmltodict shape into the normalized storage schema.
+
+        The normalized record is flat: multi-valued fields are always lists and dates are
+        parsed once.
+            {
+                "identifier": "oai:arXiv.org:0802.3300",
+                "datestamp": datetime(2024, 1, 18),
+                "sets": ["cs"],
+                "deleted": False,
+                "title": "Projective Expected Utility",
+                "creators": ["La Mura, Pierfrancesco"],
+                "subjects": ["Quantum Physics", ...],
+                "descriptions": ["Motivated by several ...", "Comment: 7 pages ..."],
+                "dates": [datetime(2008, 2, 22)],
+                "types": ["text"],
+                "identifiers": ["http://arxiv.org/abs/0802.3300", ...],
+                "raw": Binary(...),  # only with keep_raw, zlib compressed JSON of the item
+            }
+
+        Args:
+            item (dict): Record as built by xmltodict, with or without a parsed datestamp.
+            keep_raw (bool): Store the compressed original record in `raw`. Defaults to False.
+
+        Returns:
+            dict: The normalized record, or None if its datestamp is malformed. Malformed
+                dates are left out of `dates`.
+        """
+        header = item.get("header") or {}
+        metadata = (item.get("metadata") or {}).get("oai_dc:dc") or {}
+
+        datestamp = header.get("datestamp")
+        try:
+            if isinstance(datestamp, str):
+                datestamp = datetime.strptime(datestamp, "%Y-%m-%d")
+        except ValueError as e:
+            self._logger.warning("Error converting record: %s. Removing the record.", e)
+            return None
+
+        dates = []
+        for date in _field_values(metadata.get("dc:date")):
+            try:
+                dates.append(datetime.strptime(date, "%Y-%m-%d"))
+            except ValueError:
                 self._logger.warning(
-                    "Error converting record: %s. Removing the record.", e
+                    "Malformed date %r of %s skipped", date, header.get("identifier")
                 )
 
-        return converted_records
+        title = " ".join(" ".join(_field_values(metadata.get("dc:title"))).split())
+
+        record = {
+            "identifier": header.get("identifier"),
+            "datestamp": datestamp,
+            "sets": _field_values(header.get("setSpec")),
+            "deleted": header.get("@status") == "deleted",
+            "title": title or None,
+            "dates": dates,
+        }
+        for element, field in _MULTI_VALUED_FIELDS.items():
+            record[field] = _field_values(metadata.get(element))
+
+        if keep_raw:
+            raw = json_util.dumps(item, separators=(",", ":")).encode("utf-8")
+            record["raw"] = Binary(zlib.compress(raw))
+
+        return record
+
+    @staticmethod
+    def raw_record(record: dict) -> Union[dict, None]:
+        """
+        Decompresses the original record stored in a normalized record.
+
+        Args:
+            record (dict): Normalized record.
+
+        Returns:
+            dict: The record of the xmltodict shape, or None if it was not kept.
+        """
+        if record.get("raw") is None:
+            return None
+        return json_util.loads(zlib.decompress(record["raw"]).decode("utf-8"))
+
+    def iter_normalized_records(
+        self,
+        xml_source: Union[str, bytes, Iterable[Union[str, bytes]]],
+        keep_raw: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Streams the records of a ListRecords reply in the normalized storage schema.
+
+        Args:
+            xml_source (str | bytes | Iterable): XML source string, or an iterable of chunks.
+            keep_raw (bool): Store the compressed original record in `raw`. Defaults to False.
+
+        Yields:
+            dict: Each normalized record, see normalize_record.
+        """
+        for item in self.iter_listrecord_dict(xml_source):
+            record = self.normalize_record(item, keep_raw)
+            if record is not None:
+                yield record
+
+    def get_listrecord_dict(self, xml_source: str) -> [dict]:
+        """
+        Retrieves a list of records as a dictionary from the given XML source.
+
+        Args:
+            xml_source (str): XML source string.
+
+        Returns:
+            [dict]: List containing the resulting dictionary.
+        """
+        return list(self.iter_listrecord_dict(xml_source))
@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel, Field
+
+from flask_api_crawler_arxiv.mongodb.HarvestJobManager import HarvestJobManager
+
+
+class _HarvestJobQueueOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the harvest job queue.
+
+    Attributes:
+    - workers (int): HARVEST_JOB_WORKERS, harvests run at the same time by each API worker.
+    - stale_seconds (int): HARVEST_JOB_STALE_SECONDS, time without progress after which an
+      active job is considered abandoned and its sets can be queued again.
+    """
+
+    workers: int = Field(default=1, gt=0, alias="HARVEST_JOB_WORKERS")
+    stale_seconds: int = Field(default=3600, gt=0, alias="HARVEST_JOB_STALE_SECONDS")
+
+
+class HarvestJobQueue:
+    """
+    HarvestJobQueue class running the harvests requested through the API in background threads.
+
+    Jobs are persisted by HarvestJobManager, so their status can be read from any API
+    worker. A set is harvested by one active job at most: a request returns the active
+    jobs of its sets and only queues a job for the other sets.
+    """
+
+    def __init__(self, db_manager, run_harvest, app_config_dict=None):
+        """
+        Initialize HarvestJobQueue with the database and the harvest to run.
+
+        Args:
+            db_manager (MongoDBManager): Manager of the database holding the jobs.
+            run_harvest (function): Called with the sets of a job and a progress callback
+                receiving the UpsertReport of each written page.
+            app_config_dict (dict, optional): Configuration holding the queue options.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.options = _HarvestJobQueueOptions(**(app_config_dict or {}))
+        self._db_manager = db_manager
+        self._run_harvest = run_harvest
+        self._executor = None
+        self._indexes_ensured = False
+        self._lock = threading.Lock()
+
+    def _jobs(self):
+        self._db_manager.open_connection()
+        jobs = HarvestJobManager(
+            self._db_manager.db, stale_seconds=self.options.stale_seconds
+        )
+        if not self._indexes_ensured:
+            jobs.ensure_indexes()
+            self._indexes_ensured = True
+        return jobs
+
+    def _get_executor(self):
+        # Created on first use, after the API worker process was forked.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.options.workers, thread_name_prefix="harvest-job"
+                )
+            return self._executor
+
+    def submit(self, sets):
+        """
+        Queue a harvest of the given sets that are not harvested by an active job yet.
+
+        Args:
+            sets ([str]): arXiv sets to harvest.
+
+        Returns:
+            tuple: The job queued by this call, None if every set has an active job,
+                and the active jobs harvesting the other sets.
+        """
+        job, active_jobs = self._jobs().create(sets)
+        if job is not None:
+            self._get_executor().submit(self._run, job["_id"], job["sets"])
+        return job, active_jobs
+
+    def get(self, job_id):
+        """
+        Return a job.
+
+        Args:
+            job_id (str): Id of the job.
+
+        Returns:
+            dict: The job, or None if it does not exist.
+        """
+        return self._jobs().get(job_id)
+
+    def _run(self, job_id, sets):
+        jobs = self._jobs()
+        if not jobs.start(job_id):
+            self._logging.warning("Harvest job %s is no longer active, skipped", job_id)
+            return
+
+        try:
+            self._run_harvest(sets, lambda report: jobs.progress(job_id, report))
+        except Exception as e:
+            self._logging.error("Harvest job %s failed: %s", job_id, e)
+            jobs.finish(job_id, error=str(e))
+            return
+
+        job = jobs.finish(job_id)
+        self._logging.info(
+            "Harvest job %s done: %s inserted, %s updated, %s unchanged",
+            job_id,
+            job["inserted"],
+            job["updated"],
+            job["unchanged"],
+        )
+
+    def shutdown(self, wait=False):
+        """
+        Stop the worker threads, running jobs are finished when wait is True.
+
+        Args:
+            wait (bool): Wait for the queued and running jobs. Defaults to False.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
@@ -0,0 +1,323 @@
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlencode
+
+from flask import Response
+from pydantic import BaseModel, Field, field_validator
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+class _ResponseCacheOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the response cache.
+
+    Attributes:
+    - max_entries (int): RESPONSE_CACHE_MAX_ENTRIES, responses kept in memory, 0 disables the cache.
+    - ttl (float): RESPONSE_CACHE_TTL_SECONDS, lifetime of a cached response.
+    - redis_url (str): RESPONSE_CACHE_REDIS_URL, Redis-compatible server shared by the workers, if any.
+    - generation_check (float): RESPONSE_CACHE_GENERATION_CHECK_SECONDS, interval between two reads
+      of the data generation.
+    - max_body_bytes (int): RESPONSE_CACHE_MAX_BODY_BYTES, larger responses are streamed without being cached.
+    """
+
+    max_entries: int = Field(default=1024, ge=0, alias="RESPONSE_CACHE_MAX_ENTRIES")
+    ttl: float = Field(default=300, gt=0, alias="RESPONSE_CACHE_TTL_SECONDS")
+    redis_url: Optional[str] = Field(default=None, alias="RESPONSE_CACHE_REDIS_URL")
+    generation_check: float = Field(
+        default=5, ge=0, alias="RESPONSE_CACHE_GENERATION_CHECK_SECONDS"
+    )
+    max_body_bytes: int = Field(
+        default=1048576, gt=0, alias="RESPONSE_CACHE_MAX_BODY_BYTES"
+    )
+
+    @field_validator("redis_url")
+    @classmethod
+    def _empty_as_none(cls, value):
+        return value or None
+
+
+class _LRUBackend:
+    """
+    In-process store evicting the least recently used entry, entries expire after the TTL.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _RedisBackend:
+    """
+    Store shared by all the workers in a Redis-compatible server, the server expires the entries.
+    """
+
+    PREFIX = "arxiv:response:"
+
+    def __init__(self, url, ttl):
+        self._client = redis.Redis.from_url(url)
+        self._ttl = math.ceil(ttl)
+        self._logging = logging.getLogger(__name__)
+
+    def get(self, key):
+        try:
+            data = self._client.get(self.PREFIX + key)
+        except redis.RedisError as e:
+            self._logging.warning("Response cache read failed: %s", e)
+            return None
+        if data is None:
+            return None
+
+        entry = json.loads(data)
+        entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    def set(self, key, entry):
+        data = json.dumps(
+            {**entry, "body": base64.b64encode(entry["body"]).decode("ascii")}
+        )
+        try:
+            self._client.set(self.PREFIX + key, data, ex=self._ttl)
+        except redis.RedisError as e:
+            self._logging.warning("Response cache write failed: %s", e)
+
+    def clear(self):
+        try:
+            for key in self._client.scan_iter(self.PREFIX + "*"):
+                self._client.delete(key)
+        except redis.RedisError as e:
+            self._logging.warning("Response cache clear failed: %s", e)
+
+
+class ResponseCache:
+    """
+    ResponseCache class keeping the successful responses of the read endpoints.
+
+    Entries are keyed on the data generation, the path, the sorted query string and the
+    negotiated representation. The generation is bumped each time the articles change
+    (see HarvestStateManager.bump_generation), entries of a former generation are never
+    read again and age out of the store. Each entry has a strong ETag computed from its body.
+    """
+
+    # Headers recomputed for each response
+    _SKIPPED_HEADERS = {"content-length", "etag", "x-cache"}
+
+    def __init__(self, generation_loader, app_config_dict=None):
+        """
+        Initialize ResponseCache with the function reading the data generation.
+
+        Args:
+            generation_loader (function): Function returning the current data generation.
+            app_config_dict (dict, optional): Configuration holding the cache options.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.options = _ResponseCacheOptions(**(app_config_dict or {}))
+        self._generation_loader = generation_loader
+        self._generation = None
+        self._generation_checked_at = None
+        self._lock = threading.Lock()
+
+        if self.options.redis_url and redis is None:
+            self._logging.warning(
+                "RESPONSE_CACHE_REDIS_URL is set but redis is not installed, "
+                "using the in-process cache"
+            )
+        if self.options.redis_url and redis is not None:
+            self._backend = _RedisBackend(self.options.redis_url, self.options.ttl)
+        elif self.options.max_entries > 0:
+            self._backend = _LRUBackend(self.options.max_entries, self.options.ttl)
+        else:
+            self._backend = None
+
+    @property
+    def enabled(self):
+        return self._backend is not None
+
+    def generation(self):
+        """
+        Return the data generation, read again once the check interval is over.
+
+        When the read fails the last known generation is kept until the next check.
+
+        Returns:
+            int: The data generation, None if it was never read.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._generation_checked_at is None
+                or now - self._generation_checked_at >= self.options.generation_check
+            ):
+                self._generation_checked_at = now
+                try:
+                    self._generation = self._generation_loader()
+                except Exception as e:
+                    self._logging.warning("Data generation read failed: %s", e)
+            return self._generation
+
+    def refresh(self):
+        """
+        Read the data generation again on the next request, after a write of this process.
+        """
+        with self._lock:
+            self._generation_checked_at = None
+
+    def make_key(self, path, args, representation):
+        """
+        Build the cache key of a request.
+
+        Args:
+            path (str): Path of the request.
+            args (werkzeug.datastructures.MultiDict): Query parameters.
+            representation (str): Negotiated media type of the response.
+
+        Returns:
+            str: The key, None when the generation is unknown and the response must not be cached.
+        """
+        generation = self.generation()
+        if generation is None:
+            return None
+
+        query_string = urlencode(sorted(args.items(multi=True)))
+        return f"{generation}:{path}?{query_string}|{representation}"
+
+    def get(self, key):
+        """
+        Return the cached entry of a key.
+
+        Args:
+            key (str): Key built by make_key.
+
+        Returns:
+            dict: The entry (body, status, headers and etag), or None.
+        """
+        if not self.enabled or key is None:
+            return None
+        return self._backend.get(key)
+
+    def store(self, key, response):
+        """
+        Buffer a response, compute its ETag and keep it under the key.
+
+        Nothing is read when the response is not to be cached. A streamed response is
+        buffered up to RESPONSE_CACHE_MAX_BODY_BYTES: beyond, the chunks already read
+        are put back in front of the rest of the stream and the response is not cached.
+
+        Args:
+            key (str): Key built by make_key.
+            response (Response): Successful response of the endpoint.
+
+        Returns:
+            dict: The entry of the response, None when it is not cached.
+        """
+        if not self.enabled or key is None:
+            return None
+
+        if not response.is_streamed:
+            body = response.get_data()
+        else:
+            chunks, size = [], 0
+            stream = response.iter_encoded()
+            for chunk in stream:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.options.max_body_bytes:
+                    response.response = itertools.chain(chunks, stream)
+                    return None
+            body = b"".join(chunks)
+
+        return self.store_body(
+            key, body, response.status_code, response.headers.items()
+        )
+
+    def store_body(self, key, body, status, headers):
+        """
+        Compute the ETag of a buffered response and keep it under the key.
+
+        Args:
+            key (str): Key built by make_key.
+            body (bytes): Body of the response.
+            status (int): Status code of the response.
+            headers (Iterable[tuple]): Names and values of the headers.
+
+        Returns:
+            dict: The entry of the response, None when it is not cached.
+        """
+        if not self.enabled or key is None or len(body) > self.options.max_body_bytes:
+            return None
+
+        entry = {
+            "body": body,
+            "status": status,
+            "headers": [
+                [name, value]
+                for name, value in headers
+                if name.lower() not in self._SKIPPED_HEADERS
+            ],
+            "etag": hashlib.sha1(body).hexdigest(),
+        }
+        self._backend.set(key, entry)
+        return entry
+
+    def clear(self):
+        """
+        Drop all the cached responses.
+        """
+        if self.enabled:
+            self._backend.clear()
+
+    @staticmethod
+    def to_response(entry):
+        """
+        Build the response of a cached entry, with its strong ETag.
+
+        Args:
+            entry (dict): Entry returned by get or store.
+
+        Returns:
+            Response: The response, to be made conditional on the request.
+        """
+        response = Response(entry["body"], status=entry["status"])
+        response.headers.clear()
+        for name, value in entry["headers"]:
+            response.headers.add(name, value)
+        response.set_etag(entry["etag"])
+        response.cache_control.no_cache = True
+        return response
@@ -1,22 +1,63 @@
+import atexit
+import functools
+import json
 import os
 import logging
+import textwrap
+import time
 
 from bson import json_util
 from bson.objectid import ObjectId
 import platform
 from datetime import datetime
-from flask import Flask, jsonify, request, Response
+from flask import Flask, g, jsonify, request, Response, url_for
+from pymongo.errors import PyMongoError
 
 from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import RecordConverterOAI
+from flask_api_crawler_arxiv.flask_api.HarvestJobQueue import HarvestJobQueue
+from flask_api_crawler_arxiv.flask_api.ResponseCache import ResponseCache
+from flask_api_crawler_arxiv.monitoring.app_metrics import observe_request
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    metrics_options,
+    metrics_registry,
+)
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
 from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter, UpsertReport
+from flask_api_crawler_arxiv.mongodb.StatsManager import (
+    STATS_DIMENSIONS,
+    STATS_SORTS,
+    StatsManager,
+)
 
+from flask_api_crawler_arxiv.python_cron.cron_harvest_sets_async import (
+    cron_harvest_sets_async,
+)
 from flask_api_crawler_arxiv.python_cron.cron_inject_data_mongodb import (
     cron_inject_data_mongodb,
 )
+from flask_api_crawler_arxiv.search.InvertedIndex import SearchIndexReader
+from flask_api_crawler_arxiv.utils.articles_page import (
+    batch_body_args,
+    indexed_page,
+    indexed_search_limit,
+    keys_query,
+    next_page,
+    order_batch,
+    page_pipeline,
+    parse_articles_args,
+    parse_batch_args,
+    ranked_pipeline,
+    uses_search_index,
+)
+from flask_api_crawler_arxiv.utils.field_projection import build_projection
 
 from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
 
-setup_logging()
+setup_logging(app_config)
 
 logger = logging.getLogger(__name__)
 
@@ -25,98 +66,358 @@ application = Flask(__name__)
 db_manager = MongoDBManager(
     f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
     f'{app_config["MONGO_INITDB_DATABASE"]}',
+    app_config,
+)
+# The pooled client is shared by all requests of the worker, close it on shutdown only.
+atexit.register(db_manager.close_connection)
+
+record_converter = RecordConverterOAI()
+
+# In-process search index saved by the harvest, /articles/?q= falls back to $text without it.
+search_index_reader = (
+    SearchIndexReader(
+        app_config["SEARCH_INDEX_PATH"],
+        int(app_config.get("SEARCH_INDEX_CHECK_SECONDS", 60)),
+    )
+    if app_config.get("SEARCH_INDEX_PATH")
+    else None
 )
 
+# Responses of the read endpoints, dropped when the data generation is bumped by a write.
+response_cache = ResponseCache(
+    lambda: db_manager.perform_read(
+        lambda db: HarvestStateManager(db).get_generation()
+    ),
+    app_config,
+)
+
+
+def ensure_indexes():
+    """
+    Create the indexes of arxiv_data_doc when the worker starts, unless ENSURE_INDEXES_AT_STARTUP is False.
+
+    A failure is logged without stopping the worker, duplicated records left by former
+    harvests are removed by `python -m flask_api_crawler_arxiv.python_cron.manage_indexes ensure`.
+    """
+    if str(app_config.get("ENSURE_INDEXES_AT_STARTUP", "True")).lower() != "true":
+        return
+
+    try:
+        db_manager.open_connection()
+        IndexManager(db_manager.db).ensure_indexes()
+    except PyMongoError as e:
+        logger.warning("Indexes not ensured at startup: %s", e)
+
+
+def start_metrics():
+    """
+    Save the metrics of the worker to METRICS_DIR when the worker starts, so that
+    /metrics merges the metrics of all the workers and of the harvest cron.
+    """
+    metrics_registry.configure(app_config, f"api-{os.getpid()}")
+
+
+if metrics_options(app_config).enabled:
+
+    @application.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @application.after_request
+    def _observe_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            # The rule, not the path, so that the labels stay bounded.
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe_request(
+                request.method,
+                route,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+        return response
+
+
+def _run_harvest(arxsets, progress):
+    """
+    Run the harvest of a job, several sets are fetched concurrently.
+
+    Args:
+        arxsets ([str]): arXiv sets to harvest.
+        progress (function): Called with the UpsertReport of each written page.
+    """
+    if len(arxsets) > 1:
+        cron_harvest_sets_async(app_config, arxsets=arxsets, progress=progress)
+    else:
+        cron_inject_data_mongodb(app_config, arxset=arxsets[0], progress=progress)
+    response_cache.refresh()
+
 
-def return_pretty_json_from_bson(bson_data):
+# Harvests requested through /inject_data_to_mongodb, run by a local worker pool.
+harvest_job_queue = HarvestJobQueue(db_manager, _run_harvest, app_config)
+atexit.register(harvest_job_queue.shutdown)
+
+
+def _job_to_json(job):
+    """
+    Convert a harvest job into its JSON representation.
+
+    Args:
+        job (dict): Job stored by HarvestJobManager.
+
+    Returns:
+        dict: The job, dates in ISO 8601 format.
+    """
+    return {
+        "job_id": job["_id"],
+        "sets": job["sets"],
+        "status": job["status"],
+        "inserted": job["inserted"],
+        "updated": job["updated"],
+        "unchanged": job["unchanged"],
+        "error": job["error"],
+        **{
+            field: job[field].isoformat() if job.get(field) else None
+            for field in ("created_at", "started_at", "finished_at")
+        },
+    }
+
+
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _stream_json_array(documents, pretty):
+    """
+    Encode documents one at a time as the items of a JSON array.
+
+    Args:
+        documents (Iterable[dict]): MongoDB documents, a cursor is consumed lazily.
+        pretty (bool): Indent the output.
+
+    Yields:
+        str: Chunks of the JSON array.
+    """
+    if not pretty:
+        separator = "["
+        for document in documents:
+            yield separator + json_util.dumps(document, separators=(",", ":"))
+            separator = ","
+        yield "]" if separator == "," else "[]"
+        return
+
+    separator = "[\n"
+    for document in documents:
+        yield separator + textwrap.indent(json_util.dumps(document, indent=4), "    ")
+        separator = ",\n"
+    yield "\n]" if separator == ",\n" else "[]"
+
+
+def _stream_ndjson(documents):
+    """
+    Encode documents one at a time as newline-delimited JSON.
+
+    Args:
+        documents (Iterable[dict]): MongoDB documents, a cursor is consumed lazily.
+
+    Yields:
+        str: One line per document.
+    """
+    for document in documents:
+        yield json_util.dumps(document, separators=(",", ":")) + "\n"
+
+
+def return_json_from_bson(bson_data):
     """
-    Serialize MongoDB objects to JSON format with proper indentation and headers.
+    Serialize MongoDB objects to JSON with the appropriate headers.
+
+    The output is compact unless the `pretty` query parameter is set. A list or a cursor
+    is streamed as a chunked response, one document at a time, so the first bytes are
+    sent before the cursor is exhausted. Clients accepting application/x-ndjson get one
+    document per line instead of a JSON array.
 
     Args:
-        bson_data: MongoDB data to be serialized.
+        bson_data: MongoDB document, or list or cursor of documents, to be serialized.
 
     Returns:
-        Response: Flask Response object containing formatted JSON data with appropriate headers.
+        Response: Flask Response object containing JSON data with appropriate headers.
     """
-    # Use json_util to serialize MongoDB objects
-    articles_list = json_util.dumps(bson_data, indent=4)
-    # Set the response headers for JSON content
-    response = Response(articles_list, content_type="application/json")
+    pretty = request.args.get("pretty", "false").lower() in ("1", "true", "yes")
+
+    if isinstance(bson_data, dict):
+        if pretty:
+            body = json_util.dumps(bson_data, indent=4)
+        else:
+            body = json_util.dumps(bson_data, separators=(",", ":"))
+        response = Response(body, content_type=JSON_MIMETYPE)
+    elif (
+        request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE])
+        == NDJSON_MIMETYPE
+    ):
+        response = Response(
+            _stream_ndjson(bson_data),
+            content_type=NDJSON_MIMETYPE,
+        )
+    else:
+        response = Response(
+            _stream_json_array(bson_data, pretty),
+            content_type=JSON_MIMETYPE,
+        )
+
     response.headers["X-Content-Type-Options"] = "nosniff"
+    response.vary.add("Accept")
 
     return response
 
 
-@application.route("/articles/", methods=["GET"])
-def get_articles():
+def cached_read(view):
     """
-    Endpoint to retrieve paginated articles.
+    Decorator serving a read endpoint from the response cache, with conditional GET support.
+
+    Successful responses are buffered and kept in the response cache with a strong ETag.
+    A request whose If-None-Match matches the cached ETag gets a 304 without any query.
+    Responses are streamed untouched when the cache is disabled or when their body is
+    larger than RESPONSE_CACHE_MAX_BODY_BYTES.
+
+    Args:
+        view (function): The endpoint.
 
     Returns:
-        Response: Paginated articles in JSON format.
+        function: The cached endpoint.
     """
-    # Set a fixed per_page value
-    per_page = 50  # Maximum entities per page
 
-    # Get the page number from the URL or default to 1
-    page = int(request.args.get("page", 1))
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        representation = request.accept_mimetypes.best_match(
+            [JSON_MIMETYPE, NDJSON_MIMETYPE]
+        )
+        key = response_cache.make_key(request.path, request.args, representation)
 
-    # Extract query parameters for filtering
-    description = request.args.get("description")
-    title = request.args.get("title")
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
+        entry = response_cache.get(key)
+        cache_status = "HIT"
+        if entry is None:
+            response = application.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = response_cache.store(key, response)
+            if entry is None:
+                # Cache disabled or response too large, streamed as is
+                return response
+            cache_status = "MISS"
 
-    # Parse start_date and end_date if provided
-    start_date = (
-        datetime.strptime(start_date_str, "%Y-%m-%d") if start_date_str else None
-    )
-    end_date = datetime.strptime(end_date_str, "%Y-%m-%d") if end_date_str else None
+        response = response_cache.to_response(entry)
+        response.headers["X-Cache"] = cache_status
+        return response.make_conditional(request)
 
-    # Define the transaction operation to retrieve filtered and paginated articles
-    def get_filtered_articles_transaction(db):
-        query = {}
+    return wrapper
 
-        # Apply filters based on criteria
-        if description:
-            query["metadata.oai_dc:dc.dc:description"] = {
-                "$regex": f".*{description}.*",
-                "$options": "i",
-            }
 
-        if title:
-            query["metadata.oai_dc:dc.dc:title"] = {
-                "$regex": f".*{title}.*",
-                "$options": "i",
-            }
+@application.route("/articles/", methods=["GET"])
+@cached_read
+def get_articles():
+    """
+    Endpoint to retrieve paginated articles.
+
+    Articles are sorted by (datestamp, _id). The X-Next-Cursor header of the
+    response holds the token of the next page, to pass back as `cursor=`: reading a
+    page from a cursor costs the same whatever its depth. `page=` is still supported.
+
+    `q=` runs a full-text search on titles and descriptions through the text index,
+    articles are then ranked by relevance and paginated with `page=`. `title=` and
+    `description=` remain as literal, case-insensitive substring filters. When `q=` is
+    the only filter and the in-process search index is available, the ranking is done
+    by the index (titles, abstracts, creators and subjects, BM25) and the articles are
+    fetched by _id; articles deleted since the index was saved are skipped and the
+    page is filled with the next results.
+
+    `fields=` selects the returned fields (comma-separated, see FIELD_PATHS) and
+    `view=summary` returns a compact view; the datestamp is always kept as it is part
+    of the pagination key.
 
-        if start_date and end_date:
-            query["header.datestamp"] = {
-                "$gte": start_date,
-                "$lte": end_date,
+    Returns:
+        Response: Paginated articles in JSON format.
+    """
+    try:
+        articles_args = parse_articles_args(request.args)
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    def add_next_page_headers(response, last_key=None):
+        next_args, next_cursor = next_page(
+            request.args.to_dict(), articles_args, last_key
+        )
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = (
+            f'<{url_for("get_articles", **next_args)}>; rel="next"'
+        )
+
+    search_index = None
+    if search_index_reader and uses_search_index(articles_args):
+        search_index = search_index_reader.get()
+
+    # Define the read operation to retrieve the articles ranked by the search index
+    def get_indexed_articles_transaction(db):
+        # Articles deleted since the index was saved are skipped
+        limit = indexed_search_limit(articles_args)
+        while limit:
+            results = search_index.search(articles_args["search"], limit=limit)
+            existing_ids = {
+                key["_id"]
+                for key in db.arxiv_data_doc.find(
+                    {"_id": {"$in": [article_id for article_id, _ in results]}},
+                    {"_id": 1},
+                )
             }
+            ranked, has_next, limit = indexed_page(
+                results, existing_ids, articles_args, limit
+            )
 
-        articles_cursor = (
-            db.arxiv_data_doc.find(query).skip((page - 1) * per_page).limit(per_page)
+        response = return_json_from_bson(
+            db.arxiv_data_doc.aggregate(
+                ranked_pipeline(ranked, articles_args["projection"])
+            )
         )
+        if has_next:
+            add_next_page_headers(response)
+        return response
 
-        return return_pretty_json_from_bson(articles_cursor)
+    # Define the read operation to retrieve filtered and paginated articles
+    def get_filtered_articles_transaction(db):
+        keys = keys_query(articles_args)
+        keys_cursor = db.arxiv_data_doc.find(keys["filter"], keys["projection"]).sort(
+            keys["sort"]
+        )
+        if keys["skip"] is not None:
+            keys_cursor = keys_cursor.skip(keys["skip"])
+
+        # Ranked by relevance with q=, the text score is returned with each article
+        pipeline, last_key = page_pipeline(
+            articles_args, list(keys_cursor.limit(keys["limit"]))
+        )
+        response = return_json_from_bson(db.arxiv_data_doc.aggregate(pipeline))
+        if last_key is not None:
+            add_next_page_headers(response, last_key)
+        return response
 
-    # Perform the transaction
+    # Perform the read
     try:
-        db_manager.open_connection()
-        response = db_manager.perform_transaction(get_filtered_articles_transaction)
-        db_manager.close_connection()
+        if search_index is not None:
+            response = db_manager.perform_read(get_indexed_articles_transaction)
+        else:
+            response = db_manager.perform_read(get_filtered_articles_transaction)
 
         logger.info(" Retrieved filtered articles successfully")
         return response
 
     except Exception as e:
-        logging.error(f"Error retrieving articles: {e}")
+        logger.error("Error retrieving articles: %s", e)
         return {"error": str(e)}, 500
 
 
 @application.route("/article/<id>", methods=["GET"])
+@cached_read
 def get_article_by_id(id):
     """
     Endpoint to retrieve an article by its ID.
@@ -131,31 +432,224 @@ def get_article_by_id(id):
         # Convert the provided ID to ObjectId
         obj_id = ObjectId(id)
     except Exception:
-        logging.error("error" "Invalid ObjectId format")
+        logger.error("error Invalid ObjectId format")
         return jsonify({"error": "Invalid ObjectId format"}), 400
 
-    # Define the transaction operation to retrieve the document by ObjectId
+    # Get the fields to return, see get_articles
+    try:
+        projection = build_projection(
+            request.args.get("fields"), request.args.get("view")
+        )
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    # Define the read operation to retrieve the document by ObjectId
     def get_article_transaction(db):
-        article = db.arxiv_data_doc.find_one({"_id": obj_id})
+        article = db.arxiv_data_doc.find_one({"_id": obj_id}, projection)
         if article:
-            logging.info("Id was successfully found")
-            return return_pretty_json_from_bson(article)
+            logger.info("Id was successfully found")
+            return return_json_from_bson(article)
         else:
-            logging.error("error Article not found")
+            logger.error("error Article not found")
             return jsonify({"error": "Article not found"}), 404
 
-    # Perform the transaction
+    # Perform the read
     try:
-        db_manager.open_connection()
-        response = db_manager.perform_transaction(get_article_transaction)
-        db_manager.close_connection()
+        response = db_manager.perform_read(get_article_transaction)
+
+        return response
+
+    except Exception as e:
+        logger.info("error %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+def _get_articles_batch(ids, fields=None, view=None):
+    """
+    Build the response of a batch lookup, shared by the GET and POST forms of /articles/batch.
+
+    Args:
+        ids ([str]): ObjectIds or OAI identifiers, in the requested order.
+        fields (str, optional): Comma-separated fields to return, see get_articles.
+        view (str, optional): View to return, see get_articles.
+
+    Returns:
+        Response: The articles in request order, null for the unknown ids, in JSON format.
+    """
+    try:
+        projection, query = parse_batch_args(
+            ids, fields, view, int(app_config.get("ARTICLES_BATCH_MAX_IDS", 100))
+        )
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
 
+    # Define the read operation resolving every id with one query
+    def get_articles_batch_transaction(db):
+        articles = db.arxiv_data_doc.find(query, projection)
+        return return_json_from_bson(order_batch(articles, ids))
+
+    # Perform the read
+    try:
+        response = db_manager.perform_read(get_articles_batch_transaction)
+
+        logger.info("Retrieved a batch of %s articles successfully", len(ids))
         return response
 
     except Exception as e:
-        logging.info(f"error {e}")
+        logger.error("Error retrieving articles: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@application.route("/articles/batch", methods=["GET"])
+@cached_read
+def get_articles_batch():
+    """
+    Endpoint to retrieve several articles by their ObjectIds or OAI identifiers.
+
+    `ids=` holds the comma-separated ids, at most ARTICLES_BATCH_MAX_IDS. They are
+    resolved with one query and the articles are returned in the same order, null
+    standing for an unknown id. `fields=` and `view=` select the returned fields as in
+    get_articles, the identifier is always kept.
+
+    Returns:
+        Response: Articles in JSON format.
+    """
+    ids = [value.strip() for value in request.args.get("ids", "").split(",")]
+    return _get_articles_batch(
+        [value for value in ids if value],
+        request.args.get("fields"),
+        request.args.get("view"),
+    )
+
+
+@application.route("/articles/batch", methods=["POST"])
+def post_articles_batch():
+    """
+    Endpoint to retrieve several articles by their ids, given in a JSON body.
+
+    The body is {"ids": [...], "fields": "...", "view": "..."}, fields and view being
+    optional. See get_articles_batch.
+
+    Returns:
+        Response: Articles in JSON format.
+    """
+    try:
+        ids, fields, view = batch_body_args(request.get_json(silent=True), request.args)
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    return _get_articles_batch(ids, fields, view)
+
+
+def _parse_stats_args(dimension, args):
+    """
+    Parse and validate the query parameters of /stats/<dimension>, see get_stats.
+
+    Args:
+        dimension (str): subjects, authors or months.
+        args (werkzeug.datastructures.MultiDict): Query parameters.
+
+    Returns:
+        tuple: The maximum number of keys and the sort order.
+
+    Raises:
+        ValueError: If a parameter is invalid, with the message returned to the client.
+    """
+    max_keys = int(app_config.get("STATS_MAX_KEYS", 1000))
+    try:
+        limit = int(args.get("limit", 100))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= max_keys:
+        raise ValueError(f"limit must be between 1 and {max_keys}")
+
+    sort = args.get("sort", "key" if dimension == "months" else "count")
+    if sort not in STATS_SORTS:
+        raise ValueError("sort must be count or key")
+
+    return limit, sort
+
+
+@application.route("/stats/<dimension>", methods=["GET"])
+@cached_read
+def get_stats(dimension):
+    """
+    Endpoint to retrieve the number of articles per subject, author or month.
+
+    Counts are read from the summary collections maintained by StatsManager, refreshed
+    after each harvest, so no article is read. `limit=` caps the number of keys
+    (default 100, at most STATS_MAX_KEYS) and `sort=` orders them by `count`, the
+    default, or by `key`, the default for months.
+
+    Args:
+        dimension (str): subjects, authors or months.
+
+    Returns:
+        Response: The keys and their counts in JSON format.
+    """
+    if dimension not in STATS_DIMENSIONS:
+        logger.error("error Unknown statistics")
+        return jsonify({"error": f"Unknown statistics {dimension}"}), 404
+
+    try:
+        limit, sort = _parse_stats_args(dimension, request.args)
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        documents = db_manager.perform_read(
+            lambda db: StatsManager(db).top(dimension, limit, sort)
+        )
+    except Exception as e:
+        logger.error("Error retrieving statistics: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(
+        {
+            "dimension": dimension,
+            "keys": [
+                {"key": document["_id"], "count": document["count"]}
+                for document in documents
+            ],
+        }
+    )
+
+
+@application.route("/stats/<dimension>/<path:key>", methods=["GET"])
+@cached_read
+def get_stats_by_key(dimension, key):
+    """
+    Endpoint to retrieve the number of articles of a subject, an author or a month.
+
+    Args:
+        dimension (str): subjects, authors or months.
+        key (str): Subject, author, or month as YYYY-MM.
+
+    Returns:
+        Response: The count in JSON format.
+    """
+    if dimension not in STATS_DIMENSIONS:
+        logger.error("error Unknown statistics")
+        return jsonify({"error": f"Unknown statistics {dimension}"}), 404
+
+    try:
+        document = db_manager.perform_read(
+            lambda db: StatsManager(db).get(dimension, key)
+        )
+    except Exception as e:
+        logger.error("Error retrieving statistics: %s", e)
         return jsonify({"error": str(e)}), 500
 
+    if document is None:
+        logger.error("error Key not found")
+        return jsonify({"error": "Key not found"}), 404
+
+    return jsonify({"dimension": dimension, "key": key, "count": document["count"]})
+
 
 @application.route("/inject_data_to_mongodb", methods=["GET"])
 def inject_data_to_mongodb():
@@ -167,9 +661,16 @@ def inject_data_to_mongodb():
 
     Query Parameters:
         ARXSET (optional): The ARXSET parameter specifying the data to be injected. If nothing is specified then the API will extract from "cs" arxset.
+            Several comma-separated sets (cs,math,physics) are harvested at once.
+
+    The harvest runs in the background: the response is a 202 with the queued job, whose
+    status and counts are available at /jobs/<job_id> (Location header). A set is
+    harvested by one job at a time: the sets already queued or running are left to
+    their job, only the other sets are queued. `jobs` lists every job harvesting the
+    requested sets, the job of the response is the queued one if any.
 
     Returns:
-        Response: Success or error message in JSON format.
+        Response: The job in JSON format.
 
     Raises:
         None, as the caught exception is logged and returned as part of the response.
@@ -179,15 +680,57 @@ def inject_data_to_mongodb():
             "ARXSET", default="cs"
         )  # Get ARXSET from query parameters with default value None
 
-        cron_inject_data_mongodb(app_config, arxset=arxset)
-        return jsonify({"message": "Data injection completed successfully."})
+        arxsets = [value.strip() for value in arxset.split(",") if value.strip()]
+        if not arxsets:
+            logger.error("error Invalid ARXSET")
+            return jsonify({"error": "Invalid ARXSET"}), 400
+
+        job, active_jobs = harvest_job_queue.submit(arxsets)
+        jobs = ([job] if job is not None else []) + active_jobs
+        status_url = url_for("get_job", job_id=jobs[0]["_id"])
+
+        response = jsonify(
+            {
+                **_job_to_json(jobs[0]),
+                "created": job is not None,
+                "jobs": [_job_to_json(value) for value in jobs],
+            }
+        )
+        response.status_code = 202
+        response.headers["Location"] = status_url
+        return response
     except Exception as e:
         error_message = f"Error during data injection: {str(e)}"
         logger.error(error_message)
         return jsonify({"error": error_message}), 500  # 500 Internal Server Error
 
 
+@application.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Endpoint to retrieve the status of a harvest job.
+
+    Args:
+        job_id (str): Id returned by /inject_data_to_mongodb.
+
+    Returns:
+        Response: The job status (queued, running, succeeded or failed) and its counts in JSON format.
+    """
+    try:
+        job = harvest_job_queue.get(job_id)
+    except Exception as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    if job is None:
+        logger.error("error Job not found")
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(_job_to_json(job))
+
+
 @application.route("/text/<id>", methods=["GET"])
+@cached_read
 def get_article_summary_by_id(id):
     """
     Endpoint to retrieve the summary of an article by its ID.
@@ -202,31 +745,27 @@ def get_article_summary_by_id(id):
         # Convert the provided ID to ObjectId
         obj_id = ObjectId(id)
     except Exception:
-        logging.error("error Invalid ObjectId format")
+        logger.error("error Invalid ObjectId format")
         return jsonify({"error": "Invalid ObjectId format"}), 400
 
-    # Define the transaction operation to retrieve the document by ObjectId
+    # Define the read operation to retrieve the document by ObjectId
     def get_article_summary_transaction(db):
-        article = db.arxiv_data_doc.find_one(
-            {"_id": obj_id}, {"metadata.oai_dc:dc.dc:description": 1}
-        )
+        article = db.arxiv_data_doc.find_one({"_id": obj_id}, {"descriptions": 1})
         if article:
-            logging.info("Id was successfully found")
-            return return_pretty_json_from_bson(article)
+            logger.info("Id was successfully found")
+            return return_json_from_bson(article)
         else:
-            logging.info("error Article not found")
+            logger.info("error Article not found")
             return jsonify({"error": "Article not found"}), 404
 
-    # Perform the transaction
+    # Perform the read
     try:
-        db_manager.open_connection()
-        response = db_manager.perform_transaction(get_article_summary_transaction)
-        db_manager.close_connection()
+        response = db_manager.perform_read(get_article_summary_transaction)
 
         return response
 
     except Exception as e:
-        logging.error(f"error {e}")
+        logger.error("error %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -235,25 +774,26 @@ def insert_doc_from_user():
     """
     Endpoint to insert a new document from the user.
 
+    The document has the shape of an OAI-PMH record (header and metadata), it is stored
+    in the normalized schema of the harvested records. header.identifier and
+    header.datestamp are required, as for the lines of /articles/bulk.
+
     Returns:
         Response: Success or error message in JSON format.
     """
     try:
-        # Get the JSON document from the request body
-        new_article = request.get_json()
-
-        # Validate that the required fields are present in the document
-        if not new_article or not all(
-            key in new_article for key in ["header", "metadata"]
-        ):
-            logging.error("error Invalid or incomplete document")
-            return jsonify({"error": "Invalid or incomplete document"}), 400
+        # Validate the JSON document of the request body, as the lines of /articles/bulk
+        new_article, error = _validate_document(request.get_json(silent=True))
+        if error is not None:
+            logger.error("error %s", error)
+            return jsonify({"error": error}), 400
 
         # Define the transaction operation to insert the document into MongoDB
         def insert_article_transaction(db):
             result = db.arxiv_data_doc.insert_one(new_article)
             inserted_id = str(result.inserted_id)
-            logging.info("Article inserted successfully")
+            HarvestStateManager(db).bump_generation()
+            logger.info("Article inserted successfully")
             return (
                 jsonify(
                     {"message": "Article inserted successfully", "id": inserted_id}
@@ -262,17 +802,153 @@ def insert_doc_from_user():
             )
 
         # Perform the transaction
-        db_manager.open_connection()
         response = db_manager.perform_transaction(insert_article_transaction)
-        db_manager.close_connection()
+        response_cache.refresh()
 
         return response
 
     except Exception as e:
-        logging.error(f"error {e}")
+        logger.error("error %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+def _validate_document(document):
+    """
+    Validate and normalize a document sent by the user, see insert_doc_from_user.
+
+    Args:
+        document: Decoded JSON document, an OAI-PMH record with header and metadata.
+
+    Returns:
+        tuple: The normalized record and None, or None and the error message.
+    """
+    if not isinstance(document, dict) or not all(
+        key in document for key in ["header", "metadata"]
+    ):
+        return None, "Invalid or incomplete document"
+    if not isinstance(document["header"], dict):
+        return None, "header must be an object"
+    if not isinstance(document["metadata"], (dict, type(None))) or not isinstance(
+        (document["metadata"] or {}).get("oai_dc:dc"), (dict, type(None))
+    ):
+        return None, "metadata.oai_dc:dc must be an object"
+
+    try:
+        record = record_converter.normalize_record(document)
+    except (AttributeError, TypeError) as e:
+        return None, f"Invalid document: {e}"
+    if record is None:
+        return None, "Invalid dates in document"
+    if not isinstance(record["identifier"], str) or not record["identifier"]:
+        return None, "Missing header.identifier"
+    if not isinstance(record["datestamp"], datetime):
+        return None, "Missing header.datestamp"
+    return record, None
+
+
+def _validate_bulk_line(line):
+    """
+    Parse and normalize one line of a bulk ingest body.
+
+    Args:
+        line (bytes): One NDJSON line, an OAI-PMH record with header and metadata.
+
+    Returns:
+        tuple: The normalized record and None, or None and the error message.
+    """
+    try:
+        document = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+    return _validate_document(document)
+
+
+@application.route("/articles/bulk", methods=["POST"])
+def bulk_insert_docs_from_user():
+    """
+    Endpoint to upsert many documents from the user in one request.
+
+    The body is NDJSON (application/x-ndjson): one OAI-PMH record per line, with the shape
+    accepted by POST /articles. It is read as a stream and handled by chunks of
+    MONGO_BULK_CHUNK_SIZE lines: each chunk is validated, then written by unordered
+    upserts keyed on the OAI identifier, like the harvest. Invalid lines and failed
+    writes are reported with their line number and do not reject the rest of the batch.
+
+    Returns:
+        Response: The counts of the batch and the errors by line in JSON format.
+    """
+    if request.mimetype != NDJSON_MIMETYPE:
+        logger.error("error Unsupported media type %s", request.mimetype)
+        return jsonify({"error": f"Content-Type must be {NDJSON_MIMETYPE}"}), 415
+
+    chunk_size = int(app_config.get("MONGO_BULK_CHUNK_SIZE", 500))
+    record_upserter = RecordUpserter(chunk_size=chunk_size)
+
+    report = UpsertReport()
+    errors = []
+    lines = 0
+
+    def write_chunk(db, chunk):
+        # chunk maps each identifier to the line of its record
+        write_errors = []
+        chunk_report = record_upserter.upsert(
+            db, [record for record, _ in chunk.values()], write_errors
+        )
+        for identifier, message in write_errors:
+            errors.append({"line": chunk[identifier][1], "error": message})
+        if chunk_report.inserted or chunk_report.updated:
+            HarvestStateManager(db).bump_generation()
+            response_cache.refresh()
+        return chunk_report
+
+    try:
+        db_manager.open_connection()
+        db = db_manager.db
+
+        chunk = {}
+        for line in request.stream:
+            lines += 1
+            if not line.strip():
+                continue
+
+            record, error = _validate_bulk_line(line)
+            if error is None and record["identifier"] in chunk:
+                error = (
+                    "Identifier already at line "
+                    f'{chunk[record["identifier"]][1]} of the same chunk'
+                )
+            if error is not None:
+                errors.append({"line": lines, "error": error})
+                continue
+
+            chunk[record["identifier"]] = (record, lines)
+            if len(chunk) >= chunk_size:
+                report += write_chunk(db, chunk)
+                chunk = {}
+
+        if chunk:
+            report += write_chunk(db, chunk)
+
+    except Exception as e:
+        logger.error("error %s", e)
+        return (
+            jsonify({"error": str(e), "lines": lines, **report.model_dump()}),
+            500,
+        )
+
+    logger.info(
+        "Bulk ingest of %s lines: %s inserted, %s updated, %s unchanged, %s errors",
+        lines,
+        report.inserted,
+        report.updated,
+        report.unchanged,
+        len(errors),
+    )
+    errors.sort(key=lambda error: error["line"])
+    return jsonify({"lines": lines, **report.model_dump(), "errors": errors})
+
+
 @application.route("/time")
 def current_time():
     return f"Current Server Time: {datetime.now()}"
@@ -283,6 +959,15 @@ def health_check():
     return "OK"
 
 
+@application.route("/metrics")
+def metrics():
+    """
+    Request latencies by route, MongoDB command durations by query shape, connection
+    pool usage and harvest counters, in the Prometheus text format.
+    """
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 @application.route("/")
 def welcome():
     return "Welcome to My Flask API!"
@@ -0,0 +1,62 @@
+"""ASGI entry point of the API, the async serving mode of wsgi.py.
+
+    hypercorn --workers 4 --bind 0.0.0.0:5000 flask_api_crawler_arxiv.flask_api.asgi:application
+
+The read endpoints of async_app.py are served by their async handlers, the other
+endpoints by the WSGI application of app.py in threads.
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+from flask_api_crawler_arxiv.flask_api.app import application as wsgi_application
+from flask_api_crawler_arxiv.flask_api.async_app import async_application
+
+
+class RouteDispatcher:
+    """
+    ASGI application sending each request to the async application when it has the route.
+    """
+
+    def __init__(self, async_app, wsgi_app):
+        """
+        Initialize RouteDispatcher with the two applications.
+
+        Args:
+            async_app (quart.Quart): Application of the async endpoints.
+            wsgi_app (flask.Flask): Application of all the endpoints.
+        """
+        self.async_app = async_app
+        self.wsgi_app = WsgiToAsgi(wsgi_app)
+
+    def handles(self, path, method):
+        """
+        Tell whether the async application has the route of a request.
+
+        Args:
+            path (str): Path of the request.
+            method (str): HTTP method of the request.
+
+        Returns:
+            bool: True if the async application serves the request.
+        """
+        adapter = self.async_app.url_map.bind("localhost")
+        try:
+            adapter.match(path, method=method)
+        except RequestRedirect:
+            # Redirections are left to the WSGI application, it has all the routes.
+            return False
+        except HTTPException:
+            return False
+        return True
+
+    async def __call__(self, scope, receive, send):
+        # The lifespan events open and close the async MongoDB client.
+        if scope["type"] == "http" and not self.handles(scope["path"], scope["method"]):
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.async_app(scope, receive, send)
+
+
+application = RouteDispatcher(async_application, wsgi_application)
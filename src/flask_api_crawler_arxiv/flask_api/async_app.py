@@ -0,0 +1,527 @@
+"""Async serving mode of the read endpoints of the API.
+
+The read endpoints of app.py are served here by async handlers on a Quart application,
+reading MongoDB through Motor: a request waiting for MongoDB holds no thread, so under
+a high fan-in the concurrency is bounded by the connection pool (MONGO_MAX_POOL_SIZE)
+rather than by a number of worker threads. Parameters, queries and responses are the
+ones of the WSGI endpoints, the helpers of app.py are shared. The other endpoints are
+served by the WSGI application, see asgi.py.
+
+Needs the quart and motor packages, and an ASGI server such as hypercorn.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+
+from bson import json_util
+from bson.objectid import ObjectId
+from quart import Quart, Response, g, jsonify, request, url_for
+
+from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.flask_api.app import (
+    JSON_MIMETYPE,
+    NDJSON_MIMETYPE,
+    _parse_stats_args,
+    _stream_json_array,
+    _stream_ndjson,
+    ensure_indexes,
+    search_index_reader,
+    start_metrics,
+)
+from flask_api_crawler_arxiv.flask_api.ResponseCache import ResponseCache
+from flask_api_crawler_arxiv.monitoring.app_metrics import observe_request
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import metrics_options
+from flask_api_crawler_arxiv.mongodb.AsyncMongoDBManager import AsyncMongoDBManager
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+from flask_api_crawler_arxiv.mongodb.StatsManager import STATS_DIMENSIONS, STATS_SORTS
+from flask_api_crawler_arxiv.utils.articles_page import (
+    batch_body_args,
+    indexed_page,
+    indexed_search_limit,
+    keys_query,
+    next_page,
+    order_batch,
+    page_pipeline,
+    parse_articles_args,
+    parse_batch_args,
+    ranked_pipeline,
+    uses_search_index,
+)
+from flask_api_crawler_arxiv.utils.field_projection import build_projection
+from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+
+setup_logging(app_config)
+
+logger = logging.getLogger(__name__)
+
+async_application = Quart(__name__)
+
+db_manager = AsyncMongoDBManager(
+    f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
+    f'{app_config["MONGO_INITDB_DATABASE"]}',
+    app_config,
+)
+
+# Data generation, read by a background task so that no request waits on it.
+_generation = {"value": None}
+
+response_cache = ResponseCache(lambda: _generation["value"], app_config)
+
+
+async def _watch_generation():
+    """
+    Read the data generation at the check interval of the response cache.
+    """
+    interval = max(response_cache.options.generation_check, 0.5)
+    while True:
+        try:
+            document = await db_manager.perform_read(
+                lambda db: db.harvest_state.find_one(
+                    {"_id": HarvestStateManager.GENERATION_ID}
+                )
+            )
+            _generation["value"] = document["value"] if document else 0
+        except Exception as e:
+            logger.warning("Data generation read failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+@async_application.before_serving
+async def _open_connection():
+    await asyncio.get_running_loop().run_in_executor(None, ensure_indexes)
+    start_metrics()
+    # The Motor client is bound to the event loop of the server.
+    db_manager.open_connection()
+    async_application.generation_task = asyncio.ensure_future(_watch_generation())
+
+
+@async_application.after_serving
+async def _close_connection():
+    async_application.generation_task.cancel()
+    db_manager.close_connection()
+
+
+if metrics_options(app_config).enabled:
+
+    @async_application.before_request
+    async def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @async_application.after_request
+    async def _observe_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe_request(
+                request.method,
+                route,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+        return response
+
+
+def return_json_from_bson(bson_data):
+    """
+    Serialize MongoDB objects to JSON with the appropriate headers, see app.return_json_from_bson.
+
+    The documents are already read, the body is built at once.
+
+    Args:
+        bson_data: MongoDB document, or list of documents, to be serialized.
+
+    Returns:
+        Response: Quart Response object containing JSON data with appropriate headers.
+    """
+    pretty = request.args.get("pretty", "false").lower() in ("1", "true", "yes")
+
+    if isinstance(bson_data, dict):
+        if pretty:
+            body = json_util.dumps(bson_data, indent=4)
+        else:
+            body = json_util.dumps(bson_data, separators=(",", ":"))
+        response = Response(body, content_type=JSON_MIMETYPE)
+    elif (
+        request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE])
+        == NDJSON_MIMETYPE
+    ):
+        response = Response(
+            "".join(_stream_ndjson(bson_data)), content_type=NDJSON_MIMETYPE
+        )
+    else:
+        response = Response(
+            "".join(_stream_json_array(bson_data, pretty)), content_type=JSON_MIMETYPE
+        )
+
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.vary.add("Accept")
+
+    return response
+
+
+def cached_read(view):
+    """
+    Decorator serving an async read endpoint from the response cache, see app.cached_read.
+
+    Args:
+        view (function): The endpoint.
+
+    Returns:
+        function: The cached endpoint.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        representation = request.accept_mimetypes.best_match(
+            [JSON_MIMETYPE, NDJSON_MIMETYPE]
+        )
+        key = response_cache.make_key(request.path, request.args, representation)
+
+        entry = response_cache.get(key)
+        cache_status = "HIT"
+        if entry is None:
+            response = await async_application.make_response(
+                await view(*args, **kwargs)
+            )
+            if response.status_code != 200:
+                return response
+            if not response_cache.enabled or key is None:
+                return response
+            entry = response_cache.store_body(
+                key,
+                await response.get_data(),
+                response.status_code,
+                response.headers.items(),
+            )
+            if entry is None:
+                return response
+            cache_status = "MISS"
+
+        if request.if_none_match.contains(entry["etag"]):
+            response = Response("", status=304)
+        else:
+            response = Response(
+                entry["body"], status=entry["status"], headers=entry["headers"]
+            )
+        response.set_etag(entry["etag"])
+        response.cache_control.no_cache = True
+        response.headers["X-Cache"] = cache_status
+        return response
+
+    return wrapper
+
+
+@async_application.route("/articles/", methods=["GET"])
+@cached_read
+async def get_articles():
+    """
+    Endpoint to retrieve paginated articles, see app.get_articles.
+
+    Returns:
+        Response: Paginated articles in JSON format.
+    """
+    try:
+        articles_args = parse_articles_args(request.args)
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    def add_next_page_headers(response, last_key=None):
+        next_args, next_cursor = next_page(
+            request.args.to_dict(), articles_args, last_key
+        )
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = (
+            f'<{url_for("get_articles", **next_args)}>; rel="next"'
+        )
+
+    search_index = None
+    if search_index_reader and uses_search_index(articles_args):
+        # Reloading the index file is blocking, it runs in the default executor
+        search_index = await asyncio.get_running_loop().run_in_executor(
+            None, search_index_reader.get
+        )
+
+    # Define the read operation to retrieve the articles ranked by the search index
+    async def get_indexed_articles_transaction(db):
+        # Articles deleted since the index was saved are skipped
+        limit = indexed_search_limit(articles_args)
+        while limit:
+            # BM25 scoring is CPU-bound, it runs in the default executor
+            results = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    search_index.search, articles_args["search"], limit=limit
+                ),
+            )
+            existing_ids = {
+                key["_id"]
+                for key in await db.arxiv_data_doc.find(
+                    {"_id": {"$in": [article_id for article_id, _ in results]}},
+                    {"_id": 1},
+                ).to_list(None)
+            }
+            ranked, has_next, limit = indexed_page(
+                results, existing_ids, articles_args, limit
+            )
+
+        articles = await db.arxiv_data_doc.aggregate(
+            ranked_pipeline(ranked, articles_args["projection"])
+        ).to_list(None)
+
+        response = return_json_from_bson(articles)
+        if has_next:
+            add_next_page_headers(response)
+        return response
+
+    # Define the read operation to retrieve filtered and paginated articles
+    async def get_filtered_articles_transaction(db):
+        keys = keys_query(articles_args)
+        keys_cursor = db.arxiv_data_doc.find(keys["filter"], keys["projection"]).sort(
+            keys["sort"]
+        )
+        if keys["skip"] is not None:
+            keys_cursor = keys_cursor.skip(keys["skip"])
+
+        # Ranked by relevance with q=, the text score is returned with each article
+        pipeline, last_key = page_pipeline(
+            articles_args,
+            await keys_cursor.limit(keys["limit"]).to_list(keys["limit"]),
+        )
+        articles = await db.arxiv_data_doc.aggregate(pipeline).to_list(None)
+
+        response = return_json_from_bson(articles)
+        if last_key is not None:
+            add_next_page_headers(response, last_key)
+        return response
+
+    # Perform the read
+    try:
+        if search_index is not None:
+            return await db_manager.perform_read(get_indexed_articles_transaction)
+        return await db_manager.perform_read(get_filtered_articles_transaction)
+
+    except Exception as e:
+        logger.error("Error retrieving articles: %s", e)
+        return {"error": str(e)}, 500
+
+
+async def _get_article(id, projection):
+    """
+    Read an article by its ObjectId.
+
+    Args:
+        id (str): ObjectId of the article.
+        projection (dict): Fields to return.
+
+    Returns:
+        Response: The article, or the error, in JSON format.
+    """
+    if not ObjectId.is_valid(id):
+        logger.error("error Invalid ObjectId format")
+        return jsonify({"error": "Invalid ObjectId format"}), 400
+
+    try:
+        article = await db_manager.perform_read(
+            lambda db: db.arxiv_data_doc.find_one({"_id": ObjectId(id)}, projection)
+        )
+    except Exception as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    if not article:
+        logger.error("error Article not found")
+        return jsonify({"error": "Article not found"}), 404
+    return return_json_from_bson(article)
+
+
+@async_application.route("/article/<id>", methods=["GET"])
+@cached_read
+async def get_article_by_id(id):
+    """
+    Endpoint to retrieve an article by its ID, see app.get_article_by_id.
+
+    Args:
+        id (str): ObjectId of the article.
+
+    Returns:
+        Response: Article details in JSON format.
+    """
+    try:
+        projection = build_projection(
+            request.args.get("fields"), request.args.get("view")
+        )
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    return await _get_article(id, projection)
+
+
+@async_application.route("/text/<id>", methods=["GET"])
+@cached_read
+async def get_article_summary_by_id(id):
+    """
+    Endpoint to retrieve the summary of an article by its ID, see app.get_article_summary_by_id.
+
+    Args:
+        id (str): ObjectId of the article.
+
+    Returns:
+        Response: Article summary in JSON format.
+    """
+    return await _get_article(id, {"descriptions": 1})
+
+
+async def _get_articles_batch(ids, fields=None, view=None):
+    """
+    Build the response of a batch lookup, see app._get_articles_batch.
+
+    Args:
+        ids ([str]): ObjectIds or OAI identifiers, in the requested order.
+        fields (str, optional): Comma-separated fields to return.
+        view (str, optional): View to return.
+
+    Returns:
+        Response: The articles in request order, null for the unknown ids, in JSON format.
+    """
+    try:
+        projection, query = parse_batch_args(
+            ids, fields, view, int(app_config.get("ARTICLES_BATCH_MAX_IDS", 100))
+        )
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        articles = await db_manager.perform_read(
+            lambda db: db.arxiv_data_doc.find(query, projection).to_list(None)
+        )
+    except Exception as e:
+        logger.error("Error retrieving articles: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    return return_json_from_bson(order_batch(articles, ids))
+
+
+@async_application.route("/articles/batch", methods=["GET"])
+@cached_read
+async def get_articles_batch():
+    """
+    Endpoint to retrieve several articles by their ids, see app.get_articles_batch.
+
+    Returns:
+        Response: Articles in JSON format.
+    """
+    ids = [value.strip() for value in request.args.get("ids", "").split(",")]
+    return await _get_articles_batch(
+        [value for value in ids if value],
+        request.args.get("fields"),
+        request.args.get("view"),
+    )
+
+
+@async_application.route("/articles/batch", methods=["POST"])
+async def post_articles_batch():
+    """
+    Endpoint to retrieve several articles by their ids given in a JSON body, see app.post_articles_batch.
+
+    Returns:
+        Response: Articles in JSON format.
+    """
+    try:
+        ids, fields, view = batch_body_args(
+            await request.get_json(silent=True), request.args
+        )
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    return await _get_articles_batch(ids, fields, view)
+
+
+@async_application.route("/stats/<dimension>", methods=["GET"])
+@cached_read
+async def get_stats(dimension):
+    """
+    Endpoint to retrieve the number of articles per subject, author or month, see app.get_stats.
+
+    Args:
+        dimension (str): subjects, authors or months.
+
+    Returns:
+        Response: The keys and their counts in JSON format.
+    """
+    if dimension not in STATS_DIMENSIONS:
+        logger.error("error Unknown statistics")
+        return jsonify({"error": f"Unknown statistics {dimension}"}), 404
+
+    try:
+        limit, sort = _parse_stats_args(dimension, request.args)
+    except ValueError as e:
+        logger.error("error %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    collection_name = STATS_DIMENSIONS[dimension]["collection"]
+    try:
+        documents = await db_manager.perform_read(
+            lambda db: db[collection_name]
+            .find({}, {"count": 1})
+            .sort(STATS_SORTS[sort])
+            .limit(limit)
+            .to_list(limit)
+        )
+    except Exception as e:
+        logger.error("Error retrieving statistics: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(
+        {
+            "dimension": dimension,
+            "keys": [
+                {"key": document["_id"], "count": document["count"]}
+                for document in documents
+            ],
+        }
+    )
+
+
+@async_application.route("/stats/<dimension>/<path:key>", methods=["GET"])
+@cached_read
+async def get_stats_by_key(dimension, key):
+    """
+    Endpoint to retrieve the number of articles of a key, see app.get_stats_by_key.
+
+    Args:
+        dimension (str): subjects, authors or months.
+        key (str): Subject, author, or month as YYYY-MM.
+
+    Returns:
+        Response: The count in JSON format.
+    """
+    if dimension not in STATS_DIMENSIONS:
+        logger.error("error Unknown statistics")
+        return jsonify({"error": f"Unknown statistics {dimension}"}), 404
+
+    collection_name = STATS_DIMENSIONS[dimension]["collection"]
+    try:
+        document = await db_manager.perform_read(
+            lambda db: db[collection_name].find_one({"_id": key})
+        )
+    except Exception as e:
+        logger.error("Error retrieving statistics: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    if document is None:
+        logger.error("error Key not found")
+        return jsonify({"error": "Key not found"}), 404
+
+    return jsonify({"dimension": dimension, "key": key, "count": document["count"]})
+
+
+@async_application.route("/health")
+async def health_check():
+    return "OK"
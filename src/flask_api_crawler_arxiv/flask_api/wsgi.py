@@ -1,4 +1,11 @@
-from flask_api_crawler_arxiv.flask_api.app import application
+from flask_api_crawler_arxiv.flask_api.app import (
+    application,
+    ensure_indexes,
+    start_metrics,
+)
+
+ensure_indexes()
+start_metrics()
 
 if __name__ == "__name__":
     application.run()
@@ -0,0 +1,109 @@
+import logging
+
+from pymongo.read_concern import ReadConcern
+
+from flask_api_crawler_arxiv.mongodb.MongodbManager import (
+    _READ_PREFERENCES,
+    _MongoClientOptions,
+    _MongoReadOptions,
+)
+from flask_api_crawler_arxiv.monitoring.MongoMetricsListener import (
+    mongo_event_listeners,
+)
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # pragma: no cover - optional dependency
+    AsyncIOMotorClient = None
+
+
+class AsyncMongoDBManager:
+    """
+    AsyncMongoDBManager class managing the non-blocking MongoDB client of the async API.
+
+    It is the asyncio counterpart of MongoDBManager: one Motor client, and so one
+    connection pool, is shared by all the requests of the event loop. Requests waiting
+    for a connection queue in the driver, so the concurrency of the API is bounded by
+    MONGO_MAX_POOL_SIZE rather than by a number of threads. Needs the motor package.
+    """
+
+    def __init__(self, connection_string, database_name, app_config_dict=None):
+        """
+        Initialize AsyncMongoDBManager with the provided connection string and database name.
+
+        Args:
+            connection_string (str): MongoDB connection string.
+            database_name (str): Name of the MongoDB database.
+            app_config_dict (dict, optional): Configuration holding the pool size, timeouts
+                and read options, see MongoDBManager.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.connection_string = connection_string
+        self.database_name = database_name
+        self.client_options = _MongoClientOptions(**(app_config_dict or {})).model_dump(
+            exclude_none=True
+        )
+
+        self.event_listeners = mongo_event_listeners(app_config_dict)
+
+        read_options = _MongoReadOptions(**(app_config_dict or {}))
+        self.read_preference = _READ_PREFERENCES[read_options.read_preference]()
+        self.read_concern = ReadConcern(read_options.read_concern)
+
+        self.client = None
+        self.db = None
+
+    def open_connection(self):
+        """
+        Open the client, bound to the running event loop, if it is not already open.
+
+        Raises:
+            RuntimeError: If motor is not installed.
+        """
+        if self.client is not None:
+            return
+        if AsyncIOMotorClient is None:
+            raise RuntimeError("The async API needs the motor package")
+
+        self.client = AsyncIOMotorClient(
+            self.connection_string,
+            event_listeners=self.event_listeners,
+            **self.client_options,
+        )
+        self.db = self.client[self.database_name]
+        self._logging.info("Async MongoDB connection opened.")
+
+    def close_connection(self):
+        """
+        Close the client.
+        """
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.db = None
+            self._logging.info("Async MongoDB connection closed.")
+
+    async def perform_read(self, read_operations):
+        """
+        Perform read-only operations, outside of any session or transaction.
+
+        Args:
+            read_operations (function): Coroutine function that takes a Motor database,
+                configured with the read preference and read concern, and performs
+                read operations.
+
+        Returns:
+            The result of read_operations.
+
+        Example:
+            manager = AsyncMongoDBManager("your_mongodb_connection_string", "your_database_name")
+            article = await manager.perform_read(lambda db: db.collection.find_one({"field": "value"}))
+        """
+        if self.client is None:
+            self.open_connection()
+
+        read_db = self.db.with_options(
+            read_preference=self.read_preference, read_concern=self.read_concern
+        )
+        return await read_operations(read_db)
@@ -0,0 +1,207 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+
+# Statuses of a job, queued and running jobs are active.
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+HARVEST_JOBS_INDEXES = [
+    # One active job per set: the unique index on the array rejects a job sharing any
+    # set with an active job, concurrent requests for a set share its job.
+    IndexModel(
+        [("sets", ASCENDING)],
+        name="sets_active_unique",
+        unique=True,
+        partialFilterExpression={"active": True},
+    ),
+]
+
+# Former index allowing two active jobs with different set lists to share a set.
+LEGACY_HARVEST_JOBS_INDEXES = ["key_active_unique"]
+
+
+class HarvestJobManager:
+    """
+    HarvestJobManager class persisting the harvest jobs run in the background by the API.
+
+    Jobs are stored so that every API worker can report their status:
+        {
+            "_id": "3f2a...",             # job id
+            "sets": ["cs", "math"],       # a set belongs to one active job at most
+            "status": "running",          # queued, running, succeeded or failed
+            "active": True,               # only while queued or running
+            "inserted": 10, "updated": 2, "unchanged": 0,
+            "error": None,
+            "created_at": datetime, "started_at": datetime,
+            "finished_at": datetime, "updated_at": datetime,
+        }
+    """
+
+    def __init__(self, db, collection_name="harvest_jobs", stale_seconds=3600):
+        """
+        Initialize HarvestJobManager with the database holding the jobs collection.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            collection_name (str): Name of the jobs collection.
+            stale_seconds (int): Time without progress after which an active job is
+                considered abandoned, its worker having stopped.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.db = db
+        self.collection_name = collection_name
+        self.collection = db[collection_name]
+        self.stale_seconds = stale_seconds
+
+    def ensure_indexes(self):
+        """
+        Create the indexes of the jobs collection.
+        """
+        IndexManager(
+            self.db,
+            self.collection_name,
+            HARVEST_JOBS_INDEXES,
+            LEGACY_HARVEST_JOBS_INDEXES,
+        ).ensure_indexes()
+
+    def get(self, job_id):
+        """
+        Return a job.
+
+        Args:
+            job_id (str): Id of the job.
+
+        Returns:
+            dict: The job, or None if it does not exist.
+        """
+        return self.collection.find_one({"_id": job_id})
+
+    def create(self, sets):
+        """
+        Queue a job harvesting the given sets that no active job harvests yet.
+
+        Args:
+            sets ([str]): arXiv sets to harvest.
+
+        Returns:
+            tuple: The job queued for the sets without an active job, None if every set
+                has one, and the active jobs harvesting the other sets.
+        """
+        sets = list(dict.fromkeys(sets))
+
+        # An active job may start, finish, or be found abandoned between the read and the insert.
+        for _ in range(3):
+            now = datetime.utcnow()
+            active_jobs = []
+            for active_job in self.collection.find(
+                {"sets": {"$in": sets}, "active": True}
+            ):
+                if active_job["updated_at"] < now - timedelta(
+                    seconds=self.stale_seconds
+                ):
+                    self.finish(active_job["_id"], error="Abandoned by its worker")
+                else:
+                    active_jobs.append(active_job)
+
+            active_sets = {arxset for job in active_jobs for arxset in job["sets"]}
+            remaining_sets = [arxset for arxset in sets if arxset not in active_sets]
+            if not remaining_sets:
+                return None, active_jobs
+
+            job = {
+                "_id": uuid.uuid4().hex,
+                "sets": remaining_sets,
+                "status": QUEUED,
+                "active": True,
+                "inserted": 0,
+                "updated": 0,
+                "unchanged": 0,
+                "error": None,
+                "created_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "updated_at": now,
+            }
+            try:
+                self.collection.insert_one(job)
+            except DuplicateKeyError:
+                continue
+
+            self._logging.info(
+                "Harvest job %s queued for %s", job["_id"], ",".join(remaining_sets)
+            )
+            return job, active_jobs
+
+        raise RuntimeError(f"Unable to queue a harvest job for {','.join(sets)}")
+
+    def start(self, job_id):
+        """
+        Record the start of a job.
+
+        Args:
+            job_id (str): Id of the job.
+
+        Returns:
+            bool: False if the job is no longer active and must not run.
+        """
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {"_id": job_id, "active": True},
+            {"$set": {"status": RUNNING, "started_at": now, "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    def progress(self, job_id, report):
+        """
+        Add the counts of a written page to a job.
+
+        Args:
+            job_id (str): Id of the job.
+            report (UpsertReport): Counts of the page.
+        """
+        self.collection.update_one(
+            {"_id": job_id},
+            {
+                "$inc": {
+                    "inserted": report.inserted,
+                    "updated": report.updated,
+                    "unchanged": report.unchanged,
+                },
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+        )
+
+    def finish(self, job_id, error=None):
+        """
+        Record the end of a job, the sets can be queued again.
+
+        Args:
+            job_id (str): Id of the job.
+            error (str, optional): Error that stopped the job. Defaults to None.
+
+        Returns:
+            dict: The finished job.
+        """
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "status": FAILED if error is not None else SUCCEEDED,
+                    "error": error,
+                    "finished_at": now,
+                    "updated_at": now,
+                },
+                "$unset": {"active": ""},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
@@ -0,0 +1,115 @@
+import logging
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+
+class HarvestStateManager:
+    """
+    HarvestStateManager class for persisting the harvest watermark of each arXiv set.
+
+    One document per ARXSET is kept in the harvest state collection:
+        {
+            "_id": "cs",
+            "last_datestamp": datetime,   # greatest datestamp written by a completed harvest
+            "resumption_token": str,      # token of the last page written, None when complete
+            "pending_datestamp": datetime,  # greatest datestamp written by the running harvest
+            "updated_at": datetime,
+        }
+
+    The same collection holds the data generation, bumped each time the articles change
+    so the API drops its cached responses:
+        {"_id": "_generation", "value": int}
+    """
+
+    GENERATION_ID = "_generation"
+
+    def __init__(self, db, collection_name="harvest_state"):
+        """
+        Initialize HarvestStateManager with the database holding the state collection.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            collection_name (str): Name of the harvest state collection.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.collection = db[collection_name]
+
+    def get_state(self, arxset):
+        """
+        Return the stored state of an arXiv set.
+
+        Args:
+            arxset (str): The arXiv set.
+
+        Returns:
+            dict: The state document, or None if the set was never harvested.
+        """
+        return self.collection.find_one({"_id": arxset})
+
+    def save_progress(self, arxset, resumption_token, last_datestamp=None):
+        """
+        Record the resumption point reached by a running harvest.
+
+        Args:
+            arxset (str): The arXiv set.
+            resumption_token (str): Token of the next page, None when the list is complete.
+            last_datestamp (datetime): Greatest datestamp written by the page, if any.
+        """
+        update = {
+            "$set": {
+                "resumption_token": resumption_token,
+                "updated_at": datetime.utcnow(),
+            }
+        }
+        if last_datestamp is not None:
+            update["$max"] = {"pending_datestamp": last_datestamp}
+
+        self.collection.update_one({"_id": arxset}, update, upsert=True)
+
+    def complete(self, arxset):
+        """
+        Record a successful harvest and move the watermark to the greatest datestamp written.
+
+        Args:
+            arxset (str): The arXiv set.
+        """
+        state = self.get_state(arxset) or {}
+        pending_datestamp = state.get("pending_datestamp")
+
+        update = {
+            "$set": {"resumption_token": None, "updated_at": datetime.utcnow()},
+            "$unset": {"pending_datestamp": ""},
+        }
+        if pending_datestamp is not None:
+            update["$max"] = {"last_datestamp": pending_datestamp}
+
+        self.collection.update_one({"_id": arxset}, update, upsert=True)
+        self._logging.info("Harvest state of %s saved: %s", arxset, pending_datestamp)
+
+    def get_generation(self):
+        """
+        Return the data generation.
+
+        Returns:
+            int: The generation, 0 if the articles never changed since it was introduced.
+        """
+        document = self.collection.find_one({"_id": self.GENERATION_ID})
+        return document["value"] if document else 0
+
+    def bump_generation(self):
+        """
+        Record a change of the articles, invalidating the cached API responses.
+
+        Returns:
+            int: The new generation.
+        """
+        document = self.collection.find_one_and_update(
+            {"_id": self.GENERATION_ID},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._logging.info("Data generation bumped to %s", document["value"])
+        return document["value"]
@@ -0,0 +1,161 @@
+import logging
+from pymongo import ASCENDING, TEXT, IndexModel
+
+# Indexes required by the harvest and the API on the arxiv_data_doc collection.
+ARXIV_DATA_DOC_INDEXES = [
+    IndexModel(
+        [("identifier", ASCENDING)],
+        name="identifier_unique",
+        unique=True,
+        # Documents of the former schema, not migrated yet, have no identifier.
+        sparse=True,
+    ),
+    # Sort key of the keyset pagination of GET /articles/.
+    IndexModel(
+        [("datestamp", ASCENDING), ("_id", ASCENDING)],
+        name="datestamp_id",
+    ),
+    # Full-text search of GET /articles/?q=, matches in titles weigh more.
+    IndexModel(
+        [("title", TEXT), ("descriptions", TEXT)],
+        name="title_descriptions_text",
+        weights={"title": 10, "descriptions": 1},
+        default_language="english",
+    ),
+]
+
+# Indexes of the former xmltodict schema. header_identifier_unique indexes every
+# normalized document under a null identifier, rejecting all of them but the first,
+# and a collection holds a single text index.
+LEGACY_ARXIV_DATA_DOC_INDEXES = [
+    "header_identifier_unique",
+    "header_datestamp_id",
+    "title_description_text",
+]
+
+
+class IndexManager:
+    """
+    IndexManager class declaring and creating the indexes of the arxiv_data_doc collection.
+
+    It also explains queries, to check that they are served by the declared indexes.
+    """
+
+    def __init__(
+        self, db, collection_name="arxiv_data_doc", indexes=None, legacy_indexes=None
+    ):
+        """
+        Initialize IndexManager with the database holding the collection.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            collection_name (str): Name of the indexed collection.
+            indexes (list[IndexModel]): Declared indexes. Defaults to ARXIV_DATA_DOC_INDEXES.
+            legacy_indexes (list[str]): Names of the indexes to drop. Defaults to
+                LEGACY_ARXIV_DATA_DOC_INDEXES with the default indexes, to none otherwise.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.collection = db[collection_name]
+        if indexes is None:
+            indexes = ARXIV_DATA_DOC_INDEXES
+            if legacy_indexes is None:
+                legacy_indexes = LEGACY_ARXIV_DATA_DOC_INDEXES
+        self.indexes = indexes
+        self.legacy_indexes = legacy_indexes or []
+
+    def drop_legacy_indexes(self):
+        """
+        Drop the legacy indexes still present on the collection.
+
+        Returns:
+            list[str]: Names of the dropped indexes.
+        """
+        if not self.legacy_indexes:
+            return []
+
+        existing = self.collection.index_information()
+        dropped = [name for name in self.legacy_indexes if name in existing]
+        for name in dropped:
+            self.collection.drop_index(name)
+            self._logging.info(
+                "Legacy index %s dropped on %s", name, self.collection.name
+            )
+        return dropped
+
+    def ensure_indexes(self):
+        """
+        Drop the legacy indexes and create the declared indexes. Existing indexes with
+        the same definition are left untouched.
+
+        Returns:
+            list[str]: Names of the declared indexes.
+        """
+        self.drop_legacy_indexes()
+        names = self.collection.create_indexes(self.indexes)
+        self._logging.info("Indexes ensured on %s: %s", self.collection.name, names)
+        return names
+
+    def missing_indexes(self):
+        """
+        Return the declared indexes that do not exist on the collection.
+
+        Returns:
+            list[str]: Names of the missing indexes.
+        """
+        existing = self.collection.index_information()
+        return [
+            index.document["name"]
+            for index in self.indexes
+            if index.document["name"] not in existing
+        ]
+
+    def explain(self, query, sort=None, projection=None, limit=0):
+        """
+        Explain a query and summarize its winning plan.
+
+        Args:
+            query (dict): MongoDB filter.
+            sort (list, optional): Sort order of the query.
+            projection (dict, optional): Projection of the query.
+            limit (int, optional): Maximum number of documents, 0 for no limit.
+
+        Returns:
+            dict: Stages and indexes of the winning plan, whether it scans the whole
+                collection (COLLSCAN) or sorts in memory (SORT), and the keys and
+                documents examined for the documents returned.
+        """
+        cursor = self.collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        explanation = cursor.explain()
+
+        stages, indexes = [], []
+        _walk_plan(explanation["queryPlanner"]["winningPlan"], stages, indexes)
+        execution_stats = explanation.get("executionStats", {})
+        return {
+            "stages": stages,
+            "indexes": indexes,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+            "keys_examined": execution_stats.get("totalKeysExamined"),
+            "docs_examined": execution_stats.get("totalDocsExamined"),
+            "returned": execution_stats.get("nReturned"),
+        }
+
+
+def _walk_plan(plan, stages, indexes):
+    # Plans nest their input stages under keys depending on the stage and the query
+    # engine (inputStage, inputStages, queryPlan...), every nested value is visited.
+    if isinstance(plan, list):
+        for item in plan:
+            _walk_plan(item, stages, indexes)
+    elif isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan and plan["indexName"] not in indexes:
+            indexes.append(plan["indexName"])
+        for value in plan.values():
+            _walk_plan(value, stages, indexes)
@@ -1,49 +1,202 @@
+import functools
 import logging
+import os
+import threading
+import weakref
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
 from pymongo import MongoClient
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+from flask_api_crawler_arxiv.monitoring.MongoMetricsListener import (
+    mongo_event_listeners,
+)
+
+
+class _MongoClientOptions(BaseModel):
+    """
+    Pydantic BaseModel for the pool size and timeouts of the MongoClient.
+
+    Attributes:
+    - maxPoolSize (int): MONGO_MAX_POOL_SIZE, maximum number of connections per server.
+    - minPoolSize (int): MONGO_MIN_POOL_SIZE, connections kept open when idle.
+    - maxIdleTimeMS (int): MONGO_MAX_IDLE_TIME_MS, time before an idle connection is closed.
+    - connectTimeoutMS (int): MONGO_CONNECT_TIMEOUT_MS, timeout to open a connection.
+    - serverSelectionTimeoutMS (int): MONGO_SERVER_SELECTION_TIMEOUT_MS, timeout to find a server.
+    - socketTimeoutMS (int): MONGO_SOCKET_TIMEOUT_MS, timeout of a single operation, None for none.
+    """
+
+    maxPoolSize: int = Field(default=100, ge=0, alias="MONGO_MAX_POOL_SIZE")
+    minPoolSize: int = Field(default=0, ge=0, alias="MONGO_MIN_POOL_SIZE")
+    maxIdleTimeMS: Optional[int] = Field(
+        default=None, gt=0, alias="MONGO_MAX_IDLE_TIME_MS"
+    )
+    connectTimeoutMS: int = Field(default=20000, gt=0, alias="MONGO_CONNECT_TIMEOUT_MS")
+    serverSelectionTimeoutMS: int = Field(
+        default=30000, gt=0, alias="MONGO_SERVER_SELECTION_TIMEOUT_MS"
+    )
+    socketTimeoutMS: Optional[int] = Field(
+        default=None, gt=0, alias="MONGO_SOCKET_TIMEOUT_MS"
+    )
+
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
 
-from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+class _MongoReadOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the read path.
+
+    Attributes:
+    - read_preference (str): MONGO_READ_PREFERENCE, one of primary, primaryPreferred,
+      secondary, secondaryPreferred or nearest.
+    - read_concern (str): MONGO_READ_CONCERN, the read concern level (local, available, majority...).
+    """
+
+    read_preference: Literal[tuple(_READ_PREFERENCES)] = Field(
+        default="primary", alias="MONGO_READ_PREFERENCE"
+    )
+    read_concern: str = Field(default="local", min_length=1, alias="MONGO_READ_CONCERN")
+
+
+def _reset_in_child(manager_ref):
+    """
+    Fork handler dropping the client a MongoDBManager inherited from its parent process.
+
+    Args:
+        manager_ref (weakref.ref): Weak reference to the manager, so the handler does not keep it alive.
+    """
+    manager = manager_ref()
+    if manager is not None:
+        manager._reset_after_fork()
 
 
 class MongoDBManager:
     """
     MongoDBManager class for managing MongoDB connections and transactions.
-    ... (rest of the class remains unchanged)
 
+    One MongoClient, and so one connection pool, is shared by all the threads of a process.
+    It is created lazily on first use and recreated in a child process after a fork.
+    close_connection() is the shutdown hook: it closes the pool of the current process.
+
+    Reads go through perform_read(), which uses the configured read preference and read
+    concern and no session. perform_transaction() is kept for the writes that need it.
     """
 
-    def __init__(self, connection_string, database_name):
+    def __init__(self, connection_string, database_name, app_config_dict=None):
         """
         Initialize MongoDBManager with the provided connection string and database name.
 
         Args:
             connection_string (str): MongoDB connection string.
             database_name (str): Name of the MongoDB database.
+            app_config_dict (dict, optional): Configuration holding the pool size and timeouts.
         """
-        setup_logging()
         self._logging = logging.getLogger(__name__)
 
         self.connection_string = connection_string
         self.database_name = database_name
+        self.client_options = _MongoClientOptions(**(app_config_dict or {})).model_dump(
+            exclude_none=True
+        )
+
+        self.event_listeners = mongo_event_listeners(app_config_dict)
+
+        read_options = _MongoReadOptions(**(app_config_dict or {}))
+        self.read_preference = _READ_PREFERENCES[read_options.read_preference]()
+        self.read_concern = ReadConcern(read_options.read_concern)
+
         self.client = None
         self.db = None
 
+        self._lock = threading.Lock()
+        self._pid = None
+
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(
+                after_in_child=functools.partial(_reset_in_child, weakref.ref(self))
+            )
+
+    def _reset_after_fork(self):
+        """
+        Drop the client inherited from the parent process, a new one is opened on next use.
+        """
+        self._lock = threading.Lock()
+        self.client = None
+        self.db = None
+        self._pid = None
+
     def open_connection(self):
         """
-        Open the MongoDB client connection.
+        Open the MongoDB client connection of the current process if it is not already open.
         """
-        self.client = MongoClient(self.connection_string)
-        self.db = self.client[self.database_name]
-        self._logging.info("MongoDB connection opened.")
+        if self.client is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self.client is not None and self._pid == os.getpid():
+                return
+
+            # A client inherited through fork() must not be used nor closed by the child.
+            self.client = MongoClient(
+                self.connection_string,
+                event_listeners=self.event_listeners,
+                **self.client_options,
+            )
+            self.db = self.client[self.database_name]
+            self._pid = os.getpid()
+            self._logging.info("MongoDB connection opened.")
 
     def close_connection(self):
         """
         Close the MongoDB client connection.
         """
-        if self.client:
-            self.client.close()
-            self.client = None
-            self.db = None
-            self._logging.info("MongoDB connection closed.")
+        with self._lock:
+            if self.client:
+                if self._pid == os.getpid():
+                    self.client.close()
+                self.client = None
+                self.db = None
+                self._pid = None
+                self._logging.info("MongoDB connection closed.")
+
+    def perform_read(self, read_operations):
+        """
+        Perform read-only operations, outside of any session or transaction.
+
+        Args:
+            read_operations (function): Function that takes a MongoDB database object,
+                                        configured with the read preference and read concern,
+                                        and performs read operations.
+
+        Returns:
+            The result of read_operations.
+
+        Example:
+            manager = MongoDBManager("your_mongodb_connection_string", "your_database_name")
+            article = manager.perform_read(lambda db: db.collection.find_one({"field": "value"}))
+        """
+        if self.client is None:
+            self.open_connection()
+
+        read_db = self.db.with_options(
+            read_preference=self.read_preference, read_concern=self.read_concern
+        )
+        return read_operations(read_db)
 
     def perform_transaction(self, transaction_operations):
         """
@@ -58,13 +211,15 @@ class MongoDBManager:
 
         Example:
             manager = MongoDBManager("your_mongodb_connection_string", "your_database_name")
-            manager.open_connection()
             try:
                 manager.perform_transaction(lambda db: db.collection.insert_one({"field": "value"}))
                 self._logging.info("Transaction successful.")
             finally:
                 manager.close_connection()
         """
+        if self.client is None:
+            self.open_connection()
+
         with self.client.start_session() as session:
             with session.start_transaction():
                 try:
@@ -72,5 +227,5 @@ class MongoDBManager:
                     return result
                 except Exception as e:
                     session.abort_transaction()
-                    self._logging.error(f"Transaction failed: {str(e)}")
+                    self._logging.error("Transaction failed: %s", e)
                     raise e
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Set
+
+from bson import json_util
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from flask_api_crawler_arxiv.mongodb.StatsManager import (
+    RECORD_KEY_PROJECTION,
+    record_keys,
+)
+
+
+class UpsertReport(BaseModel):
+    """
+    Counts of a bulk upsert.
+
+    Attributes:
+    - inserted (int): Records that were not stored yet.
+    - updated (int): Stored records whose content changed.
+    - unchanged (int): Stored records with the same content, skipped without any write.
+    - previous_keys (dict[str, set]): Statistics keys the updated records no longer
+      have, for each dimension of STATS_DIMENSIONS. Not serialized.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    previous_keys: Dict[str, Set[str]] = Field(default_factory=dict, exclude=True)
+
+    def __add__(self, other: "UpsertReport") -> "UpsertReport":
+        previous_keys = {name: set(keys) for name, keys in self.previous_keys.items()}
+        for name, keys in other.previous_keys.items():
+            previous_keys.setdefault(name, set()).update(keys)
+        return UpsertReport(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged,
+            previous_keys=previous_keys,
+        )
+
+
+class RecordUpserter:
+    """
+    RecordUpserter class writing harvested records idempotently, keyed on their OAI identifier.
+
+    Each record is stored with a `content_hash` of its content. Records are written by
+    chunks of unordered UpdateOne(..., upsert=True) and records whose hash is already
+    stored are skipped, so re-harvesting the same records costs no write.
+    """
+
+    def __init__(self, chunk_size=500, collection_name="arxiv_data_doc"):
+        """
+        Initialize RecordUpserter.
+
+        Args:
+            chunk_size (int): Number of records per bulk_write.
+            collection_name (str): Name of the collection receiving the records.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be strictly positive")
+
+        self.chunk_size = chunk_size
+        self.collection_name = collection_name
+
+    @staticmethod
+    def content_hash(record):
+        """
+        Compute a stable hash of the content of a record.
+
+        Args:
+            record (dict): The record, without `_id` nor `content_hash`.
+
+        Returns:
+            str: Hexadecimal SHA-1 of the canonical JSON of the record.
+        """
+        canonical = json_util.dumps(record, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def _upsert_chunk(self, collection, chunk, errors=None):
+        """
+        Upsert one chunk of records.
+
+        Args:
+            collection (pymongo.collection.Collection): Target collection.
+            chunk (list[dict]): Records to write.
+            errors (list, optional): Receives (identifier, message) for each record that
+                could not be written, instead of raising BulkWriteError.
+
+        Returns:
+            UpsertReport: Counts of the chunk.
+        """
+        hashed_records = {}
+        for record in chunk:
+            identifier = record.get("identifier")
+            if identifier is None:
+                self._logging.warning("Record without identifier skipped: %s", record)
+                continue
+            hashed_records[identifier] = (record, self.content_hash(record))
+
+        # The stored keys are read with the hashes, the statistics recount the keys a
+        # changed record loses.
+        stored_records = {
+            document["identifier"]: document
+            for document in collection.find(
+                {"identifier": {"$in": list(hashed_records)}},
+                {
+                    "_id": 0,
+                    "identifier": 1,
+                    "content_hash": 1,
+                    **RECORD_KEY_PROJECTION,
+                },
+            )
+        }
+
+        changed_identifiers = [
+            identifier
+            for identifier, (_, record_hash) in hashed_records.items()
+            if stored_records.get(identifier, {}).get("content_hash") != record_hash
+        ]
+        operations = [
+            UpdateOne(
+                {"identifier": identifier},
+                {
+                    "$set": {
+                        **hashed_records[identifier][0],
+                        "content_hash": hashed_records[identifier][1],
+                    }
+                },
+                upsert=True,
+            )
+            for identifier in changed_identifiers
+        ]
+
+        report = UpsertReport(unchanged=len(hashed_records) - len(operations))
+        for identifier in changed_identifiers:
+            if identifier not in stored_records:
+                continue
+            new_keys = record_keys(hashed_records[identifier][0])
+            for name, keys in record_keys(stored_records[identifier]).items():
+                if keys - new_keys[name]:
+                    report.previous_keys.setdefault(name, set()).update(
+                        keys - new_keys[name]
+                    )
+        if operations:
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                report.inserted = result.upserted_count
+                report.updated = result.modified_count
+            except BulkWriteError as e:
+                if errors is None:
+                    raise
+                # Unordered: every operation was attempted, only the failed ones are reported.
+                report.inserted = e.details["nUpserted"]
+                report.updated = e.details["nModified"]
+                for write_error in e.details["writeErrors"]:
+                    errors.append(
+                        (
+                            changed_identifiers[write_error["index"]],
+                            write_error["errmsg"],
+                        )
+                    )
+
+        return report
+
+    def remove_duplicates(self, db, key="identifier"):
+        """
+        Delete the documents sharing an OAI identifier with an older document.
+
+        Collections filled by the former insert_many harvest hold duplicates that prevent
+        the unique index on `identifier` from being built.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            key (str): Path of the OAI identifier, `header.identifier` in the former schema.
+
+        Returns:
+            int: Number of deleted documents.
+        """
+        collection = db[self.collection_name]
+        duplicates = collection.aggregate(
+            [
+                {"$match": {key: {"$exists": True}}},
+                {"$sort": {"_id": 1}},
+                {
+                    "$group": {
+                        "_id": f"${key}",
+                        "ids": {"$push": "$_id"},
+                        "count": {"$sum": 1},
+                    }
+                },
+                {"$match": {"count": {"$gt": 1}}},
+            ],
+            allowDiskUse=True,
+        )
+
+        deleted = 0
+        for duplicate in duplicates:
+            deleted += collection.delete_many(
+                {"_id": {"$in": duplicate["ids"][1:]}}
+            ).deleted_count
+
+        self._logging.info("%s duplicated records removed", deleted)
+        return deleted
+
+    def upsert(self, db, records: Iterable[dict], errors=None):
+        """
+        Upsert records by chunks of `chunk_size`.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            records (Iterable[dict]): Records to write.
+            errors (list, optional): Receives (identifier, message) for each record that
+                could not be written. By default a failed write raises BulkWriteError.
+
+        Returns:
+            UpsertReport: Counts of the whole run.
+        """
+        collection = db[self.collection_name]
+        report = UpsertReport()
+
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            report += self._upsert_chunk(collection, chunk, errors)
+
+        self._logging.info(
+            "Upsert done: %s inserted, %s updated, %s unchanged",
+            report.inserted,
+            report.updated,
+            report.unchanged,
+        )
+        return report
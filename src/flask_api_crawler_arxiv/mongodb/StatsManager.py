@@ -0,0 +1,253 @@
+import logging
+import uuid
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+
+# Records counted by the statistics: migrated to the normalized schema and not deleted.
+COUNTED_RECORDS = {"identifier": {"$exists": True}, "deleted": {"$ne": True}}
+
+# Month of an article: its first dc:date, the submission, else its datestamp.
+_MONTH_EXPRESSION = {
+    "$dateToString": {
+        "format": "%Y-%m",
+        "date": {"$ifNull": [{"$arrayElemAt": ["$dates", 0]}, "$datestamp"]},
+    }
+}
+
+# Summary collection of each dimension, the field holding its keys when they are stored
+# as is, and the stages turning a record into its keys.
+STATS_DIMENSIONS = {
+    "subjects": {
+        "collection": "stats_by_subject",
+        "field": "subjects",
+        "stages": [
+            {"$unwind": "$subjects"},
+            {"$project": {"key": "$subjects"}},
+        ],
+    },
+    "authors": {
+        "collection": "stats_by_author",
+        "field": "creators",
+        "stages": [
+            {"$unwind": "$creators"},
+            {"$project": {"key": "$creators"}},
+        ],
+    },
+    "months": {
+        "collection": "stats_by_month",
+        "field": None,
+        "stages": [{"$project": {"key": _MONTH_EXPRESSION}}],
+    },
+}
+
+# Fields of a stored record holding its keys, see record_keys.
+RECORD_KEY_PROJECTION = {
+    "subjects": 1,
+    "creators": 1,
+    "dates": {"$slice": 1},
+    "datestamp": 1,
+}
+
+
+def record_keys(record):
+    """
+    Compute in Python the keys a record is counted under, like the stages of STATS_DIMENSIONS.
+
+    Args:
+        record (dict): Normalized record, at least with the fields of RECORD_KEY_PROJECTION.
+
+    Returns:
+        dict[str, set]: Keys of the record for each dimension.
+    """
+    dates = record.get("dates") or [record.get("datestamp")]
+    return {
+        "subjects": set(record.get("subjects") or ()),
+        "authors": set(record.get("creators") or ()),
+        "months": {dates[0].strftime("%Y-%m")} if dates[0] is not None else set(),
+    }
+
+
+# Orders of the keys of a dimension: most articles first, or by key.
+STATS_SORTS = {
+    "count": [("count", DESCENDING), ("_id", ASCENDING)],
+    "key": [("_id", ASCENDING)],
+}
+
+STATS_INDEXES = [
+    # Top keys of a dimension by number of articles.
+    IndexModel([("count", DESCENDING), ("_id", ASCENDING)], name="count_id"),
+]
+
+
+class StatsManager:
+    """
+    StatsManager class maintaining the article counts per subject, author and month.
+
+    Each dimension is materialized in its own collection, one document per key:
+        {
+            "_id": "Quantum Physics",     # subject, author, or month as "YYYY-MM"
+            "count": 1234,                # articles not deleted
+            "refresh_id": "3f2a...",      # refresh that wrote the document
+            "updated_at": datetime,
+        }
+    so that the API reads counts by key, or the top keys through an index, without
+    scanning the articles.
+    """
+
+    def __init__(self, db, chunk_size=500):
+        """
+        Initialize StatsManager with the database holding the articles.
+
+        Args:
+            db (pymongo.database.Database): MongoDB database.
+            chunk_size (int): Number of keys written per bulk_write.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def ensure_indexes(self):
+        """
+        Create the indexes of the summary collections.
+        """
+        for dimension in STATS_DIMENSIONS.values():
+            IndexManager(
+                self.db, dimension["collection"], STATS_INDEXES
+            ).ensure_indexes()
+
+    def refresh(self, since=None, previous_keys=None):
+        """
+        Recompute the counts of the keys of the articles harvested since a datestamp.
+
+        The keys of the articles whose datestamp is at least `since` are collected, then
+        only these keys are counted again over the whole collection and written to the
+        summary collections. Keys left without articles are removed. The current keys
+        of the articles miss the keys an updated or deleted article no longer has, they
+        are given by `previous_keys`, see UpsertReport. Without `since` all the keys are
+        recomputed.
+
+        Args:
+            since (datetime, optional): Lowest datestamp of the changed articles.
+                Defaults to None, recomputing everything.
+            previous_keys (dict[str, set], optional): Keys of each dimension held by the
+                changed articles before they were written.
+
+        Returns:
+            dict: Number of keys written for each dimension.
+        """
+        refresh_id = uuid.uuid4().hex
+        written = {}
+        for name, dimension in STATS_DIMENSIONS.items():
+            keys = None
+            if since is not None:
+                keys = self._changed_keys(dimension, since)
+                keys.extend(set((previous_keys or {}).get(name, ())).difference(keys))
+                if not keys:
+                    written[name] = 0
+                    continue
+
+            written[name] = self._refresh_dimension(dimension, keys, refresh_id)
+
+        self._logging.info("Statistics refreshed since %s: %s", since, written)
+        return written
+
+    def _changed_keys(self, dimension, since):
+        # Current keys only: a deleted article has none left, see previous_keys.
+        pipeline = [
+            {"$match": {"datestamp": {"$gte": since}}},
+            *dimension["stages"],
+            {"$group": {"_id": "$key"}},
+        ]
+        return [
+            document["_id"]
+            for document in self.db.arxiv_data_doc.aggregate(
+                pipeline, allowDiskUse=True
+            )
+            if document["_id"] is not None
+        ]
+
+    def _refresh_dimension(self, dimension, keys, refresh_id):
+        collection = self.db[dimension["collection"]]
+        now = datetime.utcnow()
+
+        match = dict(COUNTED_RECORDS)
+        if keys is not None and dimension["field"] is not None:
+            # Skips the articles without any of the keys before unwinding
+            match[dimension["field"]] = {"$in": keys}
+        pipeline = [{"$match": match}, *dimension["stages"]]
+        if keys is not None:
+            pipeline.append({"$match": {"key": {"$in": keys}}})
+        pipeline.append({"$group": {"_id": "$key", "count": {"$sum": 1}}})
+
+        # $merge needs MongoDB 4.2 (docker-compose runs 4.0), the counts are written
+        # back by chunks of UpdateOne.
+        written = 0
+        operations = []
+        for document in self.db.arxiv_data_doc.aggregate(pipeline, allowDiskUse=True):
+            if document["_id"] is None:
+                continue
+            operations.append(
+                UpdateOne(
+                    {"_id": document["_id"]},
+                    {
+                        "$set": {
+                            "count": document["count"],
+                            "refresh_id": refresh_id,
+                            "updated_at": now,
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+            if len(operations) == self.chunk_size:
+                collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+        # Keys not written by this refresh have no article left.
+        stale = {"refresh_id": {"$ne": refresh_id}}
+        if keys is not None:
+            stale["_id"] = {"$in": keys}
+        collection.delete_many(stale)
+
+        return written
+
+    def get(self, dimension, key):
+        """
+        Return the count of a key.
+
+        Args:
+            dimension (str): Name of the dimension, see STATS_DIMENSIONS.
+            key (str): Subject, author, or month as "YYYY-MM".
+
+        Returns:
+            dict: The summary document, or None if the key has no article.
+        """
+        return self.db[STATS_DIMENSIONS[dimension]["collection"]].find_one({"_id": key})
+
+    def top(self, dimension, limit, sort="count"):
+        """
+        Return the keys of a dimension.
+
+        Args:
+            dimension (str): Name of the dimension, see STATS_DIMENSIONS.
+            limit (int): Maximum number of keys.
+            sort (str): "count" for the keys with the most articles first, "key" for
+                the keys in ascending order. Defaults to "count".
+
+        Returns:
+            list[dict]: The summary documents.
+        """
+        return list(
+            self.db[STATS_DIMENSIONS[dimension]["collection"]]
+            .find({}, {"count": 1})
+            .sort(STATS_SORTS[sort])
+            .limit(limit)
+        )
@@ -0,0 +1,466 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters, gauges and histograms are plain dictionaries guarded by a lock, so recording a
+value costs a dictionary lookup and an addition. Each process of the application
+(gunicorn workers, the harvest cron) keeps its own values; with METRICS_DIR they are
+saved to a snapshot file of the process every METRICS_FLUSH_SECONDS by a background
+thread, and /metrics merges the snapshots of all the processes.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+# Upper bounds in seconds of the buckets of the latency histograms.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Gauges of a snapshot not saved for this many flush intervals belong to a stopped process.
+_STALE_FLUSHES = 3
+
+
+class _MetricsOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the metrics.
+
+    Attributes:
+    - enabled (bool): METRICS_ENABLED, time the requests and the MongoDB commands.
+    - directory (str): METRICS_DIR, directory of the snapshots of the processes, shared
+      by the API workers and the harvest. None keeps the metrics of each process apart.
+    - flush_interval (float): METRICS_FLUSH_SECONDS, interval between two snapshots.
+    """
+
+    enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    directory: Optional[str] = Field(default=None, alias="METRICS_DIR")
+    flush_interval: float = Field(default=5, gt=0, alias="METRICS_FLUSH_SECONDS")
+
+
+def metrics_options(app_config_dict=None):
+    """
+    Read the options of the metrics, empty values being left to their default.
+
+    Args:
+        app_config_dict (dict, optional): Configuration holding the metrics options.
+
+    Returns:
+        _MetricsOptions: The options.
+    """
+    config = app_config_dict or {}
+    return _MetricsOptions(
+        **{key: value for key, value in config.items() if value != ""}
+    )
+
+
+class _Metric:
+    """
+    Values of a metric by label values.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """
+        Returns:
+            list: Label values and value of each series, copied.
+        """
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """
+    Monotonic count, such as a number of requests.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1, labels=()):
+        """
+        Args:
+            amount (float, optional): Increment. Defaults to 1.
+            labels (tuple, optional): Label values, in the order of labelnames.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """
+    Value going up and down, such as a number of open connections.
+    """
+
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        """
+        Args:
+            value (float): New value.
+            labels (tuple, optional): Label values, in the order of labelnames.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observations, such as latencies, counted in buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        """
+        Args:
+            value (float): Observation, in seconds for a latency.
+            labels (tuple, optional): Label values, in the order of labelnames.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Counts of each bucket and of +Inf, not cumulative, then the sum.
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            return [
+                [list(labels), [list(series[0]), series[1]]]
+                for labels, series in self._values.items()
+            ]
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry class holding the metrics of a process.
+
+    Metrics are declared once, at import, by the module recording them:
+        requests = metrics_registry.counter("http_requests_total", "Requests.", ("route",))
+        requests.inc(labels=("/articles/",))
+
+    render() returns the metrics in the Prometheus text format, merged with the
+    snapshots of the other processes once configure() set METRICS_DIR.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty MetricsRegistry.
+        """
+        self._logging = logging.getLogger(__name__)
+
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.options = _MetricsOptions()
+        self.process_name = None
+        self._flusher = None
+
+    def _register(self, metric_class, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(
+                    name, documentation, labelnames, **kwargs
+                )
+            elif type(metric) is not metric_class:
+                raise ValueError(f"Metric {name} is already declared as {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Declare a counter, or return the counter already declared under this name.
+
+        Args:
+            name (str): Name of the metric, ending with _total.
+            documentation (str): Help text.
+            labelnames (tuple, optional): Names of the labels.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """
+        Declare a gauge, or return the gauge already declared under this name.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text.
+            labelnames (tuple, optional): Names of the labels.
+
+        Returns:
+            Gauge: The gauge.
+        """
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Declare a histogram, or return the histogram already declared under this name.
+
+        Args:
+            name (str): Name of the metric, ending with the unit such as _seconds.
+            documentation (str): Help text.
+            labelnames (tuple, optional): Names of the labels.
+            buckets (tuple, optional): Upper bounds of the buckets.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def configure(self, app_config_dict, process_name):
+        """
+        Read the options of the metrics and save the snapshots of this process if
+        METRICS_DIR is set.
+
+        Args:
+            app_config_dict (dict): Configuration holding the metrics options.
+            process_name (str): Name of the snapshot of the process, the snapshot of a
+                former process of the same name is resumed.
+        """
+        self.options = metrics_options(app_config_dict)
+        self.process_name = process_name
+        if self.options.directory is None or self._flusher is not None:
+            return
+
+        try:
+            os.makedirs(self.options.directory, exist_ok=True)
+            with open(self._snapshot_path(process_name), encoding="utf-8") as file:
+                self.restore(json.load(file))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self._logging.warning("Metrics snapshot not restored: %s", e)
+
+        self._flusher = threading.Thread(
+            target=self._flush_forever, name="metrics-flush", daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _snapshot_path(self, process_name):
+        return os.path.join(self.options.directory, f"{process_name}.json")
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.options.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """
+        Save the snapshot of this process to METRICS_DIR.
+        """
+        if self.options.directory is None or self.process_name is None:
+            return
+
+        path = self._snapshot_path(self.process_name)
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                json.dump(self.snapshot(), file, separators=(",", ":"))
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            self._logging.warning("Metrics snapshot not saved: %s", e)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Declaration and samples of each metric, serializable as JSON.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        snapshot = {}
+        for metric in metrics:
+            snapshot[metric.name] = {
+                "kind": metric.kind,
+                "documentation": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "samples": metric.samples(),
+            }
+            if metric.kind == "histogram":
+                snapshot[metric.name]["buckets"] = list(metric.buckets)
+        return snapshot
+
+    def restore(self, snapshot):
+        """
+        Add the counters and histograms of a snapshot to the metrics of this process.
+
+        Args:
+            snapshot (dict): Snapshot of a former process, see snapshot().
+        """
+        for name, data in snapshot.items():
+            if data["kind"] == "counter":
+                metric = self.counter(name, data["documentation"], data["labelnames"])
+                for labels, value in data["samples"]:
+                    metric.inc(value, tuple(labels))
+            elif data["kind"] == "histogram":
+                metric = self.histogram(
+                    name, data["documentation"], data["labelnames"], data["buckets"]
+                )
+                if list(metric.buckets) != data["buckets"]:
+                    continue
+                with metric._lock:
+                    for labels, (counts, total) in data["samples"]:
+                        series = metric._values.setdefault(
+                            tuple(labels), [[0] * len(counts), 0.0]
+                        )
+                        series[0] = [a + b for a, b in zip(series[0], counts)]
+                        series[1] += total
+
+    def collect(self):
+        """
+        Merge the metrics of this process with the snapshots of the other processes.
+
+        Counters and histograms are summed, gauges are kept per process under a
+        `process` label and dropped once the snapshot of their process is stale.
+
+        Returns:
+            dict: The merged snapshot.
+        """
+        snapshots = [(self.process_name or str(os.getpid()), self.snapshot(), True)]
+
+        if self.options.directory is not None:
+            stale_before = time.time() - _STALE_FLUSHES * self.options.flush_interval
+            try:
+                names = sorted(os.listdir(self.options.directory))
+            except OSError as e:
+                self._logging.warning("Metrics snapshots not read: %s", e)
+                names = []
+            for name in names:
+                if not name.endswith(".json") or name[:-5] == self.process_name:
+                    continue
+                path = os.path.join(self.options.directory, name)
+                try:
+                    fresh = os.path.getmtime(path) >= stale_before
+                    with open(path, encoding="utf-8") as file:
+                        snapshots.append((name[:-5], json.load(file), fresh))
+                except (OSError, ValueError):
+                    # Removed or being replaced, its values are read at the next scrape.
+                    continue
+
+        merged = {}
+        for process_name, snapshot, fresh in snapshots:
+            for name, data in snapshot.items():
+                target = merged.setdefault(
+                    name,
+                    {**data, "samples": {}, "labelnames": list(data["labelnames"])},
+                )
+                if data["kind"] == "gauge":
+                    if not fresh:
+                        continue
+                    if "process" not in target["labelnames"]:
+                        target["labelnames"].append("process")
+                    for labels, value in data["samples"]:
+                        target["samples"][(*labels, process_name)] = value
+                    continue
+
+                for labels, value in data["samples"]:
+                    key = tuple(labels)
+                    if data["kind"] == "counter":
+                        target["samples"][key] = target["samples"].get(key, 0) + value
+                    elif data.get("buckets") == target.get("buckets"):
+                        counts, total = target["samples"].get(
+                            key, [[0] * len(value[0]), 0.0]
+                        )
+                        target["samples"][key] = [
+                            [a + b for a, b in zip(counts, value[0])],
+                            total + value[1],
+                        ]
+        return merged
+
+    def render(self):
+        """
+        Returns:
+            str: The metrics of all the processes in the Prometheus text format.
+        """
+        lines = []
+        for name, data in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {_escape_help(data['documentation'])}")
+            lines.append(f"# TYPE {name} {data['kind']}")
+            labelnames = data["labelnames"]
+            for labels, value in sorted(data["samples"].items()):
+                if data["kind"] != "histogram":
+                    lines.append(
+                        f"{name}{_labels(labelnames, labels)} {_number(value)}"
+                    )
+                    continue
+
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip((*data["buckets"], math.inf), counts):
+                    cumulative += count
+                    bucket_labels = _labels(
+                        (*labelnames, "le"), (*labels, _number(bound))
+                    )
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(
+                    f"{name}_sum{_labels(labelnames, labels)} {_number(total)}"
+                )
+                lines.append(f"{name}_count{_labels(labelnames, labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _labels(labelnames, labels):
+    if not labelnames:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(labelnames, labels)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# Metrics of the process, declared by the modules recording them.
+metrics_registry = MetricsRegistry()
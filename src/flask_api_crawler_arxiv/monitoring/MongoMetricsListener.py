@@ -0,0 +1,207 @@
+"""MongoDB command and connection pool metrics, recorded by pymongo event listeners.
+
+The duration of each command is labelled with its query shape: the fields of its
+filter, or the stages of its pipeline, without their values. The number of shapes is
+capped so that the labels stay bounded whatever the queries.
+"""
+
+from pymongo import monitoring
+
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import (
+    metrics_options,
+    metrics_registry,
+)
+
+COMMAND_DURATION = metrics_registry.histogram(
+    "mongodb_command_duration_seconds",
+    "Duration of the MongoDB commands, by query shape.",
+    ("command", "collection", "shape"),
+)
+COMMAND_FAILURES = metrics_registry.counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that failed.",
+    ("command", "collection"),
+)
+POOL_CONNECTIONS = metrics_registry.gauge(
+    "mongodb_pool_connections",
+    "Connections open in the pool.",
+    ("address",),
+)
+POOL_CONNECTIONS_IN_USE = metrics_registry.gauge(
+    "mongodb_pool_connections_in_use",
+    "Connections of the pool checked out by an operation.",
+    ("address",),
+)
+POOL_CHECKOUT_FAILURES = metrics_registry.counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connections that could not be checked out of the pool.",
+    ("address", "reason"),
+)
+POOL_CLEARED = metrics_registry.counter(
+    "mongodb_pool_cleared_total",
+    "Times the pool was cleared after a network error or a failover.",
+    ("address",),
+)
+
+# Field holding the filter of each command.
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+# Field holding the statements of each write command, their filter is under "q".
+_STATEMENT_FIELDS = {"update": "updates", "delete": "deletes"}
+
+# Distinct (command, collection, shape) labels, further shapes are labelled "other".
+MAX_SHAPES = 200
+_shapes = set()
+
+
+def _filter_shape(query):
+    """
+    Shape of a filter: its fields, sorted, the branches of $or, $and and $nor recursively.
+
+    Args:
+        query (dict): Filter of a command.
+
+    Returns:
+        str: The shape, such as "$or(_id,datestamp|datestamp)" or "title".
+    """
+    if not isinstance(query, dict):
+        return ""
+    parts = []
+    for key in sorted(query):
+        value = query[key]
+        if key in ("$or", "$and", "$nor") and isinstance(value, list):
+            branches = sorted({_filter_shape(branch) for branch in value})
+            parts.append(f"{key}({'|'.join(branches)})")
+        else:
+            parts.append(key)
+    return ",".join(parts)
+
+
+def command_shape(command_name, command):
+    """
+    Collection and query shape of a command.
+
+    Args:
+        command_name (str): Name of the command.
+        command (dict): The command as sent to the server.
+
+    Returns:
+        tuple: The collection, empty for database commands, and the shape.
+    """
+    if command_name == "getMore":
+        return command.get("collection", ""), ""
+
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        return "", ""
+
+    if command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            operator = next(iter(stage), "")
+            if operator == "$match":
+                stages.append(f"$match({_filter_shape(stage[operator])})")
+            else:
+                stages.append(operator)
+        return collection, ",".join(stages)
+
+    if command_name in _FILTER_FIELDS:
+        return collection, _filter_shape(command.get(_FILTER_FIELDS[command_name]))
+
+    statements = command.get(_STATEMENT_FIELDS.get(command_name), [])
+    if statements:
+        return collection, _filter_shape(statements[0].get("q"))
+    return collection, ""
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Command listener recording the duration of each command and its failures.
+    """
+
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        collection, shape = command_shape(event.command_name, event.command)
+        labels = (event.command_name, collection, shape)
+        if labels not in _shapes:
+            if len(_shapes) >= MAX_SHAPES:
+                labels = (event.command_name, collection, "other")
+            else:
+                _shapes.add(labels)
+        self._started[(event.connection_id, event.request_id)] = labels
+
+    def succeeded(self, event):
+        labels = self._started.pop((event.connection_id, event.request_id), None)
+        if labels is not None:
+            COMMAND_DURATION.observe(event.duration_micros / 1e6, labels)
+
+    def failed(self, event):
+        labels = self._started.pop((event.connection_id, event.request_id), None)
+        if labels is not None:
+            COMMAND_DURATION.observe(event.duration_micros / 1e6, labels)
+            COMMAND_FAILURES.inc(labels=labels[:2])
+
+
+def _address(event):
+    host, port = event.address
+    return (f"{host}:{port}",)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener recording the open and checked out connections.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        POOL_CLEARED.inc(labels=_address(event))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.inc(labels=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.inc(-1, _address(event))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_FAILURES.inc(labels=(*_address(event), str(event.reason)))
+
+    def connection_checked_out(self, event):
+        POOL_CONNECTIONS_IN_USE.inc(labels=_address(event))
+
+    def connection_checked_in(self, event):
+        POOL_CONNECTIONS_IN_USE.inc(-1, _address(event))
+
+
+def mongo_event_listeners(app_config_dict=None):
+    """
+    Event listeners recording the metrics of a MongoClient.
+
+    Args:
+        app_config_dict (dict, optional): Configuration holding METRICS_ENABLED.
+
+    Returns:
+        list: Listeners to pass as event_listeners, empty when the metrics are disabled.
+    """
+    if not metrics_options(app_config_dict).enabled:
+        return []
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
@@ -0,0 +1,59 @@
+"""Metrics of the API requests and of the harvests, see MetricsRegistry."""
+
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import metrics_registry
+
+HTTP_REQUEST_DURATION = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request to the API, by route.",
+    ("method", "route"),
+)
+HTTP_REQUESTS = metrics_registry.counter(
+    "http_requests_total",
+    "Requests to the API, by route and status.",
+    ("method", "route", "status"),
+)
+
+HARVEST_PAGES_FETCHED = metrics_registry.counter(
+    "arxiv_harvest_pages_fetched_total",
+    "ListRecords pages fetched from arXiv.",
+)
+HARVEST_BYTES_DOWNLOADED = metrics_registry.counter(
+    "arxiv_harvest_bytes_downloaded_total",
+    "Bytes of the ListRecords pages fetched from arXiv.",
+)
+HARVEST_RECORDS_PARSED = metrics_registry.counter(
+    "arxiv_harvest_records_parsed_total",
+    "Records parsed from the fetched pages, malformed records excluded.",
+)
+HARVEST_RECORDS_WRITTEN = metrics_registry.counter(
+    "arxiv_harvest_records_written_total",
+    "Harvested records by outcome: inserted, updated or skipped as unchanged.",
+    ("outcome",),
+)
+
+
+def observe_request(method, route, status, seconds):
+    """
+    Record a request to the API.
+
+    Args:
+        method (str): HTTP method.
+        route (str): Rule of the route, such as /article/<id>, so that the labels stay
+            bounded. "unmatched" for the requests matching no route.
+        status (int): HTTP status of the response.
+        seconds (float): Time to handle the request.
+    """
+    HTTP_REQUEST_DURATION.observe(seconds, (method, route))
+    HTTP_REQUESTS.inc(labels=(method, route, str(status)))
+
+
+def count_written(report):
+    """
+    Record the records written by a page of a harvest.
+
+    Args:
+        report (UpsertReport): Report of the page.
+    """
+    HARVEST_RECORDS_WRITTEN.inc(report.inserted, ("inserted",))
+    HARVEST_RECORDS_WRITTEN.inc(report.updated, ("updated",))
+    HARVEST_RECORDS_WRITTEN.inc(report.unchanged, ("skipped",))
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from pydantic import BaseModel, Field
+from requests.adapters import HTTPAdapter
+
+from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter, UpsertReport
+from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import RecordConverterOAI
+from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordOAI
+from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.monitoring.app_metrics import (
+    HARVEST_RECORDS_PARSED,
+    count_written,
+)
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import metrics_registry
+from flask_api_crawler_arxiv.python_cron.cron_inject_data_mongodb import (
+    _ensure_indexes,
+    _harvest_pages,
+    _refresh_stats,
+    _update_search_index,
+)
+from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+
+# Queued after the last page of a set, the set is complete once it is written.
+_SET_COMPLETE = "complete"
+
+
+class _AsyncHarvestOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the multi-set harvest.
+
+    Attributes:
+    - sets (str): ARXSETS, comma-separated arXiv sets to harvest, defaults to ARXSET.
+    - request_interval (float): ARXREQUESTINTERVALSECONDS, minimum time between two requests
+      to the same host, whatever the set.
+    - max_concurrent_sets (int): ARXMAXCONCURRENTSETS, sets harvested at the same time.
+    - queue_size (int): ARXPIPELINEQUEUESIZE, pages waiting between two stages of the pipeline.
+    """
+
+    sets: Optional[str] = Field(default=None, alias="ARXSETS")
+    request_interval: float = Field(default=3, ge=0, alias="ARXREQUESTINTERVALSECONDS")
+    max_concurrent_sets: int = Field(default=4, gt=0, alias="ARXMAXCONCURRENTSETS")
+    queue_size: int = Field(default=4, gt=0, alias="ARXPIPELINEQUEUESIZE")
+
+
+class HostRateLimiter:
+    """
+    HostRateLimiter class spacing the requests sent to each host by a minimum interval.
+
+    Each caller reserves the next free slot of the host then sleeps until it, so
+    concurrent harvests share the rate allowed by the host instead of multiplying it.
+    """
+
+    def __init__(self, interval):
+        """
+        Initialize HostRateLimiter with the interval between two requests.
+
+        Args:
+            interval (float): Minimum time between two requests to the same host, in seconds.
+        """
+        self._interval = interval
+        self._next_slot = {}
+
+    async def wait(self, host):
+        """
+        Wait for the next request slot of a host.
+
+        Args:
+            host (str): Host of the request.
+        """
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self._interval
+        await asyncio.sleep(slot - now)
+
+
+async def _harvest_sets(app_config, arxsets, manager, options, logger, progress=None):
+    """
+    Harvests several arXiv sets at once through a fetch, parse and write pipeline.
+
+    Each set is fetched by its own task, requests of all the sets being spaced by a
+    global per-host rate limit and sent through one pooled HTTP session. Pages go
+    through bounded queues to a parse stage and a write stage, each running in a
+    worker thread: network waits overlap the XML parsing and the MongoDB writes. Pages
+    of a set are written in order, and the harvest state is saved after each of them
+    as in cron_inject_data_mongodb. A set failing to fetch, parse or write a page
+    does not stop the others: its next pages are dropped and its state keeps the
+    resumption point of the last page written.
+
+    Args:
+        app_config (dict): Application configuration.
+        arxsets ([str]): arXiv sets to harvest.
+        manager (MongoDBManager): Opened MongoDB manager.
+        options (_AsyncHarvestOptions): Options of the harvest.
+        logger (logging.Logger): Logger of the cron.
+        progress (function, optional): Called with the UpsertReport of each written page.
+
+    Returns:
+        tuple: Reports of the completed sets by set, and the states read before the harvest.
+    """
+    loop = asyncio.get_running_loop()
+    host = urlparse(app_config["ARXHOST"]).netloc
+    rate_limiter = HostRateLimiter(options.request_interval)
+
+    def throttle():
+        # Called from the fetch threads, the slot is reserved on the event loop.
+        asyncio.run_coroutine_threadsafe(rate_limiter.wait(host), loop).result()
+
+    arxiv_record_converter_service = RecordConverterOAI()
+    keep_raw = str(app_config.get("ARXKEEPRAW", "False")).lower() == "true"
+    record_upserter = RecordUpserter(
+        chunk_size=int(app_config.get("MONGO_BULK_CHUNK_SIZE", 500))
+    )
+    harvest_state_manager = HarvestStateManager(manager.db)
+
+    reports = {arxset: UpsertReport() for arxset in arxsets}
+    states = {}
+    completed = set()
+    # Sets whose harvest stopped on an error, their next pages are dropped.
+    failed = set()
+
+    pages = asyncio.Queue(maxsize=options.queue_size)
+    batches = asyncio.Queue(maxsize=options.queue_size)
+    semaphore = asyncio.Semaphore(options.max_concurrent_sets)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=options.max_concurrent_sets)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    fetch_executor = ThreadPoolExecutor(
+        max_workers=options.max_concurrent_sets, thread_name_prefix="harvest-fetch"
+    )
+    stage_executor = ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="harvest-stage"
+    )
+
+    def write_page(arxset, records, resumption_token):
+        page_datestamp = None
+        if records:
+            # Upserts are idempotent, a replayed chunk needs no transaction.
+            page_report = record_upserter.upsert(manager.db, records)
+            count_written(page_report)
+            reports[arxset] += page_report
+            if progress is not None:
+                progress(page_report)
+            page_datestamp = max(record["datestamp"] for record in records)
+
+        harvest_state_manager.save_progress(arxset, resumption_token, page_datestamp)
+
+    def fail(arxset, error):
+        # The state keeps the resumption point of the last page written.
+        logger.error("Harvest of %s failed: %s", arxset, error)
+        failed.add(arxset)
+
+    async def fetch(arxset):
+        async with semaphore:
+            arxiv_list_record_service = ListRecordOAI(
+                {**app_config, "ARXSET": arxset}, session=session, throttle=throttle
+            )
+            try:
+                state = await loop.run_in_executor(
+                    fetch_executor, harvest_state_manager.get_state, arxset
+                )
+                states[arxset] = state
+                set_pages = _harvest_pages(
+                    arxiv_list_record_service, state, date.today(), logger
+                )
+                while arxset not in failed:
+                    page = await loop.run_in_executor(
+                        fetch_executor, next, set_pages, None
+                    )
+                    if page is None:
+                        break
+                    await pages.put((arxset, page))
+            except Exception as e:
+                fail(arxset, e)
+                return
+
+            await pages.put((arxset, _SET_COMPLETE))
+
+    async def fetch_all():
+        await asyncio.gather(*(fetch(arxset) for arxset in arxsets))
+        await pages.put(None)
+
+    async def parse():
+        while True:
+            item = await pages.get()
+            if item is None or item[1] == _SET_COMPLETE:
+                await batches.put(item)
+                if item is None:
+                    return
+                continue
+
+            arxset, page = item
+            if arxset in failed:
+                continue
+            try:
+                records = await loop.run_in_executor(
+                    stage_executor,
+                    lambda: list(
+                        arxiv_record_converter_service.iter_normalized_records(
+                            page.xml, keep_raw=keep_raw
+                        )
+                    ),
+                )
+            except Exception as e:
+                fail(arxset, e)
+                continue
+            HARVEST_RECORDS_PARSED.inc(len(records))
+            await batches.put((arxset, records, page.resumption_token))
+
+    async def write():
+        while True:
+            item = await batches.get()
+            if item is None:
+                return
+
+            arxset = item[0]
+            if arxset in failed:
+                continue
+
+            if item[1] == _SET_COMPLETE:
+                try:
+                    await loop.run_in_executor(
+                        stage_executor, harvest_state_manager.complete, arxset
+                    )
+                except Exception as e:
+                    fail(arxset, e)
+                    continue
+                completed.add(arxset)
+                logger.info(
+                    "Harvest of %s done: %s inserted, %s updated, %s unchanged",
+                    arxset,
+                    reports[arxset].inserted,
+                    reports[arxset].updated,
+                    reports[arxset].unchanged,
+                )
+                continue
+
+            try:
+                await loop.run_in_executor(stage_executor, write_page, *item)
+            except Exception as e:
+                fail(arxset, e)
+
+    tasks = [
+        asyncio.ensure_future(fetch_all()),
+        asyncio.ensure_future(parse()),
+        asyncio.ensure_future(write()),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Threads blocked on the rate limiter are released when the loop cancels its tasks.
+        fetch_executor.shutdown(wait=False)
+        stage_executor.shutdown(wait=False)
+        session.close()
+
+    return {
+        arxset: reports[arxset] for arxset in arxsets if arxset in completed
+    }, states
+
+
+def cron_harvest_sets_async(app_config, arxsets=None, progress=None):
+    """
+    Harvests several arXiv sets at once and upserts their records into MongoDB.
+
+    Each set is harvested as by cron_inject_data_mongodb, from its own watermark and
+    resumption point, but the sets are fetched concurrently. See _harvest_sets.
+
+    Args:
+        app_config (dict): Application configuration.
+        arxsets ([str], optional): arXiv sets to harvest. Defaults to ARXSETS, or ARXSET.
+        progress (function, optional): Called with the UpsertReport of each written page.
+
+    Returns:
+        dict: UpsertReport of each set harvested to completion.
+    """
+
+    setup_logging(app_config)
+    logger = logging.getLogger(__name__)
+
+    options = _AsyncHarvestOptions(**app_config)
+    if arxsets is None:
+        arxsets = (options.sets or app_config["ARXSET"]).split(",")
+    arxsets = list(
+        dict.fromkeys(arxset.strip() for arxset in arxsets if arxset.strip())
+    )
+
+    # Connection string is a tad different than usual simply because the name of the service mongodb is mongodb so no localhost here
+    manager = MongoDBManager(
+        f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
+        f'{app_config["MONGO_INITDB_DATABASE"]}',
+        app_config,
+    )
+
+    logger.info("Attempting OPEN MongoDB connection")
+    manager.open_connection()
+    logger.info("MongoDB OPEN connection successful")
+
+    try:
+        _ensure_indexes(manager, RecordUpserter(), logger)
+
+        logger.info("Retrieving new data from arXiv for %s", ", ".join(arxsets))
+        reports, states = asyncio.run(
+            _harvest_sets(app_config, arxsets, manager, options, logger, progress)
+        )
+
+        # Only the window of this harvest is fed to the statistics and the index
+        watermarks = [
+            (states.get(arxset) or {}).get("last_datestamp") for arxset in reports
+        ]
+        since = None if None in watermarks else min(watermarks, default=None)
+
+        if any(report.inserted or report.updated for report in reports.values()):
+            previous_keys = sum(reports.values(), UpsertReport()).previous_keys
+            _refresh_stats(manager, since, logger, previous_keys)
+            HarvestStateManager(manager.db).bump_generation()
+
+        if reports:
+            _update_search_index(app_config, manager, since, logger)
+
+    finally:
+        logger.info("Attempting CLOSED MongoDB connection")
+        manager.close_connection()
+        logger.info("MongoDB CLOSED connection successful")
+
+    return reports
+
+
+if __name__ == "__main__":
+    # Counters of the harvests, read by /metrics through METRICS_DIR.
+    metrics_registry.configure(app_config, "harvest")
+    cron_harvest_sets_async(app_config)
@@ -1,60 +1,217 @@
 import logging
+import re
 from datetime import date
 
+from pymongo.errors import OperationFailure, PyMongoError
+
 from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
-from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import RecordConverterOAI
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+from flask_api_crawler_arxiv.mongodb.StatsManager import StatsManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter
 from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordOAI
 from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.monitoring.app_metrics import count_written
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import metrics_registry
+from flask_api_crawler_arxiv.python_cron.harvest_pipeline import run_harvest_pipeline
+from flask_api_crawler_arxiv.search.InvertedIndex import update_search_index
 from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
 
+# OAI-PMH error returned for an expired or unknown resumption token.
+_BAD_RESUMPTION_TOKEN_REGEX = re.compile(r"code=[\"']badResumptionToken[\"']")
+
+
+def _harvest_pages(arxiv_list_record_service, state, until_date, logger):
+    """
+    Yields the pages of the delta to harvest, resuming from the saved state when possible.
+
+    Args:
+        arxiv_list_record_service (ListRecordOAI): Service fetching the pages.
+        state (dict): Harvest state of the set, None if the set was never harvested.
+        until_date (date): Upper bound of the harvest window.
+        logger (logging.Logger): Logger of the cron.
+    """
+    from_date = None
+    if state is not None and state.get("last_datestamp") is not None:
+        from_date = state["last_datestamp"].date()
+
+    resumption_token = state.get("resumption_token") if state is not None else None
+    if resumption_token is not None:
+        logger.info("Resuming interrupted harvest from token %s", resumption_token)
+        pages = arxiv_list_record_service.harvest(resumption_token=resumption_token)
+        try:
+            # Only the first request tells whether the token is still accepted, a later
+            # failure is raised and the token of the last written page is kept.
+            first_page = next(pages)
+            if _BAD_RESUMPTION_TOKEN_REGEX.search(first_page.xml):
+                raise RuntimeError("badResumptionToken")
+        except RuntimeError as e:
+            # Tokens expire on the arXiv side, restart the window from the watermark.
+            logger.warning("Unable to resume harvest, restarting window: %s", e)
+        else:
+            yield first_page
+            yield from pages
+            return
+
+    logger.info("Harvesting window from %s until %s", from_date, until_date)
+    yield from arxiv_list_record_service.harvest(
+        from_date=from_date, until_date=until_date
+    )
+
+
+def _ensure_indexes(manager, record_upserter, logger):
+    """
+    Creates the indexes of the harvested records, removing the duplicates left by former harvests if needed.
+
+    Args:
+        manager (MongoDBManager): Opened MongoDB manager.
+        record_upserter (RecordUpserter): Upserter removing the duplicated records.
+        logger (logging.Logger): Logger of the cron.
+    """
+    index_manager = IndexManager(manager.db)
+    try:
+        index_manager.ensure_indexes()
+    except OperationFailure as e:
+        # 11000: duplicated identifiers left by former insert_many harvests.
+        if e.code != 11000:
+            raise
+        logger.warning("Duplicated records found, removing them: %s", e)
+        record_upserter.remove_duplicates(manager.db)
+        index_manager.ensure_indexes()
+    StatsManager(manager.db).ensure_indexes()
+
+
+def _update_search_index(app_config, manager, since, logger):
+    """
+    Feeds the records harvested since the given datestamp to the search index, if one is configured.
+
+    Args:
+        app_config (dict): Application configuration.
+        manager (MongoDBManager): Opened MongoDB manager.
+        since (datetime): Lower bound of the harvest window, None for all the records.
+        logger (logging.Logger): Logger of the cron.
+    """
+    if not app_config.get("SEARCH_INDEX_PATH"):
+        return
+
+    try:
+        update_search_index(manager.db, app_config["SEARCH_INDEX_PATH"], since)
+    except (OSError, ValueError) as e:
+        logger.warning("Search index update failed: %s", e)
 
-def cron_inject_data_mongodb(app_config, arxset=None):
+
+def _refresh_stats(manager, since, logger, previous_keys=None):
     """
-    Retrieves data from the ArXiv API, converts it, and inserts it into MongoDB.
+    Recomputes the statistics of the keys of the records harvested since the given datestamp.
+
+    Args:
+        manager (MongoDBManager): Opened MongoDB manager.
+        since (datetime): Lower bound of the harvest window, None for all the records.
+        logger (logging.Logger): Logger of the cron.
+        previous_keys (dict, optional): Keys the written records no longer have, see UpsertReport.
+    """
+    try:
+        StatsManager(manager.db).refresh(since, previous_keys)
+    except PyMongoError as e:
+        logger.warning("Statistics refresh failed: %s", e)
+
+
+def cron_inject_data_mongodb(app_config, arxset=None, progress=None):
+    """
+    Retrieves data from the ArXiv API, converts it, and upserts it into MongoDB.
+
+    Only the delta since the last successful harvest of the set is fetched: the greatest
+    datestamp written and the resumption point are persisted in the harvest state
+    collection after each page. Pages are fetched, parsed and written by the stages of
+    run_harvest_pipeline, so only a few pages are held in memory at once. Records are upserted on their OAI identifier, so
+    harvesting the same records twice does not duplicate them.
 
     Args:
         app_config (dict): Application configuration.
         arxset (str, optional): ARXSET parameter. Defaults to None.
+        progress (function, optional): Called with the UpsertReport of each written page.
+
+    Returns:
+        UpsertReport: Inserted, updated and unchanged counts of the run.
     """
 
-    setup_logging()
+    setup_logging(app_config)
     logger = logging.getLogger(__name__)
 
-    # Change ARXSET dynamically
+    # Change ARXSET dynamically, the shared configuration is left untouched for concurrent harvests
     if arxset is not None:
-        app_config["ARXSET"] = arxset
+        app_config = {**app_config, "ARXSET": arxset}
 
     logger.info("### Creating SERVICES ###")
     arxiv_list_record_service = ListRecordOAI(app_config)
-    arxiv_record_converter_service = RecordConverterOAI()
-
-    logger.info("Retrieving all data from arXiv")
-    xml_string_of_today_from_arxiv = arxiv_list_record_service.get_record(date.today())
-
-    logger.info("Converting XML string into dictionary")
-    dict_of_today_from_arxiv = arxiv_record_converter_service.get_listrecord_dict(
-        xml_string_of_today_from_arxiv
+    keep_raw = str(app_config.get("ARXKEEPRAW", "False")).lower() == "true"
+    record_upserter = RecordUpserter(
+        chunk_size=int(app_config.get("MONGO_BULK_CHUNK_SIZE", 500))
     )
 
     # Connection string is a tad different than usual simply because the name of the service mongodb is mongodb so no localhost here
     manager = MongoDBManager(
         f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
         f'{app_config["MONGO_INITDB_DATABASE"]}',
+        app_config,
     )
 
     logger.info("Attempting OPEN MongoDB connection")
     manager.open_connection()
     logger.info("MongoDB OPEN connection successful")
 
-    manager.perform_transaction(
-        lambda db: db.arxiv_data_doc.insert_many(dict_of_today_from_arxiv)
-    )
-    logger.info("MongoDB TRANSACTION successful")
+    _ensure_indexes(manager, record_upserter, logger)
+
+    harvest_state_manager = HarvestStateManager(manager.db)
+    current_set = app_config["ARXSET"]
+    state = harvest_state_manager.get_state(current_set)
+
+    def write_records(records):
+        # Upserts are idempotent, a replayed chunk needs no transaction.
+        page_report = record_upserter.upsert(manager.db, records)
+        count_written(page_report)
+        if progress is not None:
+            progress(page_report)
+        return page_report
+
+    try:
+        logger.info("Retrieving new data from arXiv")
+        report = run_harvest_pipeline(
+            _harvest_pages(arxiv_list_record_service, state, date.today(), logger),
+            write_records,
+            lambda resumption_token, last_datestamp: harvest_state_manager.save_progress(
+                current_set, resumption_token, last_datestamp
+            ),
+            app_config,
+            keep_raw,
+            logger,
+        )
+
+        harvest_state_manager.complete(current_set)
+        # Only the window of this harvest is fed to the statistics and the index
+        since = state.get("last_datestamp") if state is not None else None
+        if report.inserted or report.updated:
+            _refresh_stats(manager, since, logger, report.previous_keys)
+            harvest_state_manager.bump_generation()
+        logger.info(
+            "Harvest of %s done: %s inserted, %s updated, %s unchanged",
+            current_set,
+            report.inserted,
+            report.updated,
+            report.unchanged,
+        )
+
+        _update_search_index(app_config, manager, since, logger)
+
+    finally:
+        logger.info("Attempting CLOSED MongoDB connection")
+        manager.close_connection()
+        logger.info("MongoDB CLOSED connection successful")
 
-    logger.info("Attempting CLOSED MongoDB connection")
-    manager.close_connection()
-    logger.info("MongoDB CLOSED connection successful")
+    return report
 
 
 if __name__ == "__main__":
+    # Counters of the harvests, read by /metrics through METRICS_DIR.
+    metrics_registry.configure(app_config, "harvest")
     cron_inject_data_mongodb(app_config)
@@ -0,0 +1,285 @@
+"""Staged fetch, parse and write pipeline of a harvest.
+
+Each stage runs in its own worker threads and is connected to the next one by a bounded
+queue: a stage that falls behind blocks the previous one, so no more than a few pages are
+held in memory whatever the size of the harvest. XML parsing runs in a process pool.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import BaseModel, Field
+
+from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import RecordConverterOAI
+from flask_api_crawler_arxiv.monitoring.app_metrics import HARVEST_RECORDS_PARSED
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import UpsertReport
+from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+
+# Time between two checks of the failure of another stage while blocked on a queue.
+_POLL_SECONDS = 0.1
+
+# Converter of the parse processes, built once per process.
+_record_converter = None
+
+
+class _HarvestPipelineOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the harvest pipeline.
+
+    Attributes:
+    - parse_workers (int): ARXPARSEWORKERS, processes parsing the pages, 0 parses in a thread.
+    - write_workers (int): ARXWRITEWORKERS, threads writing the records to MongoDB.
+    - queue_size (int): ARXPIPELINEQUEUESIZE, pages waiting between two stages.
+    """
+
+    parse_workers: int = Field(default=2, ge=0, alias="ARXPARSEWORKERS")
+    write_workers: int = Field(default=1, gt=0, alias="ARXWRITEWORKERS")
+    queue_size: int = Field(default=4, gt=0, alias="ARXPIPELINEQUEUESIZE")
+
+
+def _parse_page(xml, keep_raw):
+    """
+    Parses a page into normalized records, in a process of the parse pool.
+
+    Args:
+        xml (str): Raw XML of the page.
+        keep_raw (bool): Keep the compressed original records.
+
+    Returns:
+        [dict]: The normalized records of the page.
+    """
+    global _record_converter
+    if _record_converter is None:
+        setup_logging()
+        _record_converter = RecordConverterOAI()
+    return list(_record_converter.iter_normalized_records(xml, keep_raw=keep_raw))
+
+
+class _StageStats:
+    """
+    Counts the pages and records handled by a stage and the time its workers spent on them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.pages = 0
+        self.records = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, records, busy_seconds):
+        with self._lock:
+            self.pages += 1
+            self.records += records
+            self.busy_seconds += busy_seconds
+
+    def log(self, logger, elapsed_seconds):
+        logger.info(
+            "Stage %s: %s pages, %s records, %.1fs busy, %.1f records/s over %.1fs",
+            self.name,
+            self.pages,
+            self.records,
+            self.busy_seconds,
+            self.records / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+            elapsed_seconds,
+        )
+
+
+class _ProgressTracker:
+    """
+    Saves the progress of the written pages in the order they were fetched.
+
+    Pages may be written out of order by concurrent writers, the resumption point of a
+    page is only saved once all the pages before it are written.
+    """
+
+    def __init__(self, save_progress):
+        self._save_progress = save_progress
+        self._next_sequence = 0
+        self._written = {}
+        self._lock = threading.Lock()
+
+    def written(self, sequence, resumption_token, last_datestamp):
+        with self._lock:
+            self._written[sequence] = (resumption_token, last_datestamp)
+            while self._next_sequence in self._written:
+                self._save_progress(*self._written.pop(self._next_sequence))
+                self._next_sequence += 1
+
+
+class _Pipeline:
+    """
+    Worker threads and queues of one run of run_harvest_pipeline.
+    """
+
+    def __init__(self, options, logger):
+        self.options = options
+        self.logger = logger
+        self.fetched = queue.Queue(maxsize=options.queue_size)
+        self.parsed = queue.Queue(maxsize=options.queue_size)
+        self.failed = threading.Event()
+        self.errors = []
+
+    def put(self, stage_queue, item):
+        # Blocks while the next stage is behind, gives up when another stage failed.
+        while not self.failed.is_set():
+            try:
+                stage_queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, stage_queue):
+        while not self.failed.is_set():
+            try:
+                return stage_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def run_stage(self, name, target, workers):
+        def work():
+            try:
+                target()
+            except Exception as e:
+                self.logger.error("Stage %s failed: %s", name, e)
+                self.errors.append(e)
+                self.failed.set()
+
+        threads = [
+            threading.Thread(target=work, name=f"harvest-{name}-{number}", daemon=True)
+            for number in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+
+def run_harvest_pipeline(
+    pages, write_records, save_progress, app_config, keep_raw, logger=None
+):
+    """
+    Fetches, parses and writes the pages of a harvest through bounded queues.
+
+    The pages are fetched by one thread, as each request needs the token of the previous
+    page, parsed by ARXPARSEWORKERS processes and written by ARXWRITEWORKERS threads.
+    The progress of the pages is saved in order once they are written. The throughput of
+    each stage is logged at the end of the run.
+
+    Args:
+        pages (Iterator[ListRecordPage]): Pages of the harvest, fetched lazily.
+        write_records (function): Writes the records of a page, returns an UpsertReport.
+        save_progress (function): Called with the resumption token and the greatest
+            datestamp of each written page, in the order of the pages.
+        app_config (dict): Application configuration holding the pipeline options.
+        keep_raw (bool): Keep the compressed original records.
+        logger (logging.Logger, optional): Logger of the cron.
+
+    Returns:
+        UpsertReport: Inserted, updated and unchanged counts of the run.
+
+    Raises:
+        Exception: The first error raised by a stage, once all the stages are stopped.
+    """
+    logger = logger or logging.getLogger(__name__)
+    options = _HarvestPipelineOptions(**app_config)
+    pipeline = _Pipeline(options, logger)
+    progress = _ProgressTracker(save_progress)
+
+    stats = {name: _StageStats(name) for name in ("fetch", "parse", "write")}
+    report = UpsertReport()
+    report_lock = threading.Lock()
+
+    parse_pool = None
+    if options.parse_workers > 0:
+        # Spawned processes do not inherit the threads and MongoDB sockets of the caller.
+        parse_pool = ProcessPoolExecutor(
+            max_workers=options.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def fetch():
+        sequence = 0
+        try:
+            while not pipeline.failed.is_set():
+                started = time.perf_counter()
+                page = next(pages, None)
+                if page is None:
+                    break
+                stats["fetch"].add(0, time.perf_counter() - started)
+                if not pipeline.put(pipeline.fetched, (sequence, page)):
+                    return
+                sequence += 1
+        finally:
+            for _ in range(max(options.parse_workers, 1)):
+                pipeline.put(pipeline.fetched, None)
+
+    def parse():
+        while True:
+            item = pipeline.get(pipeline.fetched)
+            if item is None:
+                return
+
+            sequence, page = item
+            started = time.perf_counter()
+            if parse_pool is not None:
+                records = parse_pool.submit(_parse_page, page.xml, keep_raw).result()
+            else:
+                records = _parse_page(page.xml, keep_raw)
+            stats["parse"].add(len(records), time.perf_counter() - started)
+            HARVEST_RECORDS_PARSED.inc(len(records))
+
+            if not pipeline.put(
+                pipeline.parsed, (sequence, page.resumption_token, records)
+            ):
+                return
+
+    def write():
+        nonlocal report
+        while True:
+            item = pipeline.get(pipeline.parsed)
+            if item is None:
+                return
+
+            sequence, resumption_token, records = item
+            started = time.perf_counter()
+            last_datestamp = None
+            if records:
+                page_report = write_records(records)
+                with report_lock:
+                    report += page_report
+                last_datestamp = max(record["datestamp"] for record in records)
+            progress.written(sequence, resumption_token, last_datestamp)
+            stats["write"].add(len(records), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        fetch_threads = pipeline.run_stage("fetch", fetch, 1)
+        parse_threads = pipeline.run_stage(
+            "parse", parse, max(options.parse_workers, 1)
+        )
+        write_threads = pipeline.run_stage("write", write, options.write_workers)
+
+        for thread in fetch_threads + parse_threads:
+            thread.join()
+        for _ in write_threads:
+            pipeline.put(pipeline.parsed, None)
+        for thread in write_threads:
+            thread.join()
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - started
+    for stage_stats in stats.values():
+        stage_stats.log(logger, elapsed)
+
+    if pipeline.errors:
+        raise pipeline.errors[0]
+
+    return report
@@ -0,0 +1,176 @@
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from werkzeug.datastructures import MultiDict
+
+from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
+from flask_api_crawler_arxiv.mongodb.HarvestJobManager import HarvestJobManager
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter
+from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.python_cron.cron_inject_data_mongodb import (
+    _ensure_indexes,
+)
+from flask_api_crawler_arxiv.utils.articles_page import (
+    ARTICLES_PER_PAGE,
+    keys_query,
+    parse_articles_args,
+)
+from flask_api_crawler_arxiv.utils.keyset_cursor import encode_cursor
+from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+
+# Articles read by a page of GET /articles/, one more tells whether there is a next page.
+PAGE_LIMIT = ARTICLES_PER_PAGE + 1
+
+# Shapes that cannot use an index: title= and description= are unanchored,
+# case-insensitive regexes, q= is the indexed alternative.
+EXPECTED_SCANS = ("title", "description")
+
+
+def articles_query_shapes():
+    """
+    Build the query shapes run by the API on arxiv_data_doc, with sample values.
+
+    The listings are built by keys_query from the query parameters, as the API does.
+
+    Returns:
+        dict: Filter, projection and sort order of each shape, by name.
+    """
+    cursor = encode_cursor({"_id": ObjectId(), "datestamp": datetime(2024, 1, 1)})
+    dates = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+    identifier = "oai:arXiv.org:0704.0001"
+
+    listings = {
+        "list": {},
+        "list_after_cursor": {"cursor": cursor},
+        "date_range": dates,
+        "date_range_after_cursor": {**dates, "cursor": cursor},
+        "title": {"title": "neural"},
+        "description": {"description": "neural"},
+        "text_search": {"q": "neural network"},
+    }
+    shapes = {}
+    for name, args in listings.items():
+        query = keys_query(parse_articles_args(MultiDict(args)))
+        shapes[name] = (query["filter"], query["projection"], query["sort"])
+
+    shapes["by_identifier"] = ({"identifier": identifier}, None, None)
+    shapes["batch"] = (
+        {
+            "$or": [
+                {"_id": {"$in": [ObjectId()]}},
+                {"identifier": {"$in": [identifier]}},
+            ]
+        },
+        None,
+        None,
+    )
+    return shapes
+
+
+def explain_articles_queries(db, limit=PAGE_LIMIT):
+    """
+    Explain the query shapes of the API and flag those scanning the whole collection.
+
+    Args:
+        db (pymongo.database.Database): MongoDB database.
+        limit (int, optional): Documents read by each query. Defaults to PAGE_LIMIT.
+
+    Returns:
+        dict: Summary of the winning plan of each shape, see IndexManager.explain, and
+            whether a scan of the shape is expected (`expected_scan`).
+    """
+    index_manager = IndexManager(db)
+    return {
+        name: {
+            **index_manager.explain(query, sort, projection, limit=limit),
+            "expected_scan": name in EXPECTED_SCANS,
+        }
+        for name, (query, projection, sort) in articles_query_shapes().items()
+    }
+
+
+def unexpected_scans(plans):
+    """
+    List the shapes scanning the whole collection although an index could serve them.
+
+    Args:
+        plans (dict): Plans returned by explain_articles_queries.
+
+    Returns:
+        list[str]: Names of the shapes.
+    """
+    return [
+        name
+        for name, plan in plans.items()
+        if plan["collscan"] and not plan["expected_scan"]
+    ]
+
+
+def manage_indexes(app_config, command, limit=PAGE_LIMIT):
+    """
+    Creates the declared indexes, or explains the queries of the API against them.
+
+    Args:
+        app_config (dict): Application configuration.
+        command (str): "ensure" to create the indexes of arxiv_data_doc and harvest_jobs,
+            duplicated records being removed if needed, or "explain" to print the plans
+            of the API queries.
+        limit (int, optional): Documents read by each explained query.
+
+    Returns:
+        int: Exit status, 1 when an explained query scans the whole collection although
+            an index could serve it.
+    """
+
+    setup_logging(app_config)
+    logger = logging.getLogger(__name__)
+
+    # Connection string is a tad different than usual simply because the name of the service mongodb is mongodb so no localhost here
+    manager = MongoDBManager(
+        f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
+        f'{app_config["MONGO_INITDB_DATABASE"]}',
+        app_config,
+    )
+    manager.open_connection()
+
+    try:
+        if command == "ensure":
+            _ensure_indexes(manager, RecordUpserter(), logger)
+            HarvestJobManager(manager.db).ensure_indexes()
+            return 0
+
+        missing = IndexManager(manager.db).missing_indexes()
+        if missing:
+            logger.warning("Missing indexes on arxiv_data_doc: %s", ", ".join(missing))
+
+        plans = explain_articles_queries(manager.db, limit)
+        scans = unexpected_scans(plans)
+        for name, plan in plans.items():
+            if name in scans:
+                logger.warning("Query %s scans the whole collection: %s", name, plan)
+            elif plan["collscan"]:
+                logger.info("Query %s scans the whole collection, as expected", name)
+            else:
+                logger.info("Query %s uses %s", name, ", ".join(plan["indexes"]))
+
+        print(json.dumps({"missing_indexes": missing, "plans": plans}, indent=2))
+        return 1 if scans else 0
+
+    finally:
+        manager.close_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the indexes of the database or explain the API queries."
+    )
+    parser.add_argument("command", choices=["ensure", "explain"])
+    parser.add_argument("--limit", type=int, default=PAGE_LIMIT)
+    arguments = parser.parse_args()
+
+    sys.exit(manage_indexes(app_config, arguments.command, limit=arguments.limit))
@@ -0,0 +1,145 @@
+import argparse
+import logging
+
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter
+from flask_api_crawler_arxiv.mongodb.StatsManager import StatsManager
+from flask_api_crawler_arxiv.arxiv_services.RecordConverterOAI import RecordConverterOAI
+from flask_api_crawler_arxiv.app_config_dict import app_config
+from flask_api_crawler_arxiv.utils.setup_logging import setup_logging
+
+# Documents still stored in the xmltodict shape of the former schema.
+LEGACY_QUERY = {"identifier": {"$exists": False}, "header": {"$exists": True}}
+
+
+def migrate_normalized_schema(app_config, batch_size=500):
+    """
+    Converts the documents of arxiv_data_doc stored in the former xmltodict shape into the normalized schema.
+
+    Documents are read and replaced by batches, keeping their _id. Duplicated identifiers
+    are removed first, the oldest document being kept, and the indexes of the former
+    schema are dropped. Documents that cannot be converted are deleted, as are those
+    whose record was harvested again in the new schema. The migration can be
+    interrupted and run again.
+
+    Args:
+        app_config (dict): Application configuration.
+        batch_size (int, optional): Number of documents per batch. Defaults to 500.
+
+    Returns:
+        int: Number of migrated documents.
+    """
+
+    setup_logging(app_config)
+    logger = logging.getLogger(__name__)
+
+    keep_raw = str(app_config.get("ARXKEEPRAW", "False")).lower() == "true"
+    record_converter = RecordConverterOAI()
+    record_upserter = RecordUpserter()
+
+    # Connection string is a tad different than usual simply because the name of the service mongodb is mongodb so no localhost here
+    manager = MongoDBManager(
+        f'mongodb://{app_config["MONGO_INITDB_ROOT_USERNAME"]}:{app_config["MONGO_INITDB_ROOT_PASSWORD"]}@{app_config["MONGO_CONTAINER_NAME"]}:{app_config["MONGO_DOCKER_PORT"]}',
+        f'{app_config["MONGO_INITDB_DATABASE"]}',
+        app_config,
+    )
+    manager.open_connection()
+    collection = manager.db.arxiv_data_doc
+
+    migrated = 0
+    try:
+        record_upserter.remove_duplicates(manager.db, key="header.identifier")
+        # Drops the index of the former schema, which rejects normalized documents,
+        # and creates identifier_unique, which reports the records harvested again.
+        IndexManager(manager.db).ensure_indexes()
+
+        last_id = None
+        while True:
+            query = dict(LEGACY_QUERY)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = list(collection.find(query).sort("_id", 1).limit(batch_size))
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+
+            operations = []
+            # (_id, identifier) of the document replaced by each operation.
+            replaced = []
+            for document in batch:
+                document_id = document.pop("_id")
+                document.pop("content_hash", None)
+
+                record = record_converter.normalize_record(document, keep_raw)
+                if record is None or record["identifier"] is None:
+                    logger.warning("Unconvertible document %s deleted", document_id)
+                    operations.append(DeleteOne({"_id": document_id}))
+                    replaced.append((document_id, None))
+                    continue
+
+                record["content_hash"] = record_upserter.content_hash(record)
+                operations.append(ReplaceOne({"_id": document_id}, record))
+                replaced.append((document_id, record["identifier"]))
+
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                migrated += result.modified_count
+            except BulkWriteError as e:
+                migrated += e.details["nModified"]
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                # 11000: the record may have been harvested again in the new schema
+                # meanwhile, the legacy document is only deleted if it was.
+                conflicts = dict(
+                    replaced[error["index"]] for error in e.details["writeErrors"]
+                )
+                harvested = {
+                    document["identifier"]
+                    for document in collection.find(
+                        {
+                            "identifier": {"$in": list(conflicts.values())},
+                            "_id": {"$nin": list(conflicts)},
+                        },
+                        {"identifier": 1},
+                    )
+                }
+                duplicates = [
+                    document_id
+                    for document_id, identifier in conflicts.items()
+                    if identifier in harvested
+                ]
+                if duplicates:
+                    collection.delete_many({"_id": {"$in": duplicates}})
+                    logger.info(
+                        "%s documents already migrated deleted", len(duplicates)
+                    )
+                if len(duplicates) != len(conflicts):
+                    logger.warning(
+                        "%s documents not migrated, kept in the former schema",
+                        len(conflicts) - len(duplicates),
+                    )
+
+            logger.info("%s documents migrated", migrated)
+
+        StatsManager(manager.db).refresh()
+        HarvestStateManager(manager.db).bump_generation()
+
+    finally:
+        manager.close_connection()
+
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert arxiv_data_doc to the normalized schema."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    arguments = parser.parse_args()
+
+    migrate_normalized_schema(app_config, batch_size=arguments.batch_size)
@@ -0,0 +1,556 @@
+import heapq
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from bson.objectid import ObjectId
+
+# File layout, every section starts on an 8 bytes boundary:
+#   header        : magic, doc_count, term_count, total_length, then the offset of each section
+#   ids           : doc_count * 12 bytes, the ObjectId of each document
+#   doc_lengths   : doc_count * uint32, number of tokens of each document
+#   term_offsets  : (term_count + 1) * uint64, offsets of each term in the terms section
+#   post_offsets  : (term_count + 1) * uint64, offsets of each term in the postings section
+#   terms         : utf-8 terms, sorted by their bytes
+#   postings      : per term, its document numbers (uint32[df]) then its term frequencies (uint32[df])
+_MAGIC = b"AXIDX001"
+_HEADER = struct.Struct("<8s9Q")
+_ID_SIZE = 12
+
+_TOKEN_REGEX = re.compile(r"\w+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to we "
+    "was were which with".split()
+)
+
+# Fields of the normalized records fed to the index.
+INDEXED_FIELDS = ("title", "descriptions", "creators", "subjects")
+
+# Number of indexed _id checked per query when removing the deleted articles.
+PRUNE_BATCH_SIZE = 10000
+
+
+def tokenize(text):
+    """
+    Split a text into lowercase index terms, dropping stop words and single characters.
+
+    Args:
+        text (str): Text to split.
+
+    Returns:
+        list[str]: Terms of the text.
+    """
+    return [
+        token
+        for token in _TOKEN_REGEX.findall(text.lower())
+        if len(token) > 1 and token not in _STOP_WORDS
+    ]
+
+
+def document_terms(document):
+    """
+    Extract the terms of the title, abstract, creators and subjects of an article.
+
+    Args:
+        document (dict): Article as stored in arxiv_data_doc.
+
+    Returns:
+        list[str]: Terms of the article, empty for deleted records.
+    """
+    texts = []
+    for field in INDEXED_FIELDS:
+        value = document.get(field)
+        if isinstance(value, str):
+            texts.append(value)
+        elif value:
+            texts.extend(value)
+
+    return [term for text in texts for term in tokenize(text)]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class _Segment:
+    """
+    Read-only, memory-mapped index file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as index_file:
+            self._mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            self.doc_count,
+            self.term_count,
+            self.total_length,
+            ids_offset,
+            lengths_offset,
+            term_offsets_offset,
+            post_offsets_offset,
+            terms_offset,
+            postings_offset,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a search index file")
+
+        view = memoryview(self._mmap)
+        self._ids = view[ids_offset : ids_offset + self.doc_count * _ID_SIZE]
+        self.doc_lengths = view[
+            lengths_offset : lengths_offset + 4 * self.doc_count
+        ].cast("I")
+        self._term_offsets = view[
+            term_offsets_offset : term_offsets_offset + 8 * (self.term_count + 1)
+        ].cast("Q")
+        self._post_offsets = view[
+            post_offsets_offset : post_offsets_offset + 8 * (self.term_count + 1)
+        ].cast("Q")
+        self._terms = view[terms_offset:postings_offset]
+        self._postings = view[postings_offset:].cast("I")
+
+    def doc_id(self, docno):
+        return ObjectId(bytes(self._ids[docno * _ID_SIZE : (docno + 1) * _ID_SIZE]))
+
+    def term(self, position):
+        return bytes(
+            self._terms[self._term_offsets[position] : self._term_offsets[position + 1]]
+        )
+
+    def _find(self, term_bytes):
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < term_bytes:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.term_count and self.term(low) == term_bytes:
+            return low
+        return None
+
+    def postings_at(self, position):
+        start, end = self._post_offsets[position], self._post_offsets[position + 1]
+        df = (end - start) // 2
+        return self._postings[start : start + df], self._postings[start + df : end]
+
+    def postings(self, term):
+        """
+        Return the (document numbers, term frequencies) arrays of a term.
+        """
+        position = self._find(term.encode("utf-8"))
+        if position is None:
+            return (), ()
+        return self.postings_at(position)
+
+
+class InvertedIndex:
+    """
+    InvertedIndex class for BM25 search over the titles, abstracts, creators and subjects.
+
+    The index is made of a memory-mapped segment loaded from disk and of the documents
+    added since, kept in memory. Replacing a document marks its previous version as
+    deleted. save() merges both into a new compact file, which is swapped atomically.
+
+    Methods:
+    - add_document(document): Index an article, replacing its previous version.
+    - remove_document(document_id): Remove an article from the index.
+    - document_ids() -> list[ObjectId]: _id of the indexed articles.
+    - search(text, limit=50, offset=0) -> list[tuple[ObjectId, float]]: Rank the articles.
+    - save(path): Write the index to disk.
+    - load(path) -> InvertedIndex: Memory-map an index written by save().
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, segment=None):
+        """
+        Initialize an InvertedIndex, empty or on top of a memory-mapped segment.
+
+        Args:
+            segment (_Segment, optional): Segment loaded from disk.
+        """
+        self._logger = logging.getLogger(__name__)
+
+        self._segment = segment
+        self._base_count = segment.doc_count if segment is not None else 0
+        self._total_length = segment.total_length if segment is not None else 0
+
+        self._delta_ids = []
+        self._delta_lengths = array("I")
+        self._delta_postings = defaultdict(lambda: (array("I"), array("I")))
+        self._deleted = set()
+        self._docno_by_id = None
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map an index written by save().
+
+        Args:
+            path (str): Path of the index file.
+
+        Returns:
+            InvertedIndex: The loaded index.
+        """
+        return cls(_Segment(path))
+
+    @property
+    def document_count(self):
+        """
+        Number of indexed documents.
+        """
+        return self._base_count + len(self._delta_ids) - len(self._deleted)
+
+    def _doc_id(self, docno):
+        if docno < self._base_count:
+            return self._segment.doc_id(docno)
+        return self._delta_ids[docno - self._base_count]
+
+    def _doc_length(self, docno):
+        if docno < self._base_count:
+            return self._segment.doc_lengths[docno]
+        return self._delta_lengths[docno - self._base_count]
+
+    def _docnos(self):
+        # Built on the first update only, searches do not need it.
+        if self._docno_by_id is None:
+            self._docno_by_id = {
+                self._segment.doc_id(docno): docno for docno in range(self._base_count)
+            }
+            for position, document_id in enumerate(self._delta_ids):
+                self._docno_by_id[document_id] = self._base_count + position
+        return self._docno_by_id
+
+    def remove_document(self, document_id):
+        """
+        Remove an article from the index.
+
+        Args:
+            document_id (ObjectId): _id of the article.
+        """
+        docno = self._docnos().pop(document_id, None)
+        if docno is not None and docno not in self._deleted:
+            self._deleted.add(docno)
+            self._total_length -= self._doc_length(docno)
+
+    def document_ids(self):
+        """
+        List the _id of the indexed articles.
+
+        Returns:
+            list[ObjectId]: _id of the articles, in indexing order.
+        """
+        return list(self._docnos())
+
+    def add_document(self, document):
+        """
+        Index an article, replacing its previous version.
+
+        Args:
+            document (dict): Article as stored in arxiv_data_doc, with its _id.
+        """
+        self.remove_document(document["_id"])
+
+        terms = document_terms(document)
+        if not terms:
+            return
+
+        docno = self._base_count + len(self._delta_ids)
+        self._delta_ids.append(document["_id"])
+        self._delta_lengths.append(len(terms))
+        self._docnos()[document["_id"]] = docno
+        self._total_length += len(terms)
+
+        for term, frequency in Counter(terms).items():
+            docnos, frequencies = self._delta_postings[term]
+            docnos.append(docno)
+            frequencies.append(frequency)
+
+    def _postings(self, term):
+        """
+        Yield the (document number, term frequency) pairs of a term, skipping deleted documents.
+        """
+        if self._segment is not None:
+            for docno, frequency in zip(*self._segment.postings(term)):
+                if docno not in self._deleted:
+                    yield docno, frequency
+
+        if term in self._delta_postings:
+            for docno, frequency in zip(*self._delta_postings[term]):
+                if docno not in self._deleted:
+                    yield docno, frequency
+
+    def search(self, text, limit=50, offset=0):
+        """
+        Rank the articles matching any term of a text with BM25.
+
+        Args:
+            text (str): Search terms.
+            limit (int): Maximum number of results.
+            offset (int): Number of best results to skip, for pagination.
+
+        Returns:
+            list[tuple[ObjectId, float]]: _id and score of the results, best first.
+        """
+        document_count = self.document_count
+        if document_count <= 0:
+            return []
+        average_length = self._total_length / document_count
+
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            postings = list(self._postings(term))
+            if not postings:
+                continue
+
+            idf = math.log(
+                1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for docno, frequency in postings:
+                length_norm = (
+                    1 - self.B + self.B * self._doc_length(docno) / average_length
+                )
+                scores[docno] += (
+                    idf
+                    * frequency
+                    * (self.K1 + 1)
+                    / (frequency + self.K1 * length_norm)
+                )
+
+        best = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return [(self._doc_id(docno), score) for docno, score in best[offset:]]
+
+    def _merged_terms(self):
+        """
+        Yield (term bytes, docnos, frequencies) for every term, sorted, from the segment and the delta.
+        """
+        delta_terms = sorted(
+            (term.encode("utf-8"), term) for term in self._delta_postings
+        )
+        base_count = self._segment.term_count if self._segment is not None else 0
+
+        base_position, delta_position = 0, 0
+        while base_position < base_count or delta_position < len(delta_terms):
+            base_term = (
+                self._segment.term(base_position)
+                if base_position < base_count
+                else None
+            )
+            delta_term = (
+                delta_terms[delta_position][0]
+                if delta_position < len(delta_terms)
+                else None
+            )
+
+            docnos, frequencies = array("I"), array("I")
+            if delta_term is None or (
+                base_term is not None and base_term <= delta_term
+            ):
+                base_docnos, base_frequencies = self._segment.postings_at(base_position)
+                docnos.extend(base_docnos)
+                frequencies.extend(base_frequencies)
+                term = base_term
+                base_position += 1
+            else:
+                term = delta_term
+
+            if term == delta_term:
+                delta_docnos, delta_frequencies = self._delta_postings[
+                    delta_terms[delta_position][1]
+                ]
+                docnos.extend(delta_docnos)
+                frequencies.extend(delta_frequencies)
+                delta_position += 1
+
+            yield term, docnos, frequencies
+
+    def save(self, path):
+        """
+        Write the index to disk, dropping deleted documents. The file is replaced atomically.
+
+        Args:
+            path (str): Path of the index file.
+        """
+        alive = [
+            docno
+            for docno in range(self._base_count + len(self._delta_ids))
+            if docno not in self._deleted
+        ]
+        renumber = {docno: position for position, docno in enumerate(alive)}
+
+        ids = b"".join(self._doc_id(docno).binary for docno in alive)
+        lengths = array("I", (self._doc_length(docno) for docno in alive))
+
+        terms = bytearray()
+        term_offsets = array("Q", [0])
+        postings = array("I")
+        post_offsets = array("Q", [0])
+        for term, docnos, frequencies in self._merged_terms():
+            kept = [
+                (renumber[docno], frequency)
+                for docno, frequency in zip(docnos, frequencies)
+                if docno in renumber
+            ]
+            if not kept:
+                continue
+            terms += term
+            term_offsets.append(len(terms))
+            postings.extend(docno for docno, _ in kept)
+            postings.extend(frequency for _, frequency in kept)
+            post_offsets.append(len(postings))
+
+        sections = [
+            ids,
+            lengths.tobytes(),
+            term_offsets.tobytes(),
+            post_offsets.tobytes(),
+            bytes(terms),
+            postings.tobytes(),
+        ]
+        offsets = []
+        position = _HEADER.size
+        for section in sections:
+            position = _align(position)
+            offsets.append(position)
+            position += len(section)
+
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as index_file:
+            index_file.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    len(alive),
+                    len(term_offsets) - 1,
+                    sum(lengths),
+                    *offsets,
+                )
+            )
+            for offset, section in zip(offsets, sections):
+                index_file.write(b"\0" * (offset - index_file.tell()))
+                index_file.write(section)
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(temporary_path, path)
+
+        self._logger.info(
+            "Search index saved to %s: %s documents, %s terms",
+            path,
+            len(alive),
+            len(term_offsets) - 1,
+        )
+
+
+class SearchIndexReader:
+    """
+    SearchIndexReader class giving the Flask workers the latest saved index.
+
+    The file is memory-mapped at first use and mapped again when a harvest replaced it,
+    at most once every `check_interval` seconds.
+    """
+
+    def __init__(self, path, check_interval=60):
+        """
+        Initialize SearchIndexReader.
+
+        Args:
+            path (str): Path of the index file.
+            check_interval (float): Minimum number of seconds between two checks of the file.
+        """
+        self._logger = logging.getLogger(__name__)
+
+        self.path = path
+        self.check_interval = check_interval
+        self._index = None
+        self._mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the latest saved index.
+
+        Returns:
+            InvertedIndex: The index, or None if no index was saved yet.
+        """
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.check_interval
+        ):
+            return self._index
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return self._index
+
+            if mtime != self._mtime:
+                try:
+                    self._index = InvertedIndex.load(self.path)
+                    self._mtime = mtime
+                    self._logger.info("Search index loaded from %s", self.path)
+                except (OSError, ValueError) as e:
+                    self._logger.warning("Unable to load search index: %s", e)
+
+        return self._index
+
+
+def update_search_index(db, path, since=None):
+    """
+    Feed the index with the articles harvested since a date and save it.
+
+    The whole collection is indexed when no index was saved yet. Otherwise the
+    articles deleted from MongoDB since the last update (duplicates, legacy records
+    replaced by a migration) are removed first, so searches do not rank them.
+
+    Args:
+        db (pymongo.database.Database): MongoDB database.
+        path (str): Path of the index file.
+        since (datetime, optional): Lower bound of the datestamp of the articles to index.
+
+    Returns:
+        InvertedIndex: The updated index.
+    """
+    if os.path.exists(path):
+        index = InvertedIndex.load(path)
+    else:
+        index, since = InvertedIndex(), None
+
+    removed = 0
+    document_ids = index.document_ids()
+    for start in range(0, len(document_ids), PRUNE_BATCH_SIZE):
+        batch = document_ids[start : start + PRUNE_BATCH_SIZE]
+        existing = {
+            document["_id"]
+            for document in db.arxiv_data_doc.find({"_id": {"$in": batch}}, {"_id": 1})
+        }
+        for document_id in batch:
+            if document_id not in existing:
+                index.remove_document(document_id)
+                removed += 1
+    if removed:
+        logging.getLogger(__name__).info(
+            "Removed %s deleted articles from the search index", removed
+        )
+
+    query = {"datestamp": {"$gte": since}} if since is not None else {}
+    projection = {field: 1 for field in INDEXED_FIELDS}
+
+    for document in db.arxiv_data_doc.find(query, projection):
+        index.add_document(document)
+
+    index.save(path)
+    return index
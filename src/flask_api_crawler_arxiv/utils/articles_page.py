@@ -0,0 +1,338 @@
+"""Parameters, queries and pagination of the article read endpoints.
+
+They are shared by the WSGI endpoints of app.py and the async endpoints of
+async_app.py, which only run the queries built here with their own driver.
+
+A page of GET /articles/ is read in two steps. The keys of the page and of one more
+article are read first (keys_query): they tell whether there is a next page and give
+its continuation token before the response headers are sent. The articles of the page
+are then streamed, in order, by an aggregation on their _id (page_pipeline).
+"""
+
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from flask_api_crawler_arxiv.utils.articles_query import build_articles_query
+from flask_api_crawler_arxiv.utils.field_projection import build_projection
+from flask_api_crawler_arxiv.utils.keyset_cursor import (
+    KEYSET_SORT,
+    decode_cursor,
+    encode_cursor,
+)
+
+# Maximum articles per page of /articles/
+ARTICLES_PER_PAGE = 50
+
+# Relevance of the articles matching a $text query
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Filters of /articles/ the search index cannot apply
+_FILTERS = ("description", "title", "start_date", "end_date")
+
+
+def parse_articles_args(args):
+    """
+    Parse and validate the query parameters of /articles/, see app.get_articles.
+
+    Args:
+        args (MultiDict): Query parameters.
+
+    Returns:
+        dict: page, keyset_query, projection, search, description, title, start_date
+            and end_date.
+
+    Raises:
+        ValueError: If a parameter is invalid, with the message returned to the client.
+    """
+    # Get the page number from the URL or default to 1
+    try:
+        page = int(args.get("page", 1))
+    except ValueError:
+        raise ValueError("Invalid page")
+    if page < 1:
+        raise ValueError("Invalid page")
+
+    # Get the continuation token of the previous page, it takes precedence over page
+    cursor = args.get("cursor")
+    keyset_query = decode_cursor(cursor) if cursor else None
+
+    # Get the fields to return
+    projection = build_projection(
+        args.get("fields"), args.get("view"), required_fields=("datestamp",)
+    )
+
+    # Ranked results have no keyset order
+    search = args.get("q")
+    if search and keyset_query:
+        raise ValueError("cursor cannot be combined with q, use page")
+
+    # Parse start_date and end_date if provided
+    try:
+        start_date, end_date = (
+            datetime.strptime(args[name], "%Y-%m-%d") if args.get(name) else None
+            for name in ("start_date", "end_date")
+        )
+    except ValueError:
+        raise ValueError("start_date and end_date must be YYYY-MM-DD")
+
+    return {
+        "page": page,
+        "keyset_query": keyset_query,
+        "projection": projection,
+        "search": search,
+        "description": args.get("description"),
+        "title": args.get("title"),
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def uses_search_index(articles_args):
+    """
+    Tell whether a listing is ranked by the search index: q= is its only filter.
+
+    Args:
+        articles_args (dict): Parameters returned by parse_articles_args.
+
+    Returns:
+        bool: True if the search index can rank the articles.
+    """
+    return bool(articles_args["search"]) and not any(
+        articles_args[name] for name in _FILTERS
+    )
+
+
+def indexed_search_limit(articles_args, per_page=ARTICLES_PER_PAGE):
+    """
+    Number of results to read from the search index for a page and its lookahead.
+
+    Args:
+        articles_args (dict): Parameters returned by parse_articles_args.
+        per_page (int): Number of articles of a page.
+
+    Returns:
+        int: The results of the previous pages, of the page and one more.
+    """
+    return articles_args["page"] * per_page + 1
+
+
+def indexed_page(
+    results, existing_ids, articles_args, limit, per_page=ARTICLES_PER_PAGE
+):
+    """
+    Cut a page from the results of the search index, skipping the deleted articles.
+
+    The index may still rank articles deleted from MongoDB since it was saved. They are
+    skipped on the previous pages too, so pages neither overlap nor come back short.
+
+    Args:
+        results (list[tuple[ObjectId, float]]): The first `limit` results of the index.
+        existing_ids (set): _id of the results still in MongoDB.
+        articles_args (dict): Parameters returned by parse_articles_args.
+        limit (int): Number of results read from the index.
+        per_page (int): Number of articles of a page.
+
+    Returns:
+        tuple: The _id and score of the articles of the page, whether there is a next
+            page, and the number of results to read again when deleted articles left
+            the page short (None when the page is complete).
+    """
+    ranked = [result for result in results if result[0] in existing_ids]
+    wanted = indexed_search_limit(articles_args, per_page)
+    if len(ranked) < wanted and len(results) == limit:
+        return None, None, limit + wanted - len(ranked)
+
+    start = (articles_args["page"] - 1) * per_page
+    return ranked[start : start + per_page], len(ranked) > start + per_page, None
+
+
+def keys_query(articles_args, per_page=ARTICLES_PER_PAGE):
+    """
+    Build the query reading the keys of a page and of the article after it.
+
+    Args:
+        articles_args (dict): Parameters returned by parse_articles_args.
+        per_page (int): Number of articles of a page.
+
+    Returns:
+        dict: filter, projection, sort, skip (None for a keyset page) and limit of the query.
+    """
+    query, sort = build_articles_query(
+        articles_args["search"],
+        articles_args["description"],
+        articles_args["title"],
+        articles_args["start_date"],
+        articles_args["end_date"],
+        articles_args["keyset_query"],
+    )
+    return {
+        "filter": query,
+        "projection": (
+            {"score": TEXT_SCORE} if articles_args["search"] else {"datestamp": 1}
+        ),
+        "sort": sort,
+        "skip": (
+            None
+            if articles_args["keyset_query"]
+            else (articles_args["page"] - 1) * per_page
+        ),
+        "limit": per_page + 1,
+    }
+
+
+def ranked_pipeline(ranked, projection):
+    """
+    Build the aggregation reading ranked articles, in rank order and with their score.
+
+    Args:
+        ranked (list[tuple[ObjectId, float]]): _id and score of the articles, best first.
+        projection (dict): Projection of the articles.
+
+    Returns:
+        list: The pipeline, missing articles are skipped.
+    """
+    ids = [article_id for article_id, _ in ranked]
+    scores = [score for _, score in ranked]
+    inclusion = any(value == 1 for value in projection.values())
+    return [
+        {"$match": {"_id": {"$in": ids}}},
+        {"$addFields": {"_rank": {"$indexOfArray": [ids, "$_id"]}}},
+        {"$sort": {"_rank": 1}},
+        {"$addFields": {"score": {"$arrayElemAt": [scores, "$_rank"]}}},
+        {"$project": {**projection, "score": 1} if inclusion else projection},
+        {"$project": {"_rank": 0}},
+    ]
+
+
+def page_pipeline(articles_args, keys, per_page=ARTICLES_PER_PAGE):
+    """
+    Build the aggregation reading the articles of a page from the result of keys_query.
+
+    Args:
+        articles_args (dict): Parameters returned by parse_articles_args.
+        keys (list[dict]): Documents read by keys_query.
+        per_page (int): Number of articles of a page.
+
+    Returns:
+        tuple: The pipeline, and the keys of the last article of the page when there
+            is a next page, else None.
+    """
+    page_keys = keys[:per_page]
+    last_key = page_keys[-1] if len(keys) > per_page else None
+    projection = articles_args["projection"]
+
+    if articles_args["search"]:
+        ranked = [(key["_id"], key["score"]) for key in page_keys]
+        return ranked_pipeline(ranked, projection), last_key
+
+    pipeline = [
+        {"$match": {"_id": {"$in": [key["_id"] for key in page_keys]}}},
+        {"$sort": dict(KEYSET_SORT)},
+        {"$project": projection},
+    ]
+    return pipeline, last_key
+
+
+def next_page(args, articles_args, last_key=None):
+    """
+    Build the query parameters of the next page.
+
+    Args:
+        args (dict): Query parameters of the request.
+        articles_args (dict): Parameters returned by parse_articles_args.
+        last_key (dict, optional): Keys of the last article of the page, for a keyset page.
+
+    Returns:
+        tuple: The query parameters of the next page, and its continuation token, None
+            for ranked results which are paginated with page=.
+    """
+    if articles_args["search"]:
+        return {**args, "page": articles_args["page"] + 1}, None
+
+    next_cursor = encode_cursor(last_key)
+    next_args = {**args, "cursor": next_cursor}
+    next_args.pop("page", None)
+    return next_args, next_cursor
+
+
+def parse_batch_args(ids, fields=None, view=None, max_ids=100):
+    """
+    Validate the ids of a batch lookup and build its query, see app.get_articles_batch.
+
+    Args:
+        ids ([str]): ObjectIds or OAI identifiers.
+        fields (str, optional): Comma-separated fields to return.
+        view (str, optional): View to return.
+        max_ids (int, optional): Maximum number of ids. Defaults to 100.
+
+    Returns:
+        tuple: The projection and the query resolving every id.
+
+    Raises:
+        ValueError: If a parameter is invalid, with the message returned to the client.
+    """
+    if (
+        not isinstance(ids, list)
+        or not ids
+        or not all(isinstance(value, str) and value for value in ids)
+    ):
+        raise ValueError("ids must be a non-empty list of strings")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+
+    # The identifier maps the OAI identifiers of the request back to the articles
+    projection = build_projection(fields, view, required_fields=("identifier",))
+
+    object_ids = [ObjectId(value) for value in ids if ObjectId.is_valid(value)]
+    identifiers = [value for value in ids if not ObjectId.is_valid(value)]
+    query = {
+        "$or": [
+            {"_id": {"$in": object_ids}},
+            {"identifier": {"$in": identifiers}},
+        ]
+    }
+    return projection, query
+
+
+def batch_body_args(body, args):
+    """
+    Read the ids, fields and view of a POST /articles/batch body.
+
+    Args:
+        body: Decoded JSON body, {"ids": [...], "fields": "...", "view": "..."}.
+        args (MultiDict): Query parameters, fields and view default to them.
+
+    Returns:
+        tuple: The ids, fields and view.
+
+    Raises:
+        ValueError: If the body is not a JSON object.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Invalid or incomplete document")
+    return (
+        body.get("ids"),
+        body.get("fields", args.get("fields")),
+        body.get("view", args.get("view")),
+    )
+
+
+def order_batch(articles, ids):
+    """
+    Put the articles found by a batch lookup in the order of the requested ids.
+
+    Args:
+        articles (Iterable[dict]): Articles matching the query of parse_batch_args.
+        ids ([str]): Requested ObjectIds or OAI identifiers.
+
+    Returns:
+        list: The article of each id, None for the unknown ids.
+    """
+    articles_by_id = {}
+    for article in articles:
+        articles_by_id[str(article["_id"])] = article
+        if article.get("identifier"):
+            articles_by_id[article["identifier"]] = article
+
+    return [articles_by_id.get(value) for value in ids]
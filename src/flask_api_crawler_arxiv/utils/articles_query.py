@@ -0,0 +1,66 @@
+"""Filters and sort orders of the article listing.
+
+The query shapes sent by GET /articles/ are built here, so that the index diagnostics
+(see python_cron/manage_indexes.py) explain exactly the queries the API runs.
+"""
+
+import re
+
+from flask_api_crawler_arxiv.utils.keyset_cursor import KEYSET_SORT
+
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"}), ("_id", 1)]
+
+
+def build_articles_query(
+    search=None,
+    description=None,
+    title=None,
+    start_date=None,
+    end_date=None,
+    keyset_query=None,
+):
+    """
+    Build the filter and the sort order of a listing of articles.
+
+    Args:
+        search (str, optional): Full-text search terms, results are ranked by relevance.
+        description (str, optional): Term matched literally in the descriptions, ignoring case.
+        title (str, optional): Term matched literally in the title, ignoring case.
+        start_date (datetime, optional): Lowest datestamp, used with end_date.
+        end_date (datetime, optional): Greatest datestamp, used with start_date.
+        keyset_query (dict, optional): Filter of a continuation token, see decode_cursor.
+            Ignored with search, ranked results have no keyset order.
+
+    Returns:
+        tuple: The MongoDB filter and the sort order.
+    """
+    query = {}
+
+    if search:
+        query["$text"] = {"$search": search}
+
+    # Terms are escaped, the regex filters only match them literally
+    if description:
+        query["descriptions"] = {
+            "$regex": re.escape(description),
+            "$options": "i",
+        }
+
+    if title:
+        query["title"] = {
+            "$regex": re.escape(title),
+            "$options": "i",
+        }
+
+    if start_date and end_date:
+        query["datestamp"] = {
+            "$gte": start_date,
+            "$lte": end_date,
+        }
+
+    if search:
+        return query, TEXT_SCORE_SORT
+
+    if keyset_query:
+        query.update(keyset_query)
+    return query, KEYSET_SORT
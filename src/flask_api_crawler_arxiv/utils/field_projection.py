@@ -0,0 +1,66 @@
+"""MongoDB projections for the `fields=` and `view=` parameters of the article endpoints.
+
+Attributes
+------
+FIELD_PATHS : dict
+    Public field names and the stored field they select.
+SUMMARY_FIELDS : list
+    Fields of the compact "summary" view.
+"""
+
+FIELD_PATHS = {
+    "identifier": "identifier",
+    "datestamp": "datestamp",
+    "sets": "sets",
+    "deleted": "deleted",
+    "title": "title",
+    "creators": "creators",
+    "subjects": "subjects",
+    "descriptions": "descriptions",
+    "dates": "dates",
+    "types": "types",
+    "identifiers": "identifiers",
+    # Singular names kept for the clients of the former schema
+    "description": "descriptions",
+    "date": "dates",
+    "type": "types",
+}
+
+SUMMARY_FIELDS = ["identifier", "datestamp", "title", "creators", "dates", "subjects"]
+
+# Stored for the harvest only, left out of the full view.
+_HIDDEN_PATHS = ["raw", "content_hash"]
+
+
+def build_projection(fields=None, view=None, required_fields=()):
+    """
+    Build the MongoDB projection of a `fields=` or `view=` request parameter.
+
+    Args:
+        fields (str, optional): Comma-separated public field names.
+        view (str, optional): "summary" for the compact view, "full" or None for every field.
+        required_fields (Iterable[str]): Fields always returned by an inclusion projection,
+                                         such as the sort key of a paginated listing.
+
+    Returns:
+        dict: The projection.
+
+    Raises:
+        ValueError: If a field or the view is unknown.
+    """
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+    elif view == "summary":
+        names = list(SUMMARY_FIELDS)
+    elif view in (None, "", "full"):
+        return {path: 0 for path in _HIDDEN_PATHS}
+    else:
+        raise ValueError(f"Unknown view: {view}")
+
+    projection = {}
+    for name in [*names, *required_fields]:
+        if name not in FIELD_PATHS:
+            raise ValueError(f"Unknown field: {name}")
+        projection[FIELD_PATHS[name]] = 1
+
+    return projection
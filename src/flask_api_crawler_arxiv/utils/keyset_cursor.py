@@ -0,0 +1,63 @@
+"""Opaque continuation tokens for keyset pagination.
+
+A token encodes the sort key of the last document of a page, `(datestamp, _id)`,
+so the next page is read from the index position right after it instead of skipping
+all the previous documents.
+"""
+
+import base64
+import binascii
+
+from bson import json_util
+from bson.objectid import ObjectId
+
+KEYSET_SORT = [("datestamp", 1), ("_id", 1)]
+
+
+def encode_cursor(document):
+    """
+    Build the continuation token pointing right after a document.
+
+    Args:
+        document (dict): Last document of the page.
+
+    Returns:
+        str: URL-safe opaque token.
+    """
+    key = {
+        "d": document.get("datestamp"),
+        "i": document["_id"],
+    }
+    return base64.urlsafe_b64encode(json_util.dumps(key).encode("utf-8")).decode(
+        "ascii"
+    )
+
+
+def decode_cursor(token):
+    """
+    Decode a continuation token into the query selecting the documents after it.
+
+    Args:
+        token (str): Token built by encode_cursor.
+
+    Returns:
+        dict: MongoDB filter on `(datestamp, _id)`.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        key = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        datestamp, last_id = key["d"], key["i"]
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(last_id, ObjectId):
+        raise ValueError("Invalid cursor")
+
+    return {
+        "$or": [
+            {"datestamp": {"$gt": datestamp}},
+            {"datestamp": datestamp, "_id": {"$gt": last_id}},
+        ]
+    }
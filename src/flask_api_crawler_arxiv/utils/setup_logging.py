@@ -1,9 +1,209 @@
+"""Logging of the application, configured once per process from app_config.
+
+The entry points (the API modules, the crons and the command line tools) call
+setup_logging(); the other modules only get their logger with logging.getLogger. Log
+calls go through a QueueHandler: the thread logging only merges the message with its
+%-style arguments and queues the record, a QueueListener thread formats it and writes
+it to stderr, so a request never waits on the log output. Records are written as text
+or, with LOG_JSON, as one JSON object per line.
+"""
+
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field, field_validator
+
+DEFAULT_FORMAT = (
+    "%(asctime)s - %(levelname)s - [%(process)d:%(thread)d] - %(name)s - %(message)s"
+)
+
+
+# Levels accepted by LOG_LEVEL and LOG_LEVELS.
+LOG_LEVEL_NAMES = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET")
+
+
+def _check_level(level, logger_name=None):
+    """
+    Validate a level name of LOG_LEVEL or LOG_LEVELS.
+
+    Args:
+        level (str): Level name, case insensitive.
+        logger_name (str, optional): Logger the level is given to in LOG_LEVELS.
+
+    Returns:
+        str: The level name in upper case.
+
+    Raises:
+        ValueError: If the level is unknown, with the allowed levels.
+    """
+    level = level.strip().upper()
+    if not isinstance(logging.getLevelName(level), int):
+        target = f" for logger {logger_name}" if logger_name else ""
+        raise ValueError(
+            f"Unknown log level {level}{target}, "
+            f"allowed levels are {', '.join(LOG_LEVEL_NAMES)}"
+        )
+    return level
+
+
+class _LoggingOptions(BaseModel):
+    """
+    Pydantic BaseModel for the options of the logging.
+
+    Attributes:
+    - level (str): LOG_LEVEL, level of the root logger (DEBUG, INFO, WARNING...).
+    - levels (str): LOG_LEVELS, levels of given loggers, such as "pymongo=WARNING,urllib3=INFO".
+    - json_output (bool): LOG_JSON, write one JSON object per record instead of text.
+    - format (str): LOG_FORMAT, format of the text records.
+    - use_queue (bool): LOG_QUEUE, write the records from a background thread.
+    """
+
+    level: str = Field(default="INFO", alias="LOG_LEVEL")
+    levels: str = Field(default="", alias="LOG_LEVELS")
+    json_output: bool = Field(default=False, alias="LOG_JSON")
+    format: str = Field(default=DEFAULT_FORMAT, min_length=1, alias="LOG_FORMAT")
+    use_queue: bool = Field(default=True, alias="LOG_QUEUE")
+
+    @field_validator("level")
+    @classmethod
+    def _known_level(cls, value):
+        return _check_level(value)
+
+    @field_validator("levels")
+    @classmethod
+    def _known_levels(cls, value):
+        for item in value.split(","):
+            name, _, level = item.partition("=")
+            if name.strip() and level.strip():
+                _check_level(level, name.strip())
+        return value
+
+    def logger_levels(self):
+        """
+        Returns:
+            dict: Level of each logger of LOG_LEVELS.
+        """
+        levels = {}
+        for item in self.levels.split(","):
+            name, _, level = item.partition("=")
+            if name.strip() and level.strip():
+                levels[name.strip()] = level.strip().upper()
+        return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter writing each record as one JSON object.
+    """
+
+    def format(self, record):
+        document = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "thread": record.thread,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+
+_lock = threading.Lock()
+# Options, handlers and listener of the configured process, None until setup_logging.
+_state = {"options": None, "handlers": [], "listener": None}
+
+
+def _install(options):
+    """
+    Attach the handlers of the options to the root logger.
+
+    Args:
+        options (_LoggingOptions): The options.
+    """
+    root = logging.getLogger()
+    for handler in _state["handlers"]:
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(sys.stderr)
+    if options.json_output:
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(options.format, "%Y-%m-%d %H:%M:%S"))
+
+    if options.use_queue:
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, output)
+        listener.start()
+        handler = logging.handlers.QueueHandler(records)
+    else:
+        listener = None
+        handler = output
+
+    root.addHandler(handler)
+    root.setLevel(options.level)
+    for name, level in options.logger_levels().items():
+        logging.getLogger(name).setLevel(level)
+
+    _state.update(options=options, handlers=[handler], listener=listener)
+
+
+def _stop_listener():
+    """
+    Write the queued records and stop the listener, at exit.
+    """
+    listener = _state["listener"]
+    if listener is not None:
+        _state["listener"] = None
+        listener.stop()
+
+
+def _reinstall_in_child():
+    """
+    Fork handler: the listener thread of the parent does not exist in the child, the
+    handlers are attached again with a new queue and listener.
+    """
+    global _lock
+    _lock = threading.Lock()
+    if _state["options"] is not None:
+        _state["listener"] = None
+        _install(_state["options"])
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinstall_in_child)
+atexit.register(_stop_listener)
+
+
+def setup_logging(app_config_dict=None):
+    """
+    Configure the logging of the process from the LOG_* options, once: later calls
+    return without changing anything.
+
+    Args:
+        app_config_dict (dict, optional): Configuration holding the logging options.
+            Defaults to app_config.
+    """
+    if _state["options"] is not None:
+        return
+
+    with _lock:
+        if _state["options"] is not None:
+            return
 
+        if app_config_dict is None:
+            from flask_api_crawler_arxiv.app_config_dict import app_config
 
-def setup_logging():
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(levelname)s - [%(process)d:%(thread)d] - %(filename)s:%(funcName)s() - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+            app_config_dict = app_config
+        options = _LoggingOptions(
+            **{key: value for key, value in app_config_dict.items() if value != ""}
+        )
+        _install(options)
@@ -1,6 +1,7 @@
 import datetime
 import pytest
 import time
+from unittest.mock import MagicMock, patch
 
 from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordOAI
 
@@ -77,3 +78,88 @@ class TestListRecordOAI:
         until_date = datetime.date(2000, 1, 1)
         with pytest.raises(Exception):
             list_record._list_record(query_parameters)
+
+
+def _mock_response(status_code, text="", headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = text
+    response.headers = headers or {}
+    return response
+
+
+class TestListRecordOAIHarvest:
+    @classmethod
+    def setup_class(cls):
+        cls.list_record = ListRecordOAI(valid_config)
+
+    def test_harvest_follows_resumption_tokens(self):
+        first_page = '<OAI-PMH><ListRecords><resumptionToken cursor="0" completeListSize="2">token|1</resumptionToken></ListRecords></OAI-PMH>'
+        last_page = '<OAI-PMH><ListRecords><resumptionToken cursor="1" completeListSize="2"/></ListRecords></OAI-PMH>'
+
+        with patch(
+            "flask_api_crawler_arxiv.arxiv_services.ListRecordOAI.requests.Session"
+        ) as mock_session:
+            session = mock_session.return_value.__enter__.return_value
+            session.get.side_effect = [
+                _mock_response(200, first_page),
+                _mock_response(200, last_page),
+            ]
+            pages = list(self.list_record.harvest(datetime.date(2024, 1, 1)))
+
+        assert [page.resumption_token for page in pages] == ["token|1", None]
+        assert pages[0].complete_list_size == 2
+        assert session.get.call_args_list[0].kwargs["params"]["from"] == datetime.date(
+            2024, 1, 1
+        )
+        assert session.get.call_args_list[1].kwargs["params"] == {
+            "verb": "ListRecords",
+            "resumptionToken": "token|1",
+        }
+
+    def test_harvest_resumes_from_saved_token(self):
+        with patch(
+            "flask_api_crawler_arxiv.arxiv_services.ListRecordOAI.requests.Session"
+        ) as mock_session:
+            session = mock_session.return_value.__enter__.return_value
+            session.get.return_value = _mock_response(200, "<OAI-PMH/>")
+            pages = list(self.list_record.harvest(resumption_token="saved"))
+
+        assert len(pages) == 1
+        assert session.get.call_args.kwargs["params"] == {
+            "verb": "ListRecords",
+            "resumptionToken": "saved",
+        }
+
+    def test_harvest_honors_retry_after(self):
+        with patch(
+            "flask_api_crawler_arxiv.arxiv_services.ListRecordOAI.requests.Session"
+        ) as mock_session, patch(
+            "flask_api_crawler_arxiv.arxiv_services.ListRecordOAI.time.sleep"
+        ) as mock_sleep:
+            session = mock_session.return_value.__enter__.return_value
+            session.get.side_effect = [
+                _mock_response(503, headers={"Retry-After": "7"}),
+                _mock_response(200, "<OAI-PMH/>"),
+            ]
+            pages = list(self.list_record.harvest())
+
+        assert len(pages) == 1
+        mock_sleep.assert_called_once_with(7)
+
+    def test_harvest_with_shared_session_and_throttle(self):
+        session = MagicMock()
+        session.get.side_effect = [
+            _mock_response(503, headers={"Retry-After": "0"}),
+            _mock_response(200, "<OAI-PMH/>"),
+        ]
+        throttle = MagicMock()
+        list_record = ListRecordOAI(valid_config, session=session, throttle=throttle)
+
+        with patch("flask_api_crawler_arxiv.arxiv_services.ListRecordOAI.time.sleep"):
+            pages = list(list_record.harvest())
+
+        assert len(pages) == 1
+        # Retries are throttled too, and the shared session is left open
+        assert throttle.call_count == 2
+        session.close.assert_not_called()
@@ -179,3 +179,114 @@ Mining association rules is an important technique for discovering meaningful pa
         # pylint: disable=broad-except
         with pytest.raises(RuntimeError):
             self.record_converter.get_listrecord_dict(xml_source)
+
+    def test_iter_listrecord_dict_from_chunks(self):
+        # Test that records are streamed one by one from a chunked XML source
+        xml_source = """<OAI-PMH><ListRecords>
+<record><header><identifier>oai:arXiv.org:1</identifier><datestamp>2024-01-18</datestamp></header>
+<metadata><oai_dc:dc><dc:title>First</dc:title><dc:creator>A</dc:creator><dc:creator>B</dc:creator></oai_dc:dc></metadata></record>
+<record><header><identifier>oai:arXiv.org:2</identifier><datestamp>not-a-date</datestamp></header></record>
+<record><header status="deleted"><identifier>oai:arXiv.org:3</identifier><datestamp>2024-01-19</datestamp></header></record>
+</ListRecords></OAI-PMH>"""
+        chunks = (
+            xml_source[i : i + 16].encode() for i in range(0, len(xml_source), 16)
+        )
+
+        records = self.record_converter.iter_listrecord_dict(chunks)
+
+        assert next(records) == {
+            "header": {
+                "identifier": "oai:arXiv.org:1",
+                "datestamp": datetime(2024, 1, 18),
+            },
+            "metadata": {"oai_dc:dc": {"dc:title": "First", "dc:creator": ["A", "B"]}},
+        }
+        assert list(records) == [
+            {
+                "header": {
+                    "@status": "deleted",
+                    "identifier": "oai:arXiv.org:3",
+                    "datestamp": datetime(2024, 1, 19),
+                }
+            }
+        ]
+
+    def test_iter_listrecord_dict_with_invalid_xml(self):
+        # Test that a malformed XML source raises a RuntimeError
+        with pytest.raises(RuntimeError):
+            list(self.record_converter.iter_listrecord_dict("<OAI-PMH><ListRecords>"))
+
+    def test_normalize_record(self):
+        # Test that a record is flattened into the normalized schema
+        item = {
+            "header": {
+                "identifier": "oai:arXiv.org:0803.0966",
+                "datestamp": "2024-01-01",
+                "setSpec": "cs",
+            },
+            "metadata": {
+                "oai_dc:dc": {
+                    "@xsi:schemaLocation": "http://www.openarchives.org/OAI/2.0/oai_dc/",
+                    "dc:title": "New probabilistic interest\n  measures",
+                    "dc:creator": ["Hahsler, Michael", "Hornik, Kurt"],
+                    "dc:subject": "Computer Science - Databases",
+                    "dc:description": "Mining association rules",
+                    "dc:date": "2008-03-06",
+                    "dc:type": "text",
+                    "dc:identifier": ["http://arxiv.org/abs/0803.0966"],
+                }
+            },
+        }
+
+        record = self.record_converter.normalize_record(item, keep_raw=True)
+
+        assert self.record_converter.raw_record(record) == item
+        del record["raw"]
+        assert record == {
+            "identifier": "oai:arXiv.org:0803.0966",
+            "datestamp": datetime(2024, 1, 1),
+            "sets": ["cs"],
+            "deleted": False,
+            "title": "New probabilistic interest measures",
+            "dates": [datetime(2008, 3, 6)],
+            "creators": ["Hahsler, Michael", "Hornik, Kurt"],
+            "subjects": ["Computer Science - Databases"],
+            "descriptions": ["Mining association rules"],
+            "types": ["text"],
+            "identifiers": ["http://arxiv.org/abs/0803.0966"],
+        }
+
+    def test_normalize_deleted_and_malformed_records(self):
+        # Test deleted records and records with a malformed datestamp
+        deleted = self.record_converter.normalize_record(
+            {
+                "header": {
+                    "@status": "deleted",
+                    "identifier": "oai:arXiv.org:3",
+                    "datestamp": datetime(2024, 1, 19),
+                }
+            }
+        )
+
+        assert deleted["deleted"] is True
+        assert deleted["title"] is None
+        assert "raw" not in deleted
+        assert (
+            self.record_converter.normalize_record(
+                {"header": {"identifier": "oai:arXiv.org:4", "datestamp": "19/01"}}
+            )
+            is None
+        )
+
+    def test_normalize_record_skips_malformed_dates(self):
+        record = self.record_converter.normalize_record(
+            {
+                "header": {"identifier": "oai:arXiv.org:5", "datestamp": "2024-01-19"},
+                "metadata": {
+                    "oai_dc:dc": {"dc:date": ["2008-02-22", "22/02/2008", "2009-03-01"]}
+                },
+            }
+        )
+
+        assert record["identifier"] == "oai:arXiv.org:5"
+        assert record["dates"] == [datetime(2008, 2, 22), datetime(2009, 3, 1)]
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock, patch
+
+from flask_api_crawler_arxiv.flask_api.HarvestJobQueue import HarvestJobQueue
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import UpsertReport
+
+MODULE = "flask_api_crawler_arxiv.flask_api.HarvestJobQueue"
+
+
+def test_submit_runs_the_harvest_in_the_background():
+    def run_harvest(sets, progress):
+        progress(UpsertReport(inserted=3))
+
+    queue = HarvestJobQueue(MagicMock(), run_harvest)
+    with patch(f"{MODULE}.HarvestJobManager") as mock_manager:
+        jobs = mock_manager.return_value
+        jobs.create.return_value = ({"_id": "abc", "sets": ["cs"]}, [])
+        jobs.start.return_value = True
+
+        job, active_jobs = queue.submit(["cs"])
+        queue.shutdown(wait=True)
+
+    assert job["_id"] == "abc"
+    jobs.ensure_indexes.assert_called_once()
+    jobs.progress.assert_called_once_with("abc", UpsertReport(inserted=3))
+    jobs.finish.assert_called_once_with("abc")
+
+
+def test_active_job_is_not_run_twice():
+    run_harvest = MagicMock()
+    queue = HarvestJobQueue(MagicMock(), run_harvest)
+    with patch(f"{MODULE}.HarvestJobManager") as mock_manager:
+        jobs = mock_manager.return_value
+        jobs.create.return_value = (None, [{"_id": "abc", "sets": ["cs"]}])
+
+        job, active_jobs = queue.submit(["cs"])
+        queue.shutdown(wait=True)
+
+    assert job is None
+    run_harvest.assert_not_called()
+
+
+def test_failed_harvest_is_recorded():
+    queue = HarvestJobQueue(MagicMock(), MagicMock(side_effect=RuntimeError("down")))
+    with patch(f"{MODULE}.HarvestJobManager") as mock_manager:
+        jobs = mock_manager.return_value
+        jobs.create.return_value = ({"_id": "abc", "sets": ["cs"]}, [])
+        jobs.start.return_value = True
+
+        queue.submit(["cs"])
+        queue.shutdown(wait=True)
+
+    jobs.finish.assert_called_once_with("abc", error="down")
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+from flask import Response
+from werkzeug.datastructures import MultiDict
+
+from flask_api_crawler_arxiv.flask_api.ResponseCache import ResponseCache
+
+
+def _cache(generation=0, **options):
+    return ResponseCache(lambda: generation, options)
+
+
+def test_key_is_normalized():
+    cache = _cache(generation=4)
+
+    first = cache.make_key(
+        "/articles/", MultiDict([("title", "a"), ("page", "2")]), "application/json"
+    )
+    second = cache.make_key(
+        "/articles/", MultiDict([("page", "2"), ("title", "a")]), "application/json"
+    )
+
+    assert first == second == "4:/articles/?page=2&title=a|application/json"
+
+
+def test_lru_eviction_and_ttl():
+    cache = _cache(RESPONSE_CACHE_MAX_ENTRIES=2, RESPONSE_CACHE_TTL_SECONDS=10)
+    for key in ("a", "b"):
+        cache.store(key, Response(key))
+    cache.get("a")
+    cache.store("c", Response("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a")["body"] == b"a"
+
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.ResponseCache.time.monotonic",
+        return_value=1e12,
+    ):
+        assert cache.get("a") is None
+
+
+def test_entry_round_trip():
+    cache = _cache()
+    response = Response('{"title":"A"}', content_type="application/json")
+    response.headers["X-Next-Cursor"] = "token"
+
+    entry = cache.store("key", response)
+    rebuilt = ResponseCache.to_response(cache.get("key"))
+
+    assert rebuilt.get_data() == b'{"title":"A"}'
+    assert rebuilt.headers["X-Next-Cursor"] == "token"
+    assert rebuilt.headers["ETag"] == f'"{entry["etag"]}"'
+    assert rebuilt.content_type == "application/json"
+
+
+def test_generation_read_failure_keeps_last_value():
+    generations = iter([1])
+
+    def loader():
+        return next(generations)
+
+    cache = ResponseCache(loader, {"RESPONSE_CACHE_GENERATION_CHECK_SECONDS": 0})
+
+    assert cache.generation() == 1
+    assert cache.generation() == 1
+
+
+def test_disabled_cache():
+    cache = _cache(RESPONSE_CACHE_MAX_ENTRIES=0)
+
+    def stream():
+        raise AssertionError("body read")
+        yield b""
+
+    assert cache.store("key", Response(stream())) is None
+    assert not cache.enabled
+    assert cache.get("key") is None
+
+
+def test_streamed_response_cached_up_to_max_body_bytes():
+    cache = _cache(RESPONSE_CACHE_MAX_BODY_BYTES=8)
+
+    small = cache.store("small", Response(iter(["[1", ",2]"])))
+    large = Response(iter(["[1111", ",2222", ",3333]"]))
+
+    assert small["body"] == b"[1,2]"
+    assert cache.store("large", large) is None
+    assert cache.get("large") is None
+    assert b"".join(large.iter_encoded()) == b"[1111,2222,3333]"
@@ -2,6 +2,7 @@ import pytest
 from flask import Flask
 from unittest.mock import patch, MagicMock
 from flask_api_crawler_arxiv.flask_api.app import application
+from flask_api_crawler_arxiv.flask_api.ResponseCache import ResponseCache
 from flask_api_crawler_arxiv.mongodb.MongodbManager import MongoDBManager
 
 from flask_api_crawler_arxiv.app_config_dict import app_config
@@ -17,6 +18,14 @@ def mock_db_manager():
         yield mock_manager
 
 
+# Fixture to give each test an empty response cache at generation 0
+@pytest.fixture(autouse=True)
+def response_cache():
+    cache = ResponseCache(lambda: 0, {"RESPONSE_CACHE_MAX_ENTRIES": 16})
+    with patch("flask_api_crawler_arxiv.flask_api.app.response_cache", cache):
+        yield cache
+
+
 # Fixture to create a test client for the Flask application
 @pytest.fixture
 def client():
@@ -27,8 +36,8 @@ def client():
 
 # Sample test for the get_articles endpoint
 def test_get_articles(client, mock_db_manager):
-    # Mock the perform_transaction method to return a sample list of articles
-    mock_db_manager.perform_transaction.return_value = (
+    # Mock the perform_read method to return a sample list of articles
+    mock_db_manager.perform_read.return_value = (
         [{"title": "Test Article"}],
         200,
     )
@@ -41,6 +50,13 @@ def test_get_articles(client, mock_db_manager):
     assert b"Test Article" in response.data
 
 
+# OAI-PMH record accepted by POST /articles
+SAMPLE_DOCUMENT = {
+    "header": {"identifier": "oai:arXiv.org:0704.0001", "datestamp": "2024-01-18"},
+    "metadata": {},
+}
+
+
 # Sample test for the insert_doc_from_user endpoint
 def test_insert_doc_from_user(client, mock_db_manager):
     # Mock the perform_transaction method to return a success message
@@ -50,16 +66,32 @@ def test_insert_doc_from_user(client, mock_db_manager):
     )
 
     # Send a POST request to the /articles endpoint with a sample JSON document
-    response = client.post("/articles", json={"header": {}, "metadata": {}})
+    response = client.post("/articles", json=SAMPLE_DOCUMENT)
 
     # Assert the response status code and content
     assert response.status_code == 201
     assert b"Article inserted successfully" in response.data
 
 
+@pytest.mark.parametrize(
+    "header, error",
+    [
+        ({"datestamp": "2024-01-18"}, "Missing header.identifier"),
+        ({"identifier": None, "datestamp": "2024-01-18"}, "Missing header.identifier"),
+        ({"identifier": "oai:arXiv.org:0704.0001"}, "Missing header.datestamp"),
+    ],
+)
+def test_insert_doc_from_user_incomplete_header(client, mock_db_manager, header, error):
+    response = client.post("/articles", json={"header": header, "metadata": {}})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+    mock_db_manager.perform_transaction.assert_not_called()
+
+
 def test_get_article_by_id(client, mock_db_manager):
-    # Mock the perform_transaction method to return a sample article
-    mock_db_manager.perform_transaction.return_value = (
+    # Mock the perform_read method to return a sample article
+    mock_db_manager.perform_read.return_value = (
         {"title": "Test Article", "_id": "123"},
         200,
     )
@@ -73,9 +105,9 @@ def test_get_article_by_id(client, mock_db_manager):
 
 
 def test_get_article_summary_by_id(client, mock_db_manager):
-    # Mock the perform_transaction method to return a sample article summary
-    mock_db_manager.perform_transaction.return_value = (
-        {"metadata": {"oai_dc:dc:dc:description": "Summary"}},
+    # Mock the perform_read method to return a sample article summary
+    mock_db_manager.perform_read.return_value = (
+        {"descriptions": ["Summary"]},
         200,
     )
 
@@ -116,8 +148,8 @@ def test_version(client):
 
 
 def test_get_articles_error_handling(client, mock_db_manager):
-    # Mock the perform_transaction method to raise an exception
-    mock_db_manager.perform_transaction.side_effect = Exception("Sample error")
+    # Mock the perform_read method to raise an exception
+    mock_db_manager.perform_read.side_effect = Exception("Sample error")
 
     # Send a GET request to the /articles/ endpoint
     response = client.get("/articles/")
@@ -132,7 +164,7 @@ def test_insert_doc_from_user_error_handling(client, mock_db_manager):
     mock_db_manager.perform_transaction.side_effect = Exception("Sample error")
 
     # Send a POST request to the /articles endpoint with a sample JSON document
-    response = client.post("/articles", json={"header": {}, "metadata": {}})
+    response = client.post("/articles", json=SAMPLE_DOCUMENT)
 
     # Assert the response status code and error message
     assert response.status_code == 500
@@ -140,8 +172,8 @@ def test_insert_doc_from_user_error_handling(client, mock_db_manager):
 
 
 def test_get_article_by_id_error_handling(client, mock_db_manager):
-    # Mock the perform_transaction method to raise an exception
-    mock_db_manager.perform_transaction.side_effect = Exception("Sample error")
+    # Mock the perform_read method to raise an exception
+    mock_db_manager.perform_read.side_effect = Exception("Sample error")
 
     # Send a GET request to the /article/<id> endpoint
     response = client.get("/article/657dd0d2253a61b7d7eefff8")
@@ -152,8 +184,8 @@ def test_get_article_by_id_error_handling(client, mock_db_manager):
 
 
 def test_get_article_summary_by_id_error_handling(client, mock_db_manager):
-    # Mock the perform_transaction method to raise an exception
-    mock_db_manager.perform_transaction.side_effect = Exception("Sample error")
+    # Mock the perform_read method to raise an exception
+    mock_db_manager.perform_read.side_effect = Exception("Sample error")
 
     # Send a GET request to the /text/<id> endpoint
     response = client.get("/text/657dd0d2253a61b7d7eefff8")
@@ -163,17 +195,509 @@ def test_get_article_summary_by_id_error_handling(client, mock_db_manager):
     assert b"Sample error" in response.data
 
 
+def _job(job_id="abc", sets=("test_arxset",), status="queued"):
+    from datetime import datetime
+
+    return {
+        "_id": job_id,
+        "sets": list(sets),
+        "status": status,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "error": None,
+        "created_at": datetime(2024, 1, 18),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
 def test_inject_data_to_mongodb(client, mock_db_manager):
-    # Mock the cron_inject_data_mongodb function
+    # Mock the job queue, the harvest runs in the background
+    with patch("flask_api_crawler_arxiv.flask_api.app.harvest_job_queue") as mock_queue:
+        mock_queue.submit.return_value = (_job(), [])
+
+        # Send a GET request to the /inject_data_to_mongodb endpoint
+        response = client.get("/inject_data_to_mongodb?ARXSET=test_arxset")
+
+        # Assert the job is queued and returned at once
+        assert response.status_code == 202
+        assert response.headers["Location"] == "/jobs/abc"
+        assert response.get_json()["status"] == "queued"
+        assert response.get_json()["created"] is True
+        mock_queue.submit.assert_called_once_with(["test_arxset"])
+
+
+def test_inject_data_to_mongodb_shares_active_jobs(client, mock_db_manager):
+    with patch("flask_api_crawler_arxiv.flask_api.app.harvest_job_queue") as mock_queue:
+        # cs is already harvested by another job, only math is queued
+        mock_queue.submit.return_value = (
+            _job("new", sets=["math"]),
+            [_job("active", sets=["cs"], status="running")],
+        )
+        response = client.get("/inject_data_to_mongodb?ARXSET=cs,math")
+
+        mock_queue.submit.return_value = (None, [_job("active", sets=["cs"])])
+        shared = client.get("/inject_data_to_mongodb?ARXSET=cs")
+
+    assert response.headers["Location"] == "/jobs/new"
+    assert [job["job_id"] for job in response.get_json()["jobs"]] == ["new", "active"]
+    assert shared.headers["Location"] == "/jobs/active"
+    assert shared.get_json()["created"] is False
+
+
+def test_run_harvest_of_several_sets():
+    from flask_api_crawler_arxiv.flask_api.app import _run_harvest
+
+    progress = MagicMock()
     with patch(
+        "flask_api_crawler_arxiv.flask_api.app.cron_harvest_sets_async"
+    ) as mock_async_cron, patch(
         "flask_api_crawler_arxiv.flask_api.app.cron_inject_data_mongodb"
     ) as mock_cron:
-        # Send a GET request to the /inject_data_to_mongodb endpoint
-        response = client.get("/inject_data_to_mongodb?ARXSET=test_arxset")
+        _run_harvest(["cs", "math"], progress)
+        _run_harvest(["cs"], progress)
+
+    mock_async_cron.assert_called_once_with(
+        app_config, arxsets=["cs", "math"], progress=progress
+    )
+    mock_cron.assert_called_once_with(app_config, arxset="cs", progress=progress)
+
+
+def test_get_job(client):
+    with patch("flask_api_crawler_arxiv.flask_api.app.harvest_job_queue") as mock_queue:
+        mock_queue.get.side_effect = [_job(status="running"), None]
+
+        response = client.get("/jobs/abc")
+        missing = client.get("/jobs/unknown")
+
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "running"
+    assert response.get_json()["created_at"] == "2024-01-18T00:00:00"
+    assert missing.status_code == 404
+
+
+def _mock_articles_db(mock_db_manager, articles, keys=None):
+    # The keys query of the page and of one more article, then the page read by _id
+    from bson.objectid import ObjectId
+
+    if keys is None:
+        keys = [{"_id": ObjectId()} for _ in articles]
+    db = MagicMock()
+    keys_cursor = MagicMock()
+    keys_cursor.sort.return_value = keys_cursor
+    keys_cursor.skip.return_value = keys_cursor
+    keys_cursor.limit.return_value = keys
+    db.arxiv_data_doc.find.return_value = keys_cursor
+    db.arxiv_data_doc.aggregate.return_value = articles
+    mock_db_manager.perform_read.side_effect = lambda operations: operations(db)
+    return db, keys_cursor
+
+
+def test_get_articles_next_cursor(client, mock_db_manager):
+    from bson.objectid import ObjectId
+    from datetime import datetime
+
+    keys = [{"_id": ObjectId(), "datestamp": datetime(2024, 1, 18)} for _ in range(51)]
+    articles = [{**key, "title": "A"} for key in keys[:50]]
+    db, keys_cursor = _mock_articles_db(mock_db_manager, articles, keys)
+
+    response = client.get("/articles/?title=quantum")
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 50
+    keys_cursor.limit.assert_called_with(51)
+    pipeline = db.arxiv_data_doc.aggregate.call_args.args[0]
+    assert pipeline[0] == {
+        "$match": {"_id": {"$in": [key["_id"] for key in keys[:50]]}}
+    }
+    next_cursor = response.headers["X-Next-Cursor"]
+    assert "cursor=" in response.headers["Link"]
+    assert "title=quantum" in response.headers["Link"]
+
+    client.get(f"/articles/?cursor={next_cursor}")
+    query = db.arxiv_data_doc.find.call_args.args[0]
+    assert query["$or"][1]["_id"] == {"$gt": keys[49]["_id"]}
+
+
+def test_get_articles_last_page(client, mock_db_manager):
+    _mock_articles_db(mock_db_manager, [{"title": "A"}])
+
+    response = client.get("/articles/")
+
+    assert response.get_json() == [{"title": "A"}]
+    assert "X-Next-Cursor" not in response.headers
+    assert "Link" not in response.headers
+
+
+@pytest.mark.parametrize("page", ["0", "-3", "two"])
+def test_get_articles_invalid_page(client, mock_db_manager, page):
+    response = client.get(f"/articles/?page={page}")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid page"}
+    mock_db_manager.perform_read.assert_not_called()
+
+
+def test_get_articles_invalid_cursor(client, mock_db_manager):
+    response = client.get("/articles/?cursor=invalid")
+
+    assert response.status_code == 400
+    mock_db_manager.perform_read.assert_not_called()
+
+
+def test_get_articles_text_search(client, mock_db_manager):
+    from bson.objectid import ObjectId
+
+    keys = [{"_id": ObjectId(), "score": 1.5}]
+    db, _ = _mock_articles_db(
+        mock_db_manager, [{"title": "Test Article", "score": 1.5}], keys
+    )
+
+    response = client.get("/articles/?q=quantum+utility&title=a.b*&fields=title")
+
+    assert response.status_code == 200
+    assert response.get_json() == [{"title": "Test Article", "score": 1.5}]
+    query, projection = db.arxiv_data_doc.find.call_args.args
+    assert query["$text"] == {"$search": "quantum utility"}
+    assert query["title"]["$regex"] == r"a\.b\*"
+    assert projection == {"score": {"$meta": "textScore"}}
+    pipeline = db.arxiv_data_doc.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"_id": {"$in": [keys[0]["_id"]]}}}
+    assert pipeline[3] == {"$addFields": {"score": {"$arrayElemAt": [[1.5], "$_rank"]}}}
+    assert pipeline[4]["$project"]["score"] == 1
+
+
+def test_get_articles_ranked_by_search_index(client, mock_db_manager):
+    from bson.objectid import ObjectId
+
+    ranked = [(ObjectId(), 2.0 - index / 1000) for index in range(110)]
+    deleted = {article_id for article_id, _ in ranked[:3]}
+    db, _ = _mock_articles_db(mock_db_manager, [{"title": "A", "score": 2.0}])
+    db.arxiv_data_doc.find.side_effect = lambda query, projection: [
+        {"_id": article_id}
+        for article_id in query["_id"]["$in"]
+        if article_id not in deleted
+    ]
+    search_index_reader = MagicMock()
+    search_index_reader.get.return_value.search.side_effect = (
+        lambda text, limit: ranked[:limit]
+    )
+
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.app.search_index_reader",
+        search_index_reader,
+    ):
+        response = client.get("/articles/?q=quantum&page=2")
+
+    assert response.status_code == 200
+    assert "page=3" in response.headers["Link"]
+    # The three deleted articles of page 1 are made up for by reading three more
+    search = search_index_reader.get.return_value.search
+    assert [call.kwargs["limit"] for call in search.call_args_list] == [101, 104]
+    pipeline = db.arxiv_data_doc.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"_id": {"$in": [id for id, _ in ranked[53:103]]}}}
+
+
+def test_get_articles_compact_and_pretty_json(client, mock_db_manager):
+    _mock_articles_db(mock_db_manager, [{"title": "A"}, {"title": "B"}])
+
+    compact = client.get("/articles/")
+    pretty = client.get("/articles/?pretty=true")
+
+    assert compact.data == b'[{"title":"A"},{"title":"B"}]'
+    assert pretty.get_json() == compact.get_json()
+    assert b'\n        "title": "A"' in pretty.data
+
 
-        # Assert the response status code and success message
-        assert response.status_code == 200
-        assert b"Data injection completed successfully." in response.data
+def test_get_articles_ndjson(client, mock_db_manager):
+    _mock_articles_db(mock_db_manager, [{"title": "A"}, {"title": "B"}])
 
-        # Assert that the cron_inject_data_mongodb function was called with the correct arguments
-        mock_cron.assert_called_once_with(app_config, arxset="test_arxset")
+    response = client.get("/articles/", headers={"Accept": "application/x-ndjson"})
+
+    assert response.content_type == "application/x-ndjson"
+    assert response.data == b'{"title":"A"}\n{"title":"B"}\n'
+
+
+def test_get_articles_summary_view(client, mock_db_manager):
+    db, _ = _mock_articles_db(mock_db_manager, [])
+
+    response = client.get("/articles/?view=summary")
+
+    assert response.status_code == 200
+    projection = db.arxiv_data_doc.aggregate.call_args.args[0][-1]["$project"]
+    assert projection["title"] == 1
+    assert "descriptions" not in projection
+
+
+def test_get_article_by_id_unknown_field(client, mock_db_manager):
+    response = client.get("/article/657dd0d2253a61b7d7eefff8?fields=$where")
+
+    assert response.status_code == 400
+    mock_db_manager.perform_read.assert_not_called()
+
+
+def test_get_article_cached_with_etag(client, mock_db_manager):
+    mock_db_manager.perform_read.return_value = {"title": "Test Article"}
+
+    first = client.get("/article/657dd0d2253a61b7d7eefff8?fields=title")
+    second = client.get("/article/657dd0d2253a61b7d7eefff8?fields=title")
+    not_modified = client.get(
+        "/article/657dd0d2253a61b7d7eefff8?fields=title",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    mock_db_manager.perform_read.assert_called_once()
+
+
+def test_cache_invalidated_by_generation(client, mock_db_manager, response_cache):
+    generation = [0]
+    response_cache._generation_loader = lambda: generation[0]
+    mock_db_manager.perform_read.return_value = {"title": "Test Article"}
+
+    first = client.get("/text/657dd0d2253a61b7d7eefff8")
+    generation[0] = 1
+    response_cache.refresh()
+    mock_db_manager.perform_read.return_value = {"title": "Updated Article"}
+    second = client.get(
+        "/text/657dd0d2253a61b7d7eefff8",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+
+    assert second.status_code == 200
+    assert b"Updated Article" in second.data
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_disabled_cache_streams_listings(client, mock_db_manager):
+    _mock_articles_db(mock_db_manager, [{"title": "A"}])
+    cache = ResponseCache(lambda: 0, {"RESPONSE_CACHE_MAX_ENTRIES": 0})
+
+    with patch("flask_api_crawler_arxiv.flask_api.app.response_cache", cache):
+        response = client.get("/articles/")
+
+    assert response.is_streamed
+    assert response.get_json() == [{"title": "A"}]
+    assert "X-Cache" not in response.headers
+
+
+def test_error_responses_are_not_cached(client, mock_db_manager):
+    mock_db_manager.perform_read.side_effect = Exception("Sample error")
+
+    client.get("/article/657dd0d2253a61b7d7eefff8")
+    response = client.get("/article/657dd0d2253a61b7d7eefff8")
+
+    assert response.status_code == 500
+    assert mock_db_manager.perform_read.call_count == 2
+
+
+def _bulk_line(identifier, datestamp="2024-01-18"):
+    import json
+
+    return json.dumps(
+        {
+            "header": {"identifier": identifier, "datestamp": datestamp},
+            "metadata": {"oai_dc:dc": {"dc:title": identifier}},
+        }
+    )
+
+
+def test_bulk_insert_reports_errors_by_line(client, mock_db_manager):
+    from pymongo.errors import BulkWriteError
+
+    collection = mock_db_manager.db.__getitem__.return_value
+    collection.find.return_value = []
+    collection.bulk_write.side_effect = BulkWriteError(
+        {
+            "nUpserted": 1,
+            "nModified": 0,
+            "writeErrors": [{"index": 1, "code": 2, "errmsg": "write failed"}],
+        }
+    )
+    body = "\n".join(
+        [
+            _bulk_line("oai:arXiv.org:1"),
+            "{not json",
+            _bulk_line("oai:arXiv.org:2", datestamp="18/01/2024"),
+            "",
+            _bulk_line("oai:arXiv.org:3"),
+            _bulk_line("oai:arXiv.org:1"),
+        ]
+    )
+
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.app.HarvestStateManager"
+    ) as mock_state_manager:
+        response = client.post(
+            "/articles/bulk", data=body, content_type="application/x-ndjson"
+        )
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["lines"] == 6
+    assert result["inserted"] == 1
+    assert [error["line"] for error in result["errors"]] == [2, 3, 5, 6]
+    assert result["errors"][2]["error"] == "write failed"
+    collection.bulk_write.assert_called_once()
+    mock_state_manager.return_value.bump_generation.assert_called_once()
+
+
+def test_bulk_insert_reports_malformed_lines(client, mock_db_manager):
+    collection = mock_db_manager.db.__getitem__.return_value
+    collection.find.return_value = []
+    collection.bulk_write.return_value.upserted_count = 2
+    collection.bulk_write.return_value.modified_count = 0
+    body = "\n".join(
+        [
+            _bulk_line("oai:arXiv.org:1"),
+            '{"header":"oops","metadata":{}}',
+            '{"header":{"identifier":"oai:arXiv.org:2"},"metadata":{"oai_dc:dc":[]}}',
+            '{"header":{"identifier":"oai:arXiv.org:2"},"metadata":"oops"}',
+            _bulk_line("oai:arXiv.org:3"),
+        ]
+    )
+
+    with patch("flask_api_crawler_arxiv.flask_api.app.HarvestStateManager"):
+        response = client.post(
+            "/articles/bulk", data=body, content_type="application/x-ndjson"
+        )
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["inserted"] == 2
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["error"] == "header must be an object"
+
+
+def test_bulk_insert_failure_before_write_keeps_generation(client, mock_db_manager):
+    mock_db_manager.open_connection.side_effect = Exception("MongoDB unavailable")
+
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.app.HarvestStateManager"
+    ) as mock_state_manager:
+        response = client.post(
+            "/articles/bulk",
+            data=_bulk_line("oai:arXiv.org:1"),
+            content_type="application/x-ndjson",
+        )
+
+    assert response.status_code == 500
+    mock_state_manager.return_value.bump_generation.assert_not_called()
+
+
+def test_bulk_insert_requires_ndjson(client, mock_db_manager):
+    response = client.post("/articles/bulk", json={"header": {}, "metadata": {}})
+
+    assert response.status_code == 415
+
+
+def test_get_articles_batch_in_request_order(client, mock_db_manager):
+    from bson.objectid import ObjectId
+
+    first_id = ObjectId()
+    db = MagicMock()
+    db.arxiv_data_doc.find.return_value = [
+        {"_id": ObjectId(), "identifier": "oai:arXiv.org:2", "title": "B"},
+        {"_id": first_id, "identifier": "oai:arXiv.org:1", "title": "A"},
+    ]
+    mock_db_manager.perform_read.side_effect = lambda operations: operations(db)
+
+    response = client.get(
+        f"/articles/batch?ids=oai:arXiv.org:2,{first_id},oai:arXiv.org:404&fields=title"
+    )
+
+    assert response.status_code == 200
+    articles = response.get_json()
+    assert [article and article["title"] for article in articles] == ["B", "A", None]
+    query, projection = db.arxiv_data_doc.find.call_args.args
+    assert query["$or"][0] == {"_id": {"$in": [first_id]}}
+    assert query["$or"][1] == {
+        "identifier": {"$in": ["oai:arXiv.org:2", "oai:arXiv.org:404"]}
+    }
+    assert projection == {"title": 1, "identifier": 1}
+    db.arxiv_data_doc.find.assert_called_once()
+
+
+def test_post_articles_batch(client, mock_db_manager):
+    db = MagicMock()
+    db.arxiv_data_doc.find.return_value = []
+    mock_db_manager.perform_read.side_effect = lambda operations: operations(db)
+
+    response = client.post(
+        "/articles/batch", json={"ids": ["oai:arXiv.org:1"], "view": "summary"}
+    )
+    too_many = client.post(
+        "/articles/batch", json={"ids": [f"oai:arXiv.org:{n}" for n in range(101)]}
+    )
+    invalid = client.post("/articles/batch", json={"ids": "oai:arXiv.org:1"})
+
+    assert response.status_code == 200
+    assert response.get_json() == [None]
+    assert too_many.status_code == 400
+    assert invalid.status_code == 400
+
+
+def test_get_stats(client, mock_db_manager):
+    db = MagicMock()
+    stats = db.__getitem__.return_value
+    stats.find.return_value.sort.return_value.limit.return_value = [
+        {"_id": "Quantum Physics", "count": 12},
+        {"_id": "Mathematics", "count": 3},
+    ]
+    mock_db_manager.perform_read.side_effect = lambda operations: operations(db)
+
+    response = client.get("/stats/subjects?limit=2")
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "dimension": "subjects",
+        "keys": [
+            {"key": "Quantum Physics", "count": 12},
+            {"key": "Mathematics", "count": 3},
+        ],
+    }
+    db.__getitem__.assert_called_with("stats_by_subject")
+    stats.find.return_value.sort.return_value.limit.assert_called_once_with(2)
+    db.arxiv_data_doc.aggregate.assert_not_called()
+
+
+def test_get_stats_invalid(client, mock_db_manager):
+    assert client.get("/stats/journals").status_code == 404
+    assert client.get("/stats/subjects?limit=0").status_code == 400
+    assert client.get("/stats/months?sort=size").status_code == 400
+    mock_db_manager.perform_read.assert_not_called()
+
+
+def test_get_stats_by_key(client, mock_db_manager):
+    db = MagicMock()
+    db.__getitem__.return_value.find_one.side_effect = lambda query: (
+        {"_id": "2024-01", "count": 7} if query == {"_id": "2024-01"} else None
+    )
+    mock_db_manager.perform_read.side_effect = lambda operations: operations(db)
+
+    response = client.get("/stats/months/2024-01")
+    missing = client.get("/stats/months/1990-01")
+
+    assert response.get_json() == {"dimension": "months", "key": "2024-01", "count": 7}
+    assert missing.status_code == 404
+
+
+def test_metrics(client):
+    client.get("/health")
+    client.get("/no/such/route")
+
+    response = client.get("/metrics")
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in text
+    assert "arxiv_harvest_pages_fetched_total" in text
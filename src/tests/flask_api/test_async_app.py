@@ -0,0 +1,203 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("motor")
+pytest.importorskip("asgiref")
+
+from bson.objectid import ObjectId
+
+from flask_api_crawler_arxiv.flask_api.asgi import RouteDispatcher
+from flask_api_crawler_arxiv.flask_api.app import application
+from flask_api_crawler_arxiv.flask_api.async_app import async_application
+from flask_api_crawler_arxiv.flask_api.ResponseCache import ResponseCache
+
+
+@pytest.fixture
+def mock_db_manager():
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.async_app.db_manager"
+    ) as mock_manager:
+        mock_manager.perform_read = AsyncMock()
+        yield mock_manager
+
+
+@pytest.fixture(autouse=True)
+def response_cache():
+    cache = ResponseCache(lambda: 0, {"RESPONSE_CACHE_MAX_ENTRIES": 16})
+    with patch("flask_api_crawler_arxiv.flask_api.async_app.response_cache", cache):
+        yield cache
+
+
+def _get(path, **kwargs):
+    async def request():
+        client = async_application.test_client()
+        response = await client.get(path, **kwargs)
+        return response, await response.get_data()
+
+    return asyncio.run(request())
+
+
+def test_get_article_by_id(mock_db_manager):
+    article_id = ObjectId()
+    mock_db_manager.perform_read.return_value = {"_id": article_id, "title": "A"}
+
+    response, body = _get(f"/article/{article_id}")
+    cached, _ = _get(f"/article/{article_id}")
+    not_modified, _ = _get(
+        f"/article/{article_id}",
+        headers={"If-None-Match": f'"{response.headers["ETag"].strip(chr(34))}"'},
+    )
+
+    assert response.status_code == 200
+    assert b'"title":"A"' in body
+    assert response.headers["X-Cache"] == "MISS"
+    assert cached.headers["X-Cache"] == "HIT"
+    assert not_modified.status_code == 304
+    mock_db_manager.perform_read.assert_awaited_once()
+
+
+def test_get_article_invalid_id(mock_db_manager):
+    response, _ = _get("/article/not-an-id")
+
+    assert response.status_code == 400
+    mock_db_manager.perform_read.assert_not_awaited()
+
+
+class _Cursor(list):
+    # Results readable by both drivers: iterated by pymongo, to_list by Motor
+    def sort(self, *args):
+        return self
+
+    def skip(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    async def to_list(self, length):
+        return list(self)
+
+
+def _mock_db(keys, articles):
+    db = MagicMock()
+    db.arxiv_data_doc.find.return_value = _Cursor(keys)
+    db.arxiv_data_doc.aggregate.return_value = _Cursor(articles)
+    return db
+
+
+def _mock_async_read(mock_db_manager, db):
+    async def perform_read(operations):
+        return await operations(db)
+
+    mock_db_manager.perform_read.side_effect = perform_read
+
+
+def test_get_articles_next_cursor(mock_db_manager):
+    from datetime import datetime
+
+    keys = [{"_id": ObjectId(), "datestamp": datetime(2024, 1, 18)} for _ in range(51)]
+    db = _mock_db(keys, keys[:50])
+    _mock_async_read(mock_db_manager, db)
+
+    response, body = _get("/articles/?title=neural")
+
+    assert response.status_code == 200
+    assert "X-Next-Cursor" in response.headers
+    query, _ = db.arxiv_data_doc.find.call_args.args
+    assert query["title"]["$regex"] == "neural"
+    pipeline = db.arxiv_data_doc.aggregate.call_args.args[0]
+    assert pipeline[0] == {
+        "$match": {"_id": {"$in": [key["_id"] for key in keys[:50]]}}
+    }
+
+
+@pytest.mark.parametrize(
+    "method, path, json",
+    [
+        ("GET", "/articles/?title=neural&fields=title", None),
+        ("GET", "/articles/?q=neural&page=2", None),
+        ("GET", "/articles/?cursor=invalid", None),
+        ("GET", "/articles/?page=0", None),
+        ("POST", "/articles/batch?fields=title", {"ids": ["oai:arXiv.org:1"]}),
+        ("POST", "/articles/batch", ["oai:arXiv.org:1"]),
+        ("POST", "/articles/batch", {"ids": []}),
+    ],
+)
+def test_parity_with_sync_app(mock_db_manager, method, path, json):
+    import json as json_module
+    from datetime import datetime
+
+    keys = [
+        {"_id": ObjectId(), "datestamp": datetime(2024, 1, 18), "score": 1.0}
+        for _ in range(51)
+    ]
+    articles = [
+        {**key, "identifier": f"oai:arXiv.org:{i}", "title": "A"}
+        for i, key in enumerate(keys[:50])
+    ]
+    db = _mock_db(keys, articles)
+    _mock_async_read(mock_db_manager, db)
+
+    sync_cache = ResponseCache(lambda: 0, {"RESPONSE_CACHE_MAX_ENTRIES": 16})
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.app.db_manager"
+    ) as sync_db_manager, patch(
+        "flask_api_crawler_arxiv.flask_api.app.response_cache", sync_cache
+    ):
+        sync_db_manager.perform_read.side_effect = lambda operations: operations(db)
+        sync_response = application.test_client().open(path, method=method, json=json)
+        sync_body = sync_response.get_data()
+    sync_calls = db.mock_calls
+    db.reset_mock(return_value=False, side_effect=False)
+
+    async def request():
+        client = async_application.test_client()
+        response = await client.open(path, method=method, json=json)
+        return response, await response.get_data()
+
+    async_response, async_body = asyncio.run(request())
+
+    assert async_response.status_code == sync_response.status_code
+    assert json_module.loads(async_body) == json_module.loads(sync_body)
+    assert db.mock_calls == sync_calls
+    for header in ("X-Next-Cursor", "Link"):
+        assert async_response.headers.get(header) == sync_response.headers.get(header)
+
+
+def test_get_articles_ranked_by_search_index_off_the_loop(mock_db_manager):
+    import threading
+
+    article_id = ObjectId()
+    db = _mock_db([{"_id": article_id}], [{"_id": article_id, "title": "A"}])
+    _mock_async_read(mock_db_manager, db)
+    threads = []
+
+    def search(text, limit):
+        threads.append(threading.current_thread())
+        return [(article_id, 1.0)]
+
+    search_index_reader = MagicMock()
+    search_index_reader.get.return_value.search.side_effect = search
+
+    with patch(
+        "flask_api_crawler_arxiv.flask_api.async_app.search_index_reader",
+        search_index_reader,
+    ):
+        response, body = _get("/articles/?q=neural")
+
+    assert response.status_code == 200
+    assert b'"title":"A"' in body
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_dispatcher_routes():
+    dispatcher = RouteDispatcher(async_application, application)
+
+    assert dispatcher.handles("/articles/", "GET")
+    assert dispatcher.handles("/stats/subjects", "GET")
+    assert not dispatcher.handles("/articles", "POST")
+    assert not dispatcher.handles("/articles/bulk", "POST")
+    assert not dispatcher.handles("/inject_data_to_mongodb", "GET")
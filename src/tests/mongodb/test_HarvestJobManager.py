@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from pymongo.errors import DuplicateKeyError
+
+from flask_api_crawler_arxiv.mongodb.HarvestJobManager import HarvestJobManager
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import UpsertReport
+
+
+class TestHarvestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.collection = self.db.__getitem__.return_value
+        self.manager = HarvestJobManager(self.db, stale_seconds=60)
+
+    def test_create_job(self):
+        self.collection.find.return_value = []
+
+        job, active_jobs = self.manager.create(["math", "cs", "math"])
+
+        self.assertEqual(active_jobs, [])
+        self.assertEqual(job["sets"], ["math", "cs"])
+        self.assertEqual(job["status"], "queued")
+        self.collection.insert_one.assert_called_once_with(job)
+        self.collection.find.assert_called_once_with(
+            {"sets": {"$in": ["math", "cs"]}, "active": True}
+        )
+
+    def test_create_returns_active_job(self):
+        active_job = {"_id": "active", "sets": ["cs"], "updated_at": datetime.utcnow()}
+        self.collection.find.return_value = [active_job]
+
+        job, active_jobs = self.manager.create(["cs"])
+
+        self.assertIsNone(job)
+        self.assertEqual(active_jobs, [active_job])
+        self.collection.insert_one.assert_not_called()
+
+    def test_create_queues_only_the_sets_without_active_job(self):
+        active_job = {"_id": "active", "sets": ["cs"], "updated_at": datetime.utcnow()}
+        self.collection.find.return_value = [active_job]
+
+        job, active_jobs = self.manager.create(["cs", "math"])
+
+        self.assertEqual(job["sets"], ["math"])
+        self.assertEqual(active_jobs, [active_job])
+
+    def test_create_retries_when_a_set_was_taken(self):
+        active_job = {"_id": "active", "sets": ["cs"], "updated_at": datetime.utcnow()}
+        self.collection.find.side_effect = [[], [active_job]]
+        self.collection.insert_one.side_effect = [DuplicateKeyError("duplicate"), None]
+
+        job, active_jobs = self.manager.create(["cs", "math"])
+
+        self.assertEqual(job["sets"], ["math"])
+        self.assertEqual(active_jobs, [active_job])
+
+    def test_create_replaces_abandoned_job(self):
+        abandoned_job = {
+            "_id": "abandoned",
+            "sets": ["cs"],
+            "updated_at": datetime.utcnow() - timedelta(minutes=5),
+        }
+        self.collection.find.return_value = [abandoned_job]
+
+        job, active_jobs = self.manager.create(["cs"])
+
+        self.assertEqual(job["sets"], ["cs"])
+        self.assertEqual(active_jobs, [])
+        filter_, update = self.collection.find_one_and_update.call_args.args
+        self.assertEqual(filter_, {"_id": "abandoned"})
+        self.assertEqual(update["$set"]["status"], "failed")
+        self.assertIn("active", update["$unset"])
+
+    def test_progress_and_finish(self):
+        self.manager.progress("abc", UpsertReport(inserted=2, updated=1))
+        self.manager.finish("abc")
+
+        _, update = self.collection.update_one.call_args.args
+        self.assertEqual(update["$inc"], {"inserted": 2, "updated": 1, "unchanged": 0})
+        _, update = self.collection.find_one_and_update.call_args.args
+        self.assertEqual(update["$set"]["status"], "succeeded")
+
+    def test_start_inactive_job(self):
+        self.collection.update_one.return_value.matched_count = 0
+
+        self.assertFalse(self.manager.start("abc"))
+        filter_, _ = self.collection.update_one.call_args.args
+        self.assertEqual(filter_, {"_id": "abc", "active": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
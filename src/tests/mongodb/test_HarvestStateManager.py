@@ -0,0 +1,64 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from flask_api_crawler_arxiv.mongodb.HarvestStateManager import HarvestStateManager
+
+
+class TestHarvestStateManager(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.collection = self.db.__getitem__.return_value
+        self.manager = HarvestStateManager(self.db)
+
+    def test_get_state(self):
+        self.collection.find_one.return_value = {"_id": "cs"}
+
+        self.assertEqual(self.manager.get_state("cs"), {"_id": "cs"})
+        self.collection.find_one.assert_called_once_with({"_id": "cs"})
+
+    def test_save_progress_keeps_greatest_datestamp(self):
+        self.manager.save_progress("cs", "token", datetime(2024, 1, 18))
+
+        filter_, update = self.collection.update_one.call_args.args
+        self.assertEqual(filter_, {"_id": "cs"})
+        self.assertEqual(update["$set"]["resumption_token"], "token")
+        self.assertEqual(update["$max"], {"pending_datestamp": datetime(2024, 1, 18)})
+
+    def test_complete_moves_watermark(self):
+        self.collection.find_one.return_value = {
+            "_id": "cs",
+            "pending_datestamp": datetime(2024, 1, 18),
+        }
+
+        self.manager.complete("cs")
+
+        _, update = self.collection.update_one.call_args.args
+        self.assertIsNone(update["$set"]["resumption_token"])
+        self.assertEqual(update["$max"], {"last_datestamp": datetime(2024, 1, 18)})
+        self.assertIn("pending_datestamp", update["$unset"])
+
+    def test_generation(self):
+        self.collection.find_one.return_value = None
+        self.assertEqual(self.manager.get_generation(), 0)
+
+        self.collection.find_one_and_update.return_value = {
+            "_id": "_generation",
+            "value": 3,
+        }
+        self.assertEqual(self.manager.bump_generation(), 3)
+        filter_, update = self.collection.find_one_and_update.call_args.args
+        self.assertEqual(filter_, {"_id": "_generation"})
+        self.assertEqual(update, {"$inc": {"value": 1}})
+
+    def test_complete_without_new_records(self):
+        self.collection.find_one.return_value = None
+
+        self.manager.complete("cs")
+
+        _, update = self.collection.update_one.call_args.args
+        self.assertNotIn("$max", update)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import MagicMock, call
+
+from flask_api_crawler_arxiv.mongodb.IndexManager import IndexManager
+
+
+class TestIndexManager(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.collection = self.db.__getitem__.return_value
+        self.manager = IndexManager(self.db)
+
+    def test_missing_indexes(self):
+        self.collection.index_information.return_value = {
+            "_id_": {},
+            "identifier_unique": {},
+        }
+
+        self.assertEqual(
+            self.manager.missing_indexes(), ["datestamp_id", "title_descriptions_text"]
+        )
+
+    def test_ensure_indexes_drops_legacy_indexes(self):
+        self.collection.index_information.return_value = {
+            "_id_": {},
+            "header_identifier_unique": {},
+            "title_description_text": {},
+        }
+
+        self.manager.ensure_indexes()
+
+        self.collection.drop_index.assert_has_calls(
+            [call("header_identifier_unique"), call("title_description_text")]
+        )
+        self.assertEqual(self.collection.drop_index.call_count, 2)
+        self.collection.create_indexes.assert_called_once()
+
+    def test_custom_indexes_drop_nothing(self):
+        manager = IndexManager(self.db, "arxiv_stats", indexes=[])
+
+        manager.ensure_indexes()
+
+        self.collection.index_information.assert_not_called()
+        self.collection.drop_index.assert_not_called()
+
+    def test_explain_flags_collscan(self):
+        cursor = self.collection.find.return_value
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.explain.return_value = {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "SORT",
+                    "inputStage": {"stage": "COLLSCAN"},
+                }
+            },
+            "executionStats": {
+                "totalKeysExamined": 0,
+                "totalDocsExamined": 1000,
+                "nReturned": 51,
+            },
+        }
+
+        plan = self.manager.explain({"title": "x"}, [("datestamp", 1)], limit=51)
+
+        self.assertEqual(plan["stages"], ["SORT", "COLLSCAN"])
+        self.assertTrue(plan["collscan"])
+        self.assertTrue(plan["in_memory_sort"])
+        self.assertEqual(plan["docs_examined"], 1000)
+        cursor.limit.assert_called_once_with(51)
+
+    def test_explain_index_scan(self):
+        cursor = self.collection.find.return_value
+        cursor.explain.return_value = {
+            "queryPlanner": {
+                "winningPlan": {
+                    "queryPlan": {
+                        "stage": "FETCH",
+                        "inputStage": {
+                            "stage": "IXSCAN",
+                            "indexName": "identifier_unique",
+                        },
+                    }
+                }
+            }
+        }
+
+        plan = self.manager.explain({"identifier": "oai:arXiv.org:0704.0001"})
+
+        self.assertEqual(plan["indexes"], ["identifier_unique"])
+        self.assertFalse(plan["collscan"])
+        self.assertIsNone(plan["returned"])
+        cursor.sort.assert_not_called()
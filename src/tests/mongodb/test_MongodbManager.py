@@ -56,6 +56,51 @@ class TestMongoDBManager(unittest.TestCase):
         self.assertIsNone(manager.client)
         self.assertIsNone(manager.db)
 
+    def test_open_connection_reuses_client(self):
+        # Ensure the client is created once and shared by the following calls
+        manager = MongoDBManager("mocked_connection_string", "mocked_database_name")
+
+        manager.open_connection()
+        client = manager.client
+        manager.open_connection()
+
+        self.assertIs(manager.client, client)
+        manager.close_connection()
+
+    def test_client_options_from_config(self):
+        # Ensure pool size and timeouts are read from the configuration
+        manager = MongoDBManager(
+            "mocked_connection_string",
+            "mocked_database_name",
+            {"MONGO_MAX_POOL_SIZE": "10", "MONGO_CONNECT_TIMEOUT_MS": "500"},
+        )
+
+        self.assertEqual(manager.client_options["maxPoolSize"], 10)
+        self.assertEqual(manager.client_options["connectTimeoutMS"], 500)
+        self.assertNotIn("socketTimeoutMS", manager.client_options)
+
+    def test_perform_read(self):
+        # Ensure perform_read() uses the read options and no session
+        manager = MongoDBManager(
+            "mocked_connection_string",
+            "mocked_database_name",
+            {"MONGO_READ_PREFERENCE": "secondaryPreferred"},
+        )
+
+        with patch.object(manager, "client", MagicMock()), patch.object(
+            manager, "db", MagicMock()
+        ):
+            result = manager.perform_read(lambda db: db)
+
+            manager.db.with_options.assert_called_once_with(
+                read_preference=manager.read_preference,
+                read_concern=manager.read_concern,
+            )
+            manager.client.start_session.assert_not_called()
+            self.assertIs(result, manager.db.with_options.return_value)
+
+        self.assertEqual(manager.read_preference.mongos_mode, "secondaryPreferred")
+
     def test_perform_transaction_success(self):
         # Ensure perform_transaction() executes successfully
         connection_string = "mocked_connection_string"
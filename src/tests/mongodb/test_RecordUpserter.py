@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from pymongo.errors import BulkWriteError
+
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import RecordUpserter, UpsertReport
+
+
+def _record(identifier, title):
+    return {
+        "identifier": identifier,
+        "datestamp": datetime(2024, 1, 18),
+        "title": title,
+    }
+
+
+class TestRecordUpserter(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.collection = self.db.__getitem__.return_value
+        self.upserter = RecordUpserter(chunk_size=2)
+
+    def test_content_hash_is_stable(self):
+        record = _record("oai:arXiv.org:1", "Title")
+        reordered = dict(reversed(list(record.items())))
+
+        self.assertEqual(
+            self.upserter.content_hash(record), self.upserter.content_hash(reordered)
+        )
+        self.assertNotEqual(
+            self.upserter.content_hash(record),
+            self.upserter.content_hash(_record("oai:arXiv.org:1", "Other")),
+        )
+
+    def test_upsert_skips_unchanged_records(self):
+        unchanged = _record("oai:arXiv.org:1", "Same")
+        updated = _record("oai:arXiv.org:2", "New title")
+        inserted = _record("oai:arXiv.org:3", "Brand new")
+        self.collection.find.side_effect = [
+            [
+                {
+                    "identifier": "oai:arXiv.org:1",
+                    "content_hash": self.upserter.content_hash(unchanged),
+                },
+                {"identifier": "oai:arXiv.org:2", "content_hash": "old"},
+            ],
+            [],
+        ]
+        self.collection.bulk_write.side_effect = [
+            MagicMock(upserted_count=0, modified_count=1),
+            MagicMock(upserted_count=1, modified_count=0),
+        ]
+
+        report = self.upserter.upsert(self.db, [unchanged, updated, inserted])
+
+        self.assertEqual(report, UpsertReport(inserted=1, updated=1, unchanged=1))
+        first_operations = self.collection.bulk_write.call_args_list[0].args[0]
+        self.assertEqual(len(first_operations), 1)
+        self.assertFalse(self.collection.bulk_write.call_args_list[0].kwargs["ordered"])
+
+    def test_upsert_reports_keys_of_deleted_records(self):
+        deleted = {
+            "identifier": "oai:arXiv.org:1",
+            "datestamp": datetime(2024, 3, 1),
+            "deleted": True,
+            "subjects": [],
+            "creators": [],
+            "dates": [],
+        }
+        self.collection.find.return_value = [
+            {
+                "identifier": "oai:arXiv.org:1",
+                "content_hash": "old",
+                "subjects": ["Quantum Physics"],
+                "creators": ["La Mura, Pierfrancesco"],
+                "dates": [datetime(2008, 2, 22)],
+                "datestamp": datetime(2024, 1, 18),
+            }
+        ]
+        self.collection.bulk_write.return_value = MagicMock(
+            upserted_count=0, modified_count=1
+        )
+
+        report = self.upserter.upsert(self.db, [deleted])
+
+        self.assertEqual(
+            report.previous_keys,
+            {
+                "subjects": {"Quantum Physics"},
+                "authors": {"La Mura, Pierfrancesco"},
+                "months": {"2008-02"},
+            },
+        )
+        self.assertNotIn("previous_keys", report.model_dump())
+
+    def test_upsert_collects_write_errors(self):
+        self.collection.find.return_value = []
+        self.collection.bulk_write.side_effect = BulkWriteError(
+            {
+                "nUpserted": 1,
+                "nModified": 0,
+                "writeErrors": [{"index": 1, "code": 2, "errmsg": "failed"}],
+            }
+        )
+        errors = []
+
+        report = self.upserter.upsert(
+            self.db,
+            [_record("oai:arXiv.org:1", "A"), _record("oai:arXiv.org:2", "B")],
+            errors,
+        )
+
+        self.assertEqual(report, UpsertReport(inserted=1))
+        self.assertEqual(errors, [("oai:arXiv.org:2", "failed")])
+
+        with self.assertRaises(BulkWriteError):
+            self.upserter.upsert(self.db, [_record("oai:arXiv.org:1", "A")])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            RecordUpserter(chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
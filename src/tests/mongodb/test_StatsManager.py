@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from flask_api_crawler_arxiv.mongodb.StatsManager import (
+    STATS_DIMENSIONS,
+    StatsManager,
+)
+
+
+class TestStatsManager(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.collections = {
+            dimension["collection"]: MagicMock()
+            for dimension in STATS_DIMENSIONS.values()
+        }
+        self.db.__getitem__.side_effect = lambda name: self.collections[name]
+        self.manager = StatsManager(self.db, chunk_size=2)
+
+    def test_incremental_refresh_recounts_changed_keys(self):
+        def aggregate(pipeline, allowDiskUse):
+            if "$gte" in str(pipeline[0]):
+                # Keys of the articles harvested since the watermark
+                return [{"_id": "Quantum Physics"}, {"_id": None}]
+            return [{"_id": "Quantum Physics", "count": 12}]
+
+        self.db.arxiv_data_doc.aggregate.side_effect = aggregate
+
+        written = self.manager.refresh(datetime(2024, 1, 18))
+
+        self.assertEqual(written, {"subjects": 1, "authors": 1, "months": 1})
+        subjects = self.collections["stats_by_subject"]
+        (operations,), _ = subjects.bulk_write.call_args
+        self.assertEqual(operations[0]._filter, {"_id": "Quantum Physics"})
+        self.assertEqual(operations[0]._doc["$set"]["count"], 12)
+
+        count_pipeline = self.db.arxiv_data_doc.aggregate.call_args_list[1].args[0]
+        self.assertEqual(
+            count_pipeline[0]["$match"]["subjects"], {"$in": ["Quantum Physics"]}
+        )
+        self.assertTrue(count_pipeline[0]["$match"]["deleted"])
+
+        (stale,), _ = subjects.delete_many.call_args
+        self.assertEqual(stale["_id"], {"$in": ["Quantum Physics"]})
+        self.assertIn("$ne", stale["refresh_id"])
+
+    def test_incremental_refresh_recounts_keys_of_deleted_articles(self):
+        def aggregate(pipeline, allowDiskUse):
+            if "$gte" in str(pipeline[0]):
+                # The deleted article has no subject left
+                return []
+            return [{"_id": "Quantum Physics", "count": 11}]
+
+        self.db.arxiv_data_doc.aggregate.side_effect = aggregate
+
+        written = self.manager.refresh(
+            datetime(2024, 1, 18), {"subjects": {"Quantum Physics", "Astrophysics"}}
+        )
+
+        self.assertEqual(written, {"subjects": 1, "authors": 0, "months": 0})
+        subjects = self.collections["stats_by_subject"]
+        (operations,), _ = subjects.bulk_write.call_args
+        self.assertEqual(operations[0]._doc["$set"]["count"], 11)
+        # Astrophysics has no article left, its key is removed
+        (stale,), _ = subjects.delete_many.call_args
+        self.assertEqual(
+            sorted(stale["_id"]["$in"]), ["Astrophysics", "Quantum Physics"]
+        )
+
+    def test_refresh_without_changes(self):
+        self.db.arxiv_data_doc.aggregate.return_value = []
+
+        written = self.manager.refresh(datetime(2024, 1, 18))
+
+        self.assertEqual(written, {"subjects": 0, "authors": 0, "months": 0})
+        for collection in self.collections.values():
+            collection.bulk_write.assert_not_called()
+            collection.delete_many.assert_not_called()
+
+    def test_full_refresh_writes_by_chunks(self):
+        self.db.arxiv_data_doc.aggregate.side_effect = lambda pipeline, allowDiskUse: [
+            {"_id": f"key {n}", "count": n} for n in range(1, 4)
+        ]
+
+        written = self.manager.refresh()
+
+        self.assertEqual(written["months"], 3)
+        months = self.collections["stats_by_month"]
+        self.assertEqual(months.bulk_write.call_count, 2)
+        (stale,), _ = months.delete_many.call_args
+        self.assertNotIn("_id", stale)
+
+    def test_top_sorted_by_key(self):
+        self.manager.top("months", 12, sort="key")
+
+        months = self.collections["stats_by_month"]
+        months.find.return_value.sort.assert_called_once_with([("_id", 1)])
+        months.find.return_value.sort.return_value.limit.assert_called_once_with(12)
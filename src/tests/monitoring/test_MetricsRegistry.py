@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from flask_api_crawler_arxiv.monitoring.MetricsRegistry import MetricsRegistry
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram(
+        "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1)
+    )
+
+    requests.inc(labels=("/a",))
+    requests.inc(2, ("/a",))
+    latency.observe(0.05, ("/a",))
+    latency.observe(0.5, ("/a",))
+    latency.observe(3, ("/a",))
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 3.55' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_declaration_is_idempotent():
+    registry = MetricsRegistry()
+
+    assert registry.counter("a_total", "A.") is registry.counter("a_total", "A.")
+    with pytest.raises(ValueError):
+        registry.gauge("a_total", "A.")
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("a_total", "A.", ("shape",)).inc(labels=('say "hi"\n',))
+
+    assert 'a_total{shape="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_snapshots_of_processes_are_merged(tmp_path):
+    config = {"METRICS_DIR": str(tmp_path), "METRICS_FLUSH_SECONDS": 60}
+    harvest = MetricsRegistry()
+    harvest.configure(config, "harvest")
+    harvest.counter("pages_total", "Pages.").inc(4)
+    harvest.gauge("connections", "Connections.").set(2)
+    harvest.flush()
+
+    worker = MetricsRegistry()
+    worker.configure(config, "api-1")
+    worker.counter("pages_total", "Pages.").inc(1)
+    worker.gauge("connections", "Connections.").set(5)
+
+    text = worker.render()
+
+    assert "pages_total 5" in text
+    assert 'connections{process="api-1"} 5' in text
+    assert 'connections{process="harvest"} 2' in text
+
+
+def test_stale_gauges_are_dropped(tmp_path):
+    with open(tmp_path / "api-2.json", "w") as file:
+        json.dump(
+            {
+                "pages_total": {
+                    "kind": "counter",
+                    "documentation": "Pages.",
+                    "labelnames": [],
+                    "samples": [[[], 3]],
+                },
+                "connections": {
+                    "kind": "gauge",
+                    "documentation": "Connections.",
+                    "labelnames": [],
+                    "samples": [[[], 7]],
+                },
+            },
+            file,
+        )
+    os.utime(tmp_path / "api-2.json", (0, 0))
+
+    registry = MetricsRegistry()
+    registry.configure({"METRICS_DIR": str(tmp_path)}, "api-1")
+    text = registry.render()
+
+    assert "pages_total 3" in text
+    assert 'process="api-2"' not in text
+
+
+def test_snapshot_is_resumed(tmp_path):
+    config = {"METRICS_DIR": str(tmp_path)}
+    former = MetricsRegistry()
+    former.configure(config, "harvest")
+    former.counter("pages_total", "Pages.").inc(4)
+    former.histogram("latency_seconds", "Latency.", buckets=(1,)).observe(0.5)
+    former.flush()
+
+    registry = MetricsRegistry()
+    registry.configure(config, "harvest")
+    registry.counter("pages_total", "Pages.").inc()
+
+    text = registry.render()
+    assert "pages_total 5" in text
+    assert "latency_seconds_count 1" in text
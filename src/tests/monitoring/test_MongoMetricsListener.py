@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from flask_api_crawler_arxiv.monitoring.MongoMetricsListener import (
+    COMMAND_DURATION,
+    MongoCommandMetrics,
+    command_shape,
+    mongo_event_listeners,
+)
+
+
+def test_command_shape():
+    assert command_shape(
+        "find",
+        {
+            "find": "arxiv_data_doc",
+            "filter": {
+                "$or": [
+                    {"datestamp": {"$gt": 1}},
+                    {"datestamp": 1, "_id": {"$gt": 2}},
+                ]
+            },
+        },
+    ) == ("arxiv_data_doc", "$or(_id,datestamp|datestamp)")
+    assert command_shape(
+        "aggregate",
+        {
+            "aggregate": "arxiv_data_doc",
+            "pipeline": [{"$match": {"subjects": "a"}}, {"$group": {}}],
+        },
+    ) == ("arxiv_data_doc", "$match(subjects),$group")
+    assert command_shape(
+        "update",
+        {"update": "arxiv_data_doc", "updates": [{"q": {"identifier": "x"}}]},
+    ) == ("arxiv_data_doc", "identifier")
+    assert command_shape("getMore", {"getMore": 1, "collection": "a"}) == ("a", "")
+    assert command_shape("ping", {"ping": 1}) == ("", "")
+
+
+def test_command_duration_is_recorded():
+    listener = MongoCommandMetrics()
+    labels = ("find", "test_listener", "title")
+
+    listener.started(
+        SimpleNamespace(
+            command_name="find",
+            command={"find": "test_listener", "filter": {"title": "a"}},
+            connection_id=("localhost", 27017),
+            request_id=1,
+        )
+    )
+    listener.succeeded(
+        SimpleNamespace(
+            connection_id=("localhost", 27017), request_id=1, duration_micros=2500
+        )
+    )
+
+    samples = dict(
+        (tuple(series), value) for series, value in COMMAND_DURATION.samples()
+    )
+    counts, total = samples[labels]
+    assert sum(counts) == 1
+    assert total == 0.0025
+
+
+def test_listeners_can_be_disabled():
+    assert len(mongo_event_listeners({"METRICS_ENABLED": "True"})) == 2
+    assert mongo_event_listeners({"METRICS_ENABLED": "False"}) == []
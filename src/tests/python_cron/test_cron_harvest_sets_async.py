@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordPage
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import UpsertReport
+from flask_api_crawler_arxiv.python_cron.cron_harvest_sets_async import (
+    HostRateLimiter,
+    _AsyncHarvestOptions,
+    _harvest_sets,
+)
+
+MODULE = "flask_api_crawler_arxiv.python_cron.cron_harvest_sets_async"
+
+app_config = {
+    "ARXHOST": "http://export.arxiv.org/oai2",
+    "ARXSET": "cs",
+    "ARXCHECKTIMEMINUTES": 120,
+    "ARXTIMEOUT": 120,
+}
+
+
+def _page(arxset, number, token):
+    return ListRecordPage(xml=f"{arxset}|{number}", resumption_token=token)
+
+
+class _FakeListRecordOAI:
+    def __init__(self, app_config_dict, session=None, throttle=None):
+        self.arxset = app_config_dict["ARXSET"]
+
+    def harvest(self, from_date=None, until_date=None, resumption_token=None):
+        if self.arxset == "broken":
+            raise RuntimeError("arXiv unavailable")
+        yield _page(self.arxset, 1, "token")
+        yield _page(self.arxset, 2, None)
+
+
+def _records(xml, keep_raw=False):
+    arxset, number = xml.split("|")
+    return [
+        {
+            "identifier": f"oai:arXiv.org:{arxset}.{number}",
+            "datestamp": datetime(2024, 1, int(number)),
+        }
+    ]
+
+
+def test_rate_limiter_spaces_requests_to_a_host():
+    async def run():
+        limiter = HostRateLimiter(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(limiter.wait("export.arxiv.org") for _ in range(3)))
+        await limiter.wait("other.host")
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+
+    assert 0.1 <= elapsed < 0.5
+
+
+def test_harvest_sets_pipeline():
+    manager = MagicMock()
+    upserter = MagicMock()
+    upserter.upsert.side_effect = lambda db, records: UpsertReport(
+        inserted=len(records)
+    )
+
+    with patch(f"{MODULE}.ListRecordOAI", _FakeListRecordOAI), patch(
+        f"{MODULE}.RecordUpserter", return_value=upserter
+    ), patch(f"{MODULE}.HarvestStateManager") as mock_state_manager, patch(
+        f"{MODULE}.RecordConverterOAI"
+    ) as mock_converter:
+        state_manager = mock_state_manager.return_value
+        state_manager.get_state.return_value = None
+        mock_converter.return_value.iter_normalized_records.side_effect = _records
+
+        reports, states = asyncio.run(
+            _harvest_sets(
+                app_config,
+                ["cs", "broken", "math"],
+                manager,
+                _AsyncHarvestOptions(ARXREQUESTINTERVALSECONDS=0),
+                logging.getLogger(__name__),
+            )
+        )
+
+    assert reports == {
+        "cs": UpsertReport(inserted=2),
+        "math": UpsertReport(inserted=2),
+    }
+    assert states == {"cs": None, "broken": None, "math": None}
+
+    completed = [call.args[0] for call in state_manager.complete.call_args_list]
+    assert sorted(completed) == ["cs", "math"]
+
+    # Pages of a set are saved in order, the token of the last page is None
+    cs_progress = [
+        call.args[1:]
+        for call in state_manager.save_progress.call_args_list
+        if call.args[0] == "cs"
+    ]
+    assert cs_progress == [
+        ("token", datetime(2024, 1, 1)),
+        (None, datetime(2024, 1, 2)),
+    ]
+
+
+def test_parse_and_write_errors_only_fail_their_set():
+    manager = MagicMock()
+    upserter = MagicMock()
+
+    def upsert(db, records):
+        if records[0]["identifier"].startswith("oai:arXiv.org:math"):
+            raise RuntimeError("write failed")
+        return UpsertReport(inserted=len(records))
+
+    def records(xml, keep_raw=False):
+        if xml == "physics|2":
+            raise RuntimeError("parse failed")
+        return _records(xml, keep_raw)
+
+    upserter.upsert.side_effect = upsert
+
+    with patch(f"{MODULE}.ListRecordOAI", _FakeListRecordOAI), patch(
+        f"{MODULE}.RecordUpserter", return_value=upserter
+    ), patch(f"{MODULE}.HarvestStateManager") as mock_state_manager, patch(
+        f"{MODULE}.RecordConverterOAI"
+    ) as mock_converter:
+        state_manager = mock_state_manager.return_value
+        state_manager.get_state.return_value = None
+        mock_converter.return_value.iter_normalized_records.side_effect = records
+
+        reports, _ = asyncio.run(
+            _harvest_sets(
+                app_config,
+                ["cs", "physics", "math"],
+                manager,
+                _AsyncHarvestOptions(ARXREQUESTINTERVALSECONDS=0),
+                logging.getLogger(__name__),
+            )
+        )
+
+    assert reports == {"cs": UpsertReport(inserted=2)}
+    completed = [call.args[0] for call in state_manager.complete.call_args_list]
+    assert completed == ["cs"]
+
+    # The failed sets keep the resumption point of their last page written
+    progress = [call.args[:2] for call in state_manager.save_progress.call_args_list]
+    assert ("physics", "token") in progress
+    assert ("physics", None) not in progress
+    assert not [arxset for arxset, _ in progress if arxset == "math"]
@@ -0,0 +1,60 @@
+import logging
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordPage
+from flask_api_crawler_arxiv.python_cron.cron_inject_data_mongodb import (
+    _harvest_pages,
+)
+
+STATE = {"last_datestamp": datetime(2024, 1, 18), "resumption_token": "token|1001"}
+UNTIL = date(2024, 2, 1)
+logger = logging.getLogger(__name__)
+
+
+def _pages(*items):
+    # Pages of a harvest, an exception stops it like a failed request
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def test_expired_token_restarts_window():
+    service = MagicMock()
+    window_page = ListRecordPage(xml="<window/>")
+    service.harvest.side_effect = [
+        _pages(RuntimeError("503")),
+        _pages(window_page),
+    ]
+
+    pages = list(_harvest_pages(service, STATE, UNTIL, logger))
+
+    assert pages == [window_page]
+    service.harvest.assert_called_with(from_date=date(2024, 1, 18), until_date=UNTIL)
+
+
+def test_bad_resumption_token_restarts_window():
+    service = MagicMock()
+    error_page = ListRecordPage(xml='<error code="badResumptionToken">gone</error>')
+    window_page = ListRecordPage(xml="<window/>")
+    service.harvest.side_effect = [_pages(error_page), _pages(window_page)]
+
+    pages = list(_harvest_pages(service, STATE, UNTIL, logger))
+
+    assert pages == [window_page]
+
+
+def test_failure_after_resuming_is_raised():
+    service = MagicMock()
+    first_page = ListRecordPage(xml="<page/>", resumption_token="token|2001")
+    service.harvest.return_value = _pages(first_page, RuntimeError("503"))
+
+    pages = _harvest_pages(service, STATE, UNTIL, logger)
+
+    assert next(pages) == first_page
+    with pytest.raises(RuntimeError):
+        next(pages)
+    service.harvest.assert_called_once_with(resumption_token="token|1001")
@@ -0,0 +1,89 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from flask_api_crawler_arxiv.arxiv_services.ListRecordOAI import ListRecordPage
+from flask_api_crawler_arxiv.mongodb.RecordUpserter import UpsertReport
+from flask_api_crawler_arxiv.python_cron.harvest_pipeline import run_harvest_pipeline
+
+RECORD = """<record><header><identifier>oai:arXiv.org:{number}</identifier>
+<datestamp>2024-01-{day:02d}</datestamp><setSpec>cs</setSpec></header>
+<metadata><oai_dc:dc><dc:title>Title {number}</dc:title></oai_dc:dc></metadata></record>"""
+
+
+def _pages(count, records_per_page=2):
+    pages = []
+    for page_number in range(count):
+        records = "".join(
+            RECORD.format(
+                number=page_number * records_per_page + index,
+                day=page_number + 1,
+            )
+            for index in range(records_per_page)
+        )
+        token = f"token|{page_number + 1}" if page_number < count - 1 else None
+        pages.append(
+            ListRecordPage(
+                xml=f"<OAI-PMH><ListRecords>{records}</ListRecords></OAI-PMH>",
+                resumption_token=token,
+            )
+        )
+    return pages
+
+
+@pytest.mark.parametrize("parse_workers, write_workers", [(0, 1), (0, 3), (2, 2)])
+def test_pipeline_writes_all_pages_and_saves_progress_in_order(
+    parse_workers, write_workers
+):
+    written = []
+    progress = []
+    lock = threading.Lock()
+
+    def write_records(records):
+        # Later pages are written faster, to reorder concurrent writers
+        time.sleep(0.01 * (3 - int(records[0]["identifier"].split(":")[-1]) % 3))
+        with lock:
+            written.extend(record["identifier"] for record in records)
+        return UpsertReport(inserted=len(records))
+
+    report = run_harvest_pipeline(
+        iter(_pages(6)),
+        write_records,
+        lambda token, datestamp: progress.append((token, datestamp)),
+        {
+            "ARXPARSEWORKERS": parse_workers,
+            "ARXWRITEWORKERS": write_workers,
+            "ARXPIPELINEQUEUESIZE": 1,
+        },
+        keep_raw=False,
+    )
+
+    assert report == UpsertReport(inserted=12)
+    assert sorted(written) == sorted(f"oai:arXiv.org:{n}" for n in range(12))
+    assert progress == [
+        (f"token|{n + 1}" if n < 5 else None, datetime(2024, 1, n + 1))
+        for n in range(6)
+    ]
+
+
+def test_pipeline_stops_on_write_error():
+    progress = []
+
+    def write_records(records):
+        raise ValueError("write failed")
+
+    def pages():
+        yield from _pages(100)
+
+    with pytest.raises(ValueError):
+        run_harvest_pipeline(
+            pages(),
+            write_records,
+            lambda token, datestamp: progress.append(token),
+            {"ARXPARSEWORKERS": 0, "ARXPIPELINEQUEUESIZE": 1},
+            keep_raw=False,
+        )
+
+    assert progress == []
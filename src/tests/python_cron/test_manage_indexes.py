@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock, patch
+
+from flask_api_crawler_arxiv.python_cron.manage_indexes import (
+    explain_articles_queries,
+    unexpected_scans,
+)
+
+MODULE = "flask_api_crawler_arxiv.python_cron.manage_indexes"
+
+
+@patch(f"{MODULE}.IndexManager")
+def test_explain_keys_queries(index_manager):
+    index_manager.return_value.explain.return_value = {"collscan": True}
+
+    plans = explain_articles_queries(MagicMock(), limit=51)
+
+    projections = [
+        call.args[2] for call in index_manager.return_value.explain.call_args_list
+    ]
+    # The listings are explained with the projection and sort sent by keys_query
+    assert {"datestamp": 1} in projections
+    assert {"score": {"$meta": "textScore"}} in projections
+    assert plans["title"]["expected_scan"]
+    assert not plans["list"]["expected_scan"]
+
+
+def test_unexpected_scans():
+    plans = {
+        "title": {"collscan": True, "expected_scan": True},
+        "list": {"collscan": False, "expected_scan": False},
+        "by_identifier": {"collscan": True, "expected_scan": False},
+    }
+
+    assert unexpected_scans(plans) == ["by_identifier"]
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, patch
+
+from pymongo.errors import BulkWriteError
+
+from flask_api_crawler_arxiv.python_cron.migrate_normalized_schema import (
+    migrate_normalized_schema,
+)
+
+MODULE = "flask_api_crawler_arxiv.python_cron.migrate_normalized_schema"
+
+app_config = {
+    "MONGO_INITDB_ROOT_USERNAME": "user",
+    "MONGO_INITDB_ROOT_PASSWORD": "password",
+    "MONGO_CONTAINER_NAME": "mongodb",
+    "MONGO_DOCKER_PORT": 27017,
+    "MONGO_INITDB_DATABASE": "arxiv",
+}
+
+
+def _legacy(document_id, identifier):
+    return {
+        "_id": document_id,
+        "header": {"identifier": identifier, "datestamp": "2024-01-18"},
+        "metadata": {"oai_dc:dc": {"dc:title": f"Title {document_id}"}},
+    }
+
+
+def _cursor(documents):
+    cursor = MagicMock()
+    cursor.sort.return_value.limit.return_value = documents
+    return cursor
+
+
+@patch(f"{MODULE}.HarvestStateManager")
+@patch(f"{MODULE}.StatsManager")
+@patch(f"{MODULE}.IndexManager")
+@patch(f"{MODULE}.MongoDBManager")
+def test_conflicts_deleted_only_when_harvested_again(
+    manager_class, index_manager, stats_manager, harvest_state
+):
+    collection = manager_class.return_value.db.arxiv_data_doc
+    collection.find.side_effect = [
+        _cursor([_legacy(1, "oai:arXiv.org:1"), _legacy(2, "oai:arXiv.org:2")]),
+        [{"_id": 10, "identifier": "oai:arXiv.org:1"}],
+        _cursor([]),
+    ]
+    collection.bulk_write.side_effect = BulkWriteError(
+        {
+            "nModified": 0,
+            "writeErrors": [
+                {"index": 0, "code": 11000},
+                {"index": 1, "code": 11000},
+            ],
+        }
+    )
+
+    migrate_normalized_schema(app_config)
+
+    index_manager.return_value.ensure_indexes.assert_called_once()
+    collection.delete_many.assert_called_once_with({"_id": {"$in": [1]}})
+    assert collection.find.call_args_list[2].args[0]["_id"] == {"$gt": 2}
+    manager_class.return_value.close_connection.assert_called_once()
@@ -0,0 +1,114 @@
+import pytest
+from bson.objectid import ObjectId
+
+from flask_api_crawler_arxiv.search.InvertedIndex import (
+    InvertedIndex,
+    SearchIndexReader,
+    document_terms,
+    tokenize,
+    update_search_index,
+)
+
+
+def _article(title, description, creator="La Mura, Pierfrancesco", subjects=None):
+    return {
+        "_id": ObjectId(),
+        "title": title,
+        "descriptions": [description, "Comment: 7 pages"],
+        "creators": creator if isinstance(creator, list) else [creator],
+        "subjects": subjects or ["Quantum Physics"],
+    }
+
+
+@pytest.fixture
+def articles():
+    return [
+        _article("Projective Expected Utility", "quantum decision theory"),
+        _article(
+            "New probabilistic interest measures for association rules",
+            "mining association rules",
+            creator=["Hahsler, Michael", "Hornik, Kurt"],
+            subjects=["Computer Science - Databases"],
+        ),
+        _article("Graph neural networks", "deep learning on graphs"),
+    ]
+
+
+def test_tokenize():
+    assert tokenize("The Quantum-mechanical generalization of a theory") == [
+        "quantum",
+        "mechanical",
+        "generalization",
+        "theory",
+    ]
+
+
+def test_document_terms_of_deleted_record():
+    assert document_terms({"_id": ObjectId(), "deleted": True}) == []
+
+
+def test_search_ranks_by_bm25(articles):
+    index = InvertedIndex()
+    for article in articles:
+        index.add_document(article)
+
+    results = index.search("association rules hahsler")
+
+    assert [article_id for article_id, _ in results] == [articles[1]["_id"]]
+    assert len(index.search("quantum", limit=1, offset=1)) == 1
+    assert index.search("quantum", limit=1, offset=2) == []
+
+
+def test_save_load_and_update(articles, tmp_path):
+    path = str(tmp_path / "articles.idx")
+    index = InvertedIndex()
+    for article in articles:
+        index.add_document(article)
+    index.save(path)
+
+    loaded = InvertedIndex.load(path)
+    assert loaded.document_count == 3
+    assert loaded.search("graphs") == index.search("graphs")
+
+    articles[2]["title"] = "Transformers"
+    articles[2]["descriptions"] = ["attention"]
+    loaded.add_document(articles[2])
+    loaded.add_document(_article("Quantum graphs", "spectral theory"))
+    loaded.save(path)
+
+    updated = InvertedIndex.load(path)
+    assert updated.document_count == 4
+    assert updated.search("transformers")[0][0] == articles[2]["_id"]
+    assert len(updated.search("graph graphs")) == 1
+
+
+def test_update_removes_deleted_articles(articles, tmp_path):
+    from unittest.mock import MagicMock
+
+    path = str(tmp_path / "articles.idx")
+    index = InvertedIndex()
+    for article in articles:
+        index.add_document(article)
+    index.save(path)
+
+    # The first article was removed as a duplicate, no article was harvested since
+    db = MagicMock()
+    db.arxiv_data_doc.find.side_effect = lambda query, projection: (
+        [
+            {"_id": article["_id"]}
+            for article in articles[1:]
+            if article["_id"] in query["_id"]["$in"]
+        ]
+        if projection == {"_id": 1}
+        else []
+    )
+
+    updated = update_search_index(db, path, since="2024-01-18")
+
+    assert updated.document_count == 2
+    assert updated.search("expected utility") == []
+    assert InvertedIndex.load(path).document_count == 2
+
+
+def test_reader_without_index(tmp_path):
+    assert SearchIndexReader(str(tmp_path / "missing.idx")).get() is None
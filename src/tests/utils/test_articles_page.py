@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from werkzeug.datastructures import MultiDict
+
+from flask_api_crawler_arxiv.utils.articles_page import (
+    batch_body_args,
+    keys_query,
+    next_page,
+    page_pipeline,
+    parse_articles_args,
+)
+from flask_api_crawler_arxiv.utils.keyset_cursor import decode_cursor
+
+
+def test_keyset_page():
+    articles_args = parse_articles_args(MultiDict({"title": "neural", "page": "3"}))
+    keys = [{"_id": ObjectId(), "datestamp": datetime(2024, 1, 18)} for _ in range(3)]
+
+    query = keys_query(articles_args, per_page=2)
+    pipeline, last_key = page_pipeline(articles_args, keys, per_page=2)
+    next_args, next_cursor = next_page({"page": "3"}, articles_args, last_key)
+
+    assert query["skip"] == 4
+    assert query["limit"] == 3
+    assert pipeline[0] == {"$match": {"_id": {"$in": [keys[0]["_id"], keys[1]["_id"]]}}}
+    assert last_key == keys[1]
+    assert next_args == {"cursor": next_cursor}
+    assert decode_cursor(next_cursor)["$or"][1]["_id"] == {"$gt": keys[1]["_id"]}
+
+
+def test_ranked_page():
+    articles_args = parse_articles_args(MultiDict({"q": "neural"}))
+    keys = [{"_id": ObjectId(), "score": 2.0}, {"_id": ObjectId(), "score": 1.0}]
+
+    pipeline, last_key = page_pipeline(articles_args, keys, per_page=2)
+
+    assert last_key is None
+    assert pipeline[1]["$addFields"]["_rank"]["$indexOfArray"][0] == [
+        key["_id"] for key in keys
+    ]
+    assert next_page({"q": "neural"}, articles_args) == (
+        {"q": "neural", "page": 2},
+        None,
+    )
+
+
+@pytest.mark.parametrize("page", ["0", "-3"])
+def test_page_below_one(page):
+    with pytest.raises(ValueError, match="Invalid page"):
+        parse_articles_args(MultiDict({"page": page}))
+
+
+def test_batch_body_args():
+    args = MultiDict({"fields": "title", "view": "summary"})
+
+    assert batch_body_args({"ids": ["a"], "view": "full"}, args) == (
+        ["a"],
+        "title",
+        "full",
+    )
+    with pytest.raises(ValueError, match="Invalid or incomplete document"):
+        batch_body_args(["a"], args)
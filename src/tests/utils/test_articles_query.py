@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from flask_api_crawler_arxiv.utils.articles_query import (
+    TEXT_SCORE_SORT,
+    build_articles_query,
+)
+from flask_api_crawler_arxiv.utils.keyset_cursor import KEYSET_SORT
+
+
+def test_listing_sorted_by_keyset():
+    assert build_articles_query() == ({}, KEYSET_SORT)
+
+
+def test_filters_and_cursor():
+    keyset_query = {"$or": [{"datestamp": {"$gt": datetime(2024, 1, 1)}}]}
+
+    query, sort = build_articles_query(
+        title="a.b",
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2024, 1, 31),
+        keyset_query=keyset_query,
+    )
+
+    assert query["title"] == {"$regex": r"a\.b", "$options": "i"}
+    assert query["datestamp"] == {
+        "$gte": datetime(2024, 1, 1),
+        "$lte": datetime(2024, 1, 31),
+    }
+    assert query["$or"] == keyset_query["$or"]
+    assert sort == KEYSET_SORT
+
+
+def test_search_ranked_by_text_score():
+    query, sort = build_articles_query(search="neural", keyset_query={"$or": []})
+
+    assert query == {"$text": {"$search": "neural"}}
+    assert sort == TEXT_SCORE_SORT
@@ -0,0 +1,30 @@
+import pytest
+
+from flask_api_crawler_arxiv.utils.field_projection import build_projection
+
+
+def test_full_view_hides_harvest_fields():
+    assert build_projection() == {"raw": 0, "content_hash": 0}
+
+
+def test_fields_and_required_fields():
+    assert build_projection("title, description", required_fields=("datestamp",)) == {
+        "title": 1,
+        "descriptions": 1,
+        "datestamp": 1,
+    }
+
+
+def test_summary_view():
+    projection = build_projection(view="summary")
+
+    assert "creators" in projection
+    assert "descriptions" not in projection
+
+
+@pytest.mark.parametrize(
+    "fields, view", [("password", None), ("title.$where", None), (None, "huge")]
+)
+def test_invalid_projection(fields, view):
+    with pytest.raises(ValueError):
+        build_projection(fields, view)
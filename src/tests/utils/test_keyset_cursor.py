@@ -0,0 +1,24 @@
+import pytest
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from flask_api_crawler_arxiv.utils.keyset_cursor import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    last_id = ObjectId("657dd0d2253a61b7d7eefff8")
+    token = encode_cursor({"_id": last_id, "datestamp": datetime(2024, 1, 18)})
+
+    assert decode_cursor(token) == {
+        "$or": [
+            {"datestamp": {"$gt": datetime(2024, 1, 18)}},
+            {"datestamp": datetime(2024, 1, 18), "_id": {"$gt": last_id}},
+        ]
+    }
+
+
+@pytest.mark.parametrize("token", ["not a cursor", "e30=", "eyJkIjogMSwgImkiOiAyfQ=="])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
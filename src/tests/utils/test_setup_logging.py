@@ -0,0 +1,92 @@
+import io
+import json
+import logging
+import logging.handlers
+
+import pytest
+from pydantic import ValidationError
+
+from flask_api_crawler_arxiv.utils import setup_logging as logging_module
+from flask_api_crawler_arxiv.utils.setup_logging import (
+    JsonFormatter,
+    _LoggingOptions,
+    setup_logging,
+)
+
+
+@pytest.fixture
+def unconfigured():
+    root = logging.getLogger()
+    level = root.level
+    saved = dict(logging_module._state)
+    logging_module._state.update(options=None, handlers=[], listener=None)
+    yield
+    logging_module._stop_listener()
+    for handler in logging_module._state["handlers"]:
+        root.removeHandler(handler)
+    root.setLevel(level)
+    logging_module._state.update(saved)
+
+
+def test_options_defaults_and_levels():
+    options = _LoggingOptions(LOG_LEVEL="debug", LOG_LEVELS="pymongo=warning, ,x=")
+
+    assert options.level == "DEBUG"
+    assert options.use_queue is True
+    assert options.json_output is False
+    assert options.logger_levels() == {"pymongo": "WARNING"}
+
+    with pytest.raises(ValidationError):
+        _LoggingOptions(LOG_LEVEL="LOUD")
+
+
+def test_options_unknown_logger_level():
+    with pytest.raises(ValidationError) as error:
+        _LoggingOptions(LOG_LEVELS="pymongo=WARNING,urllib3=LOUD")
+
+    message = str(error.value)
+    assert "Unknown log level LOUD for logger urllib3" in message
+    assert "CRITICAL, ERROR, WARNING, INFO, DEBUG, NOTSET" in message
+
+
+def test_json_formatter():
+    record = logging.LogRecord(
+        "arxiv", logging.INFO, __file__, 1, "Harvested %s pages", (3,), None
+    )
+
+    document = json.loads(JsonFormatter().format(record))
+
+    assert document["message"] == "Harvested 3 pages"
+    assert document["level"] == "INFO"
+    assert document["logger"] == "arxiv"
+
+
+def test_setup_logging_once(unconfigured):
+    setup_logging(
+        {"LOG_LEVEL": "WARNING", "LOG_LEVELS": "pymongo=ERROR", "LOG_JSON": ""}
+    )
+    handlers = list(logging_module._state["handlers"])
+
+    setup_logging({"LOG_LEVEL": "DEBUG"})
+
+    root = logging.getLogger()
+    assert root.level == logging.WARNING
+    assert logging.getLogger("pymongo").level == logging.ERROR
+    assert logging_module._state["handlers"] == handlers
+    assert isinstance(handlers[0], logging.handlers.QueueHandler)
+    assert handlers[0] in root.handlers
+    logging.getLogger("pymongo").setLevel(logging.NOTSET)
+
+
+def test_queue_listener_writes_records(unconfigured, monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr(logging_module.sys, "stderr", output)
+    setup_logging({"LOG_LEVEL": "INFO", "LOG_JSON": "True"})
+
+    logging.getLogger("arxiv.test").info("Upserted %s records", 12)
+    logging.getLogger("arxiv.test").debug("Not written")
+    logging_module._stop_listener()
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["message"] == "Upserted 12 records"